@@ -1,4 +1,4 @@
-from .base import *
+from .base import BIT_VALUES
 
 ##
 # @brief Protoype class of a binary (unknown) number of a format "number = sum( 2^i*x_i )", i in (0,n-1), where n is the bit length of the represented number, and x_i are the unknown (or partially unknown) bits.
@@ -27,7 +27,7 @@ class abstract_bin_num():
 		if xi in BIT_VALUES:			
 			self._known_bits[str(i)] = xi
 		else:
-			raise Exception('The possible values of xi must be in ' + BIT_VALUES)
+			raise Exception('The possible values of xi must be in ' + str(BIT_VALUES))
 
 	##
 	# @brief Get the dictionary of the bit labels
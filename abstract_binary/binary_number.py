@@ -1,4 +1,4 @@
-from .base import *
+from .base import num_format
 
 			
 		
@@ -29,6 +29,12 @@ class bin_num():
 		# the first two chars (0b) are not counted
 		return len( self._represented_num ) - 2
 
+	##
+	# @brief Get the decimal value of the represented number
+	# @return Returns with the represented number as an integer
+	def get_decimal( self ):
+		return int( self._represented_num, 2 )
+
 	##
 	# @brief Get the bit xi 
 	# @param i The bit index to be queried (i>=0)
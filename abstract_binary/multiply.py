@@ -1,5 +1,5 @@
-from .base import *
-from .abstract_binary_number import *
+from .base import DEBUG
+from .abstract_binary_number import abstract_bin_num
 
 
 
@@ -18,6 +18,10 @@ class multiplication_table():
 		self._block_list = list()
 		# The dictionary of columns containing carry bits
 		self._carry_col_dict = dict()
+		# The dictionary of the weights of the carry bits in the compact encoding {col: (first column of the carry, weight)}. The carry bits missing from the dictionary have the binary weights 2**(col - first column of the carry).
+		self._carry_weight_dict = dict()
+		# The list of the predicted costs of the blocks (filled by method determine_adaptive_blocks)
+		self._block_costs = list()
 		## The first abstract binary number to be multiplied
 		self._p = None
 		## The second abstract binary number to be multiplied
@@ -69,11 +73,25 @@ class multiplication_table():
 			return None
 		
 			
+	##
+	# @brief Gets the weight of the carry bit of a column in the sum of a block
+	# @param col The index labeling column. col >=0
+	# @param power The power of the column in the sum of the block (i.e. the weight of the column is 2**power)
+	# @return Returns with the weight of the carry bit: 2**power for the binary encoding, or the weight of the compact encoding (see method determine_compact_carries) scaled to the power of the column
+	def get_carry_weight( self, col, power ):
+		if col not in self._carry_weight_dict.keys():
+			return 2**power
+
+		(carry_col, weight) = self._carry_weight_dict[col]
+		return weight * 2**(power - col + carry_col)
+
+
 	##
 	# @brief Determines the column-blocks in the multiplication table (see Table 1 and 2 in arXiv:1804.02733)
 	# @param max_block_size The maximal block size
+	# @param compact_carries Set True to encode the carries of the blocks by method determine_compact_carries
 	# @return Returns with the list of block separators. (i.e. the list of the last columns of each block in the multiplication table)
-	def determine_blocks( self, max_block_size):
+	def determine_blocks( self, max_block_size, compact_carries=False ):
 		# The firs block contains only the first column labeled by 2^0
 		self._block_list.append( 0 )
 		
@@ -86,12 +104,7 @@ class multiplication_table():
 		min_next_block_size = max_block_size
 		while col <= max_col:
 			
-			if col < self._q.bit_length():
-				max_carry = col+1
-			elif col < self._p.bit_length():
-				max_carry = self._q.bit_length()
-			else:
-				max_carry = self._p.bit_length() + self._q.bit_length() - col - 1
+			max_carry = self.get_column_height( col )
 				
 			if DEBUG:
 				print('max carry in col ' + str(col) + ':  ' + str(max_carry))	
@@ -141,9 +154,249 @@ class multiplication_table():
 			print()
 			print('The list of the carry bits')
 			print( self._carry_col_dict )
-	
-	
+
+		if compact_carries:
+			self.determine_compact_carries()
+
+
+	##
+	# @brief Gets the maximal values of the carries leaving the blocks. The maximal value of the sum of a block is given by the heights of its columns (see method get_column_height) and by the maximal carry entering the block.
+	# @return Returns with the list of the maximal carries leaving the blocks
+	def get_max_carries( self ):
+		max_carries = [0]
+		for block_id in range(1, len(self._block_list)):
+			first_col = self._block_list[block_id-1]+1
+			last_col = self._block_list[block_id]
+
+			max_block_sum = max_carries[-1]
+			for col in range(first_col, last_col+1):
+				max_block_sum = max_block_sum + self.get_column_height( col )*2**(col-first_col)
+			max_carries.append( max_block_sum >> (last_col - first_col + 1) )
+
+		return max_carries
+
+
+	##
+	# @brief Encodes the carries of the blocks by the exact ranges of their values. The carry leaving a block with maximal value M (see method get_max_carries) is encoded by k = bit_length(M) variables in the first k columns of the next block with the weights 1, 2, ..., 2**(k-2) and M - 2**(k-1) + 1, so the variables represent exactly the values 0, ..., M and the weight of the last variable does not exceed 2**(k-1). The encoding never uses more variables than the binary carry bits given by method determine_blocks: where k exceeds their number, the binary carry bits of the block are kept.
+	# @return Returns with the dictionary of columns containing carry bits
+	def determine_compact_carries( self ):
+		# test whether the blocks are already constructed
+		if len( self._block_list ) == 0:
+			raise Exception('Firt construct the blocks by method multiplication_table.determine_blocks')
+
+		self._carry_weight_dict = dict()
+
+		max_carries = self.get_max_carries()
+		for block_id in range(1, len(self._block_list)-1):
+			carry_col = self._block_list[block_id]+1
+			next_cols = range(carry_col, self._block_list[block_id+1]+1)
+			binary_cols = [col for col in next_cols if isinstance( self._carry_col_dict.get( col ), str )]
+			bit_num = max_carries[block_id].bit_length()
+			if bit_num > len( binary_cols ):
+				# the binary carry bits are kept
+				continue
+
+			for col in binary_cols:
+				del self._carry_col_dict[col]
+
+			for bit in range(0, bit_num):
+				col = carry_col + bit
+				self._carry_col_dict[col] = 'c' + str(col)
+				if bit < bit_num-1:
+					self._carry_weight_dict[col] = (carry_col, 2**bit)
+				else:
+					self._carry_weight_dict[col] = (carry_col, max_carries[block_id] - 2**bit + 1)
+
+		if DEBUG:
+			print()
+			print('The compact encoding of the carry bits')
+			print( self._carry_weight_dict )
+
+		return self._carry_col_dict
+
+
+	##
+	# @brief Determines the values of the carry bits encoding a given carry (see methods get_carry and get_carry_weight)
+	# @param carry_col The first column of the carry (i.e. the first column of the block the carry enters)
+	# @param carry The value of the carry
+	# @return Returns with a dictionary {col: bit value} of the carry bits, or None if the carry can not be encoded by the carry bits
+	def get_carry_bits( self, carry_col, carry ):
+		# the carry bits are in the block the carry enters, the carry bits of the following block belong to the next carry
+		last_col = min( col for col in self._block_list if col >= carry_col )
+		cols = [col for col in range(carry_col, last_col+1) if isinstance( self._carry_col_dict.get( col ), str )]
+
+		# the carry bits are assigned from the highest weight, the lower bits with binary weights encode the remainder
+		carry_bits = dict()
+		for col in reversed( cols ):
+			weight = self.get_carry_weight( col, col-carry_col )
+			carry_bits[col] = 1 if carry >= weight else 0
+			carry = carry - carry_bits[col]*weight
+
+		if carry != 0:
+			return None
+
+		return carry_bits
+
 		
+	##
+	# @brief Sets the column-blocks of the multiplication table determined previously (for example by another instance of the class of the same shape)
+	# @param block_list The list of block separators. (i.e. the list of the last columns of each block in the multiplication table)
+	# @param carry_col_dict The dictionary of columns containing carry bits (optional)
+	# @param carry_weight_dict The dictionary of the weights of the carry bits in the compact encoding (optional, see method get_carry_weights)
+	def set_blocks( self, block_list, carry_col_dict=None, carry_weight_dict=None ):
+		if block_list[-1] != self._p.bit_length() + self._q.bit_length() - 1:
+			raise Exception('The block list does not match the bit lengths of p and q')
+
+		self._block_list = list( block_list )
+		if carry_col_dict is None:
+			self._carry_col_dict = dict()
+		else:
+			self._carry_col_dict = dict( carry_col_dict )
+
+		if carry_weight_dict is None:
+			self._carry_weight_dict = dict()
+		else:
+			self._carry_weight_dict = dict( carry_weight_dict )
+
+
+	##
+	# @brief Gets the column-blocks of the multiplication table
+	# @return Returns with a tuple of (list of block separators, dictionary of the carry columns)
+	def get_blocks( self ):
+		return (self._block_list, self._carry_col_dict)
+
+
+	##
+	# @brief Gets the weights of the carry bits in the compact encoding (see method determine_compact_carries)
+	# @return Returns with a dictionary {col: (first column of the carry, weight)}, which is empty for the binary encoding
+	def get_carry_weights( self ):
+		return self._carry_weight_dict
+
+
+	##
+	# @brief Gets the number of the p_i*q_j products in a given column of the multiplication table (i.e. the maximal value of the column sum without carries)
+	# @param col The index labeling column. col >=0
+	# @return Returns with the number of the products in the column
+	def get_column_height( self, col ):
+		if col < self._q.bit_length():
+			return col+1
+		elif col < self._p.bit_length():
+			return self._q.bit_length()
+		else:
+			return max(self._p.bit_length() + self._q.bit_length() - col - 1, 0)
+
+
+	##
+	# @brief Gets the number of the new (not yet involved) bits of p and q in the columns first_col, ..., last_col.
+	# @param first_col The first column of the block
+	# @param last_col The last column of the block
+	# @return Returns with a tuple (number of new p bits, number of new q bits)
+	def get_new_bit_num( self, first_col, last_col ):
+		p_bit_num = max( min(last_col, self._p.bit_length()-1) - first_col + 1, 0 )
+		q_bit_num = max( min(last_col, self._q.bit_length()-1) - first_col + 1, 0 )
+		return (p_bit_num, q_bit_num)
+
+
+	##
+	# @brief Predicts the cost of the exhaustive search over a block in the iterative solution. The cost is measured in the number of the candidate (p,q) bit assignments to be evaluated.
+	# @param first_col The first column of the block
+	# @param last_col The last column of the block
+	# @param frontier_size The number of the partial solutions entering the block
+	# @return Returns with a tuple (number of candidates, expected number of the surviving partial solutions)
+	def predict_block_cost( self, first_col, last_col, frontier_size ):
+		(p_bit_num, q_bit_num) = self.get_new_bit_num( first_col, last_col )
+		candidates = frontier_size * 2**(p_bit_num + q_bit_num)
+
+		# the last_col-first_col+1 lowest bits of the block sum must match the bits of the target, while the true solution always survives
+		survivors = max( candidates / 2**(last_col-first_col+1), 1 )
+		return (candidates, survivors)
+
+
+	##
+	# @brief Determines the column-blocks in the multiplication table from a cost model instead of the carry-width rules of method determine_blocks. Starting from the lowest column the width of each block is chosen to minimize the predicted cost per covered column, so the early blocks (small frontier) become wide, while the later blocks (large frontier) become narrow.
+	# @param max_block_size The maximal block size
+	# @param block_overhead The fixed cost of processing a block (in units of candidate evaluations)
+	# @param frontier_overhead The cost of processing a partial solution entering a block (in units of candidate evaluations)
+	# @param carry_overlap Set True to allow carries overlapping several blocks (the iterative solver tracks the carries as integers), or False to keep the carry bits of a block within the next block. In the latter case the carry bits are registered in the dictionary of the carry columns.
+	# @return Returns with the list of block separators. (i.e. the list of the last columns of each block in the multiplication table)
+	def determine_adaptive_blocks( self, max_block_size, block_overhead=1000, frontier_overhead=10, carry_overlap=False ):
+		self._block_list = [0]
+		self._carry_col_dict = dict()
+		self._block_costs = list()
+
+		max_col = self._p.bit_length() + self._q.bit_length() - 1
+
+		# the first column is fixed by the odd target, so the frontier starts with a single partial solution
+		frontier_size = 1
+		max_carry_in = 0
+		first_col = 1
+		while first_col <= max_col:
+
+			# the block should be at least as wide as the number of the incoming carry bits
+			min_block_size = 1
+			if not carry_overlap:
+				min_block_size = max( max_carry_in.bit_length(), 1 )
+				if min_block_size > max_block_size:
+					raise Exception('The given maximal block size is insufficient because overlap in the carries appears.')
+
+			best = None
+			for block_size in range(min_block_size, max_block_size+1):
+				last_col = min( first_col + block_size - 1, max_col )
+				(candidates, survivors) = self.predict_block_cost( first_col, last_col, frontier_size )
+				cost_per_col = (block_overhead + frontier_size*frontier_overhead + candidates) / (last_col - first_col + 1)
+				if best is None or cost_per_col < best[0]:
+					best = (cost_per_col, last_col, candidates, survivors)
+
+				if last_col == max_col:
+					break
+
+			(cost_per_col, last_col, candidates, survivors) = best
+
+			# the maximal value of the block sum determines the carry to the next block
+			max_block_sum = max_carry_in
+			for col in range(first_col, last_col+1):
+				max_block_sum = max_block_sum + self.get_column_height( col )*2**(col-first_col)
+			max_carry_in = max_block_sum >> (last_col - first_col + 1)
+
+			if not carry_overlap and last_col < max_col:
+				for carry_col_idx in range(last_col+1, last_col+1+max_carry_in.bit_length()):
+					self._carry_col_dict[carry_col_idx] = 'c' + str(carry_col_idx)
+
+			self._block_list.append( last_col )
+			self._block_costs.append( {'cols': (first_col, last_col), 'candidates': candidates, 'frontier': survivors} )
+
+			frontier_size = survivors
+			first_col = last_col + 1
+
+		if DEBUG:
+			print()
+			print('The list of the adaptive block separators')
+			print( self._block_list )
+			print('The predicted costs of the blocks')
+			print( self._block_costs )
+
+		return self._block_list
+
+
+	##
+	# @brief Gets the predicted costs of the blocks. (For blocks determined by method determine_blocks the costs are predicted by method predict_block_cost on demand.)
+	# @return Returns with a list of dictionaries {'cols': (first column, last column), 'candidates': predicted number of candidates, 'frontier': predicted number of surviving partial solutions}
+	def get_block_costs( self ):
+		if len( self._block_costs ) > 0:
+			return self._block_costs
+
+		block_costs = list()
+		frontier_size = 1
+		for block_id in range(1, len(self._block_list)):
+			first_col = self._block_list[block_id-1]+1
+			last_col = self._block_list[block_id]
+			(candidates, survivors) = self.predict_block_cost( first_col, last_col, frontier_size )
+			block_costs.append( {'cols': (first_col, last_col), 'candidates': candidates, 'frontier': survivors} )
+			frontier_size = survivors
+
+		return block_costs
+
+
 	##
 	# @brief Gets the 0<=col-th column of the multiplication table in form a BQM (https://docs.ocean.dwavesys.com/en/latest/docs_dimod/reference/bqm/binary_quadratic_model.html) described by a dictionary
 	# @param col The index labeling column. col >=0
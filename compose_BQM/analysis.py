@@ -0,0 +1,375 @@
+from abstract_binary.binary_number import bin_num
+from abstract_binary.abstract_binary_number import abstract_bin_num
+from compose_BQM.compose_BQM import BQM_from_multiplication_table
+
+import json
+import math
+import numpy as np
+import sys
+import time
+
+# Set True to show debug information, or False otherwise
+DEBUG = False
+
+# Chimera lattice: a grid of K_{4,4} cells, vertical qubits coupled along the columns and horizontal qubits along the rows (degree 6)
+LATTICE_CHIMERA = 'chimera'
+
+# Pegasus-like lattice: the Chimera lattice extended by odd couplers inside the cells and by couplers to the orthogonal qubits of the neighboring cells (degree 15, a local stand-in for the Pegasus topology)
+LATTICE_PEGASUS = 'pegasus'
+
+# The number of the qubits in a shore of a cell
+SHORE_SIZE = 4
+
+# The path cost of the unreachable qubits
+UNREACHABLE = 2**40
+
+
+##
+# @brief Builds the interaction graph of a cost function
+# @param cost_function The dictionary of the cost function {(x_i, x_j): value}
+# @return Returns with a tuple (variables, adjacency): the sorted list of the variable labels and the list of the sets of the indices of the neighbors of the variables
+def interaction_graph( cost_function ):
+	variables = set()
+	for key in cost_function.keys():
+		variables.update( key )
+	variables = sorted( variables )
+	index = {variable: idx for idx, variable in enumerate(variables)}
+
+	adjacency = [set() for variable in variables]
+	for (key, value) in cost_function.items():
+		if key[0] != key[1] and value != 0:
+			adjacency[index[key[0]]].add( index[key[1]] )
+			adjacency[index[key[1]]].add( index[key[0]] )
+
+	return (variables, adjacency)
+
+
+##
+# @brief Calculates the statistics of the interaction graph and of the coefficients of a cost function
+# @param cost_function The dictionary of the cost function {(x_i, x_j): value}
+# @return Returns with a dictionary {'variables', 'edges', 'max_degree', 'mean_degree', 'max_coeff', 'min_coeff', 'dynamic_range', 'dynamic_range_bits'}. The dynamic range is the ratio of the largest and the smallest nonzero absolute values of the coefficients.
+def graph_stats( cost_function ):
+	(variables, adjacency) = interaction_graph( cost_function )
+	degrees = [len(neighbors) for neighbors in adjacency]
+
+	magnitudes = [abs(value) for value in cost_function.values() if value != 0]
+	max_coeff = max( magnitudes ) if len(magnitudes) > 0 else 0
+	min_coeff = min( magnitudes ) if len(magnitudes) > 0 else 0
+	dynamic_range = max_coeff / min_coeff if min_coeff > 0 else 0
+
+	return {'variables': len(variables), 'edges': sum(degrees) // 2, 'max_degree': max( degrees, default=0 ), 'mean_degree': sum(degrees) / max( len(degrees), 1 ),
+		'max_coeff': max_coeff, 'min_coeff': min_coeff, 'dynamic_range': dynamic_range, 'dynamic_range_bits': math.log2(dynamic_range) if dynamic_range > 0 else 0}
+
+
+##
+# @brief Gets the index of a qubit of a lattice (see function lattice_graph)
+# @param size The number of the rows (and columns) of the cells
+# @param i The row of the cell
+# @param j The column of the cell
+# @param u The shore of the qubit in the cell (0: vertical, 1: horizontal)
+# @param k The index of the qubit in the shore
+# @return Returns with the index of the qubit
+def get_qubit( size, i, j, u, k ):
+	return ((i*size + j)*2 + u)*SHORE_SIZE + k
+
+
+##
+# @brief Generates a lattice of qubits
+# @param lattice The type of the lattice: LATTICE_CHIMERA or LATTICE_PEGASUS
+# @param size The number of the rows (and columns) of the cells
+# @return Returns with a (number of qubits x maximal degree) int32 matrix of the neighbors of the qubits, padded by the number of the qubits
+def lattice_graph( lattice=LATTICE_CHIMERA, size=16 ):
+	if lattice not in (LATTICE_CHIMERA, LATTICE_PEGASUS):
+		raise ValueError('Unknown lattice: ' + str(lattice))
+
+	t = SHORE_SIZE
+	qubit_num = size*size*2*t
+
+	def qubit( i, j, u, k ):
+		return get_qubit( size, i, j, u, k )
+
+	neighbors = [set() for idx in range(0, qubit_num)]
+	def couple( q1, q2 ):
+		neighbors[q1].add( q2 )
+		neighbors[q2].add( q1 )
+
+	for i in range(0, size):
+		for j in range(0, size):
+			for k in range(0, t):
+				# the couplers of the K_{t,t} cell
+				for l in range(0, t):
+					couple( qubit(i, j, 0, k), qubit(i, j, 1, l) )
+
+				# the couplers between the cells along the lines of the qubits
+				if i+1 < size:
+					couple( qubit(i, j, 0, k), qubit(i+1, j, 0, k) )
+				if j+1 < size:
+					couple( qubit(i, j, 1, k), qubit(i, j+1, 1, k) )
+
+				if lattice == LATTICE_PEGASUS:
+					# odd couplers inside the shores
+					couple( qubit(i, j, 0, k), qubit(i, j, 0, k ^ 1) )
+					couple( qubit(i, j, 1, k), qubit(i, j, 1, k ^ 1) )
+					# couplers to the orthogonal qubits of the next cells
+					for l in range(0, t):
+						if i+1 < size:
+							couple( qubit(i, j, 0, k), qubit(i+1, j, 1, l) )
+						if j+1 < size:
+							couple( qubit(i, j, 1, k), qubit(i, j+1, 0, l) )
+
+	max_degree = max( len(qubit_neighbors) for qubit_neighbors in neighbors )
+	neighbor_matrix = np.full( (qubit_num, max_degree), qubit_num, dtype=np.int32 )
+	for idx in range(0, qubit_num):
+		neighbor_matrix[idx, :len(neighbors[idx])] = sorted( neighbors[idx] )
+
+	return neighbor_matrix
+
+
+##
+# @brief Class to estimate the chain lengths of a minor embedding of an interaction graph onto a lattice by a greedy heuristic: the variables are placed one after the other, each new chain is grown along the cheapest paths towards the chains of its placed neighbors, and the chains are ripped up and routed again in a few rounds (a simplified version of the usual heuristic embedding algorithms). No hardware or embedding library is needed.
+class embedding_estimator():
+
+	##
+	# @brief Constructor of the class.
+	# @param lattice The type of the lattice: LATTICE_CHIMERA or LATTICE_PEGASUS
+	# @param size The number of the rows (and columns) of the cells of the lattice
+	# @param rounds The maximal number of the placement rounds: all the chains are ripped up and routed again with increasing penalty of the shared qubits until no qubit is shared
+	def __init__( self, lattice=LATTICE_CHIMERA, size=16, rounds=8 ):
+		## The type of the lattice
+		self.lattice = lattice
+		## The number of the rows (and columns) of the cells of the lattice
+		self.size = size
+		## The neighbor matrix of the lattice padded by the number of the qubits
+		self.neighbors = lattice_graph( lattice, size )
+		## The number of the qubits
+		self.qubit_num = self.neighbors.shape[0]
+		## The maximal degree of the lattice
+		self.degree = self.neighbors.shape[1]
+		## The number of the placement rounds
+		self.rounds = rounds
+		## The list of the qubit arrays of the chains of the last estimated embedding
+		self.chains = None
+
+
+	##
+	# @brief Routes a chain of a variable towards the chains of its placed neighbors. Entering a qubit used by k other chains costs penalty^k, so the overlaps are avoided more and more strictly as the penalty increases round by round.
+	# @param neighbor_chains The list of the qubit arrays of the placed neighbors
+	# @param usage The array of the numbers of the chains using the qubits (the padding qubit is set unreachable)
+	# @param center_distances The distances of the qubits from the center of the lattice
+	# @param penalty The penalty base of the used qubits
+	# @return Returns with the sorted qubit array of the chain
+	def get_chain( self, neighbor_chains, usage, center_distances, penalty ):
+		costs = np.minimum( penalty**np.minimum( usage, 32 ), UNREACHABLE )
+
+		if len( neighbor_chains ) == 0:
+			# the first variable of a component is placed to the cheapest qubit closest to the center
+			return np.array( [np.lexsort( (center_distances[:self.qubit_num], costs[:self.qubit_num]) )[0]] )
+
+		# the root of the chain minimizes the total cost of the paths from the chains of the neighbors (the cost of the root is counted once)
+		neighbor_distances = [self.get_distances( chain, costs ) for chain in neighbor_chains]
+		total = sum( neighbor_distances ) - (len(neighbor_distances)-1)*costs
+		for chain in neighbor_chains:
+			total[chain] = UNREACHABLE*len(neighbor_distances)
+		root = int( np.argmin( total[:self.qubit_num] ) )
+
+		# the chain is grown along the cheapest paths from the root towards the chains of the neighbors
+		chain = {root}
+		for distances in neighbor_distances:
+			qubit = root
+			while True:
+				next_qubits = self.neighbors[qubit]
+				next_qubit = next_qubits[np.argmin( distances[next_qubits] )]
+				if distances[next_qubit] == 0:
+					break
+				qubit = next_qubit
+				chain.add( qubit )
+
+		return np.array( sorted(chain) )
+
+
+	##
+	# @brief Calculates the costs of the cheapest paths from a chain to the qubits by vectorized relaxation
+	# @param sources The array of the qubits of the chain
+	# @param costs The int64 array of the costs of entering the qubits (the padding qubit included)
+	# @return Returns with the int64 array of the path costs (the padding qubit included)
+	def get_distances( self, sources, costs ):
+		distances = np.full( self.qubit_num+1, UNREACHABLE, dtype=np.int64 )
+		distances[sources] = 0
+		while True:
+			relaxed = np.minimum( distances[:self.qubit_num], distances[self.neighbors].min( axis=1 ) + costs[:self.qubit_num] )
+			if np.array_equal( relaxed, distances[:self.qubit_num] ):
+				return distances
+			distances[:self.qubit_num] = relaxed
+
+
+	##
+	# @brief Gives a lower bound of the chain length of a variable from its degree: a chain of L qubits has at most L*(degree-2)+2 couplers to other chains.
+	# @param variable_degree The degree of the variable in the interaction graph
+	# @return Returns with the lower bound of the chain length
+	def get_degree_bound( self, variable_degree ):
+		if variable_degree <= self.degree:
+			return 1
+		return int( math.ceil( (variable_degree - 2) / (self.degree - 2) ) )
+
+
+	##
+	# @brief Gives the chain length of the native clique embedding of the Chimera lattice (contained in both lattices): K_N is embedded with chains of ceil(N/4)+1 qubits if N <= 4*size.
+	# @param variable_num The number of the variables
+	# @return Returns with the chain length, or None if the clique does not fit into the lattice
+	def get_clique_chain( self, variable_num ):
+		if variable_num > SHORE_SIZE*self.size:
+			return None
+		return int( math.ceil( variable_num / SHORE_SIZE ) ) + 1
+
+
+	##
+	# @brief Gives the chains of the native clique embedding of the Chimera lattice (see method get_clique_chain). The G = ceil(N/4) groups of four variables use the first G rows and columns of the cells: variable 4g+k is chained by the vertical qubits k of the cells (g, g), ..., (G-1, g) and by the horizontal qubits k of the cells (g, 0), ..., (g, g). Two chains g < h meet in cell (h, g).
+	# @param variable_num The number of the variables
+	# @return Returns with the list of the sorted qubit arrays of the chains, or None if the clique does not fit into the lattice
+	def get_clique_chains( self, variable_num ):
+		if variable_num > SHORE_SIZE*self.size:
+			return None
+
+		group_num = int( math.ceil( variable_num / SHORE_SIZE ) )
+		chains = list()
+		for variable in range(0, variable_num):
+			(g, k) = divmod( variable, SHORE_SIZE )
+			chain = [get_qubit( self.size, i, g, 0, k ) for i in range(g, group_num)] + [get_qubit( self.size, g, j, 1, k ) for j in range(0, g+1)]
+			chains.append( np.array( sorted(chain) ) )
+
+		return chains
+
+
+	##
+	# @brief Estimates the chain lengths of an embedding of an interaction graph. The chains of the native clique embedding are used instead of the heuristic embedding when the heuristic fails or gives longer chains.
+	# @param adjacency The list of the sets of the neighbors of the variables (see function interaction_graph)
+	# @return Returns with a dictionary {'lattice', 'size', 'qubits', 'embedded', 'overlaps', 'chain_lengths', 'max_chain', 'mean_chain', 'max_degree_bound', 'clique_chain', 'method', 'time'}. The degree bound and the chain length of the clique embedding give a lower and an upper reference of the chain lengths. The chains of the heuristic are allowed to overlap when no free path is left; the number of the extra uses of the shared qubits is given by 'overlaps' and 'embedded' is True only for an embedding without overlaps. The method is 'heuristic' or 'clique'.
+	def estimate( self, adjacency ):
+		start_time = time.time()
+		variable_num = len( adjacency )
+		chains = [None]*variable_num
+
+		# the variables are placed in breadth first order starting from the variable of the largest degree
+		order = list()
+		placed = np.zeros( variable_num, dtype=bool )
+		for root in sorted( range(0, variable_num), key=lambda idx: -len(adjacency[idx]) ):
+			if placed[root]:
+				continue
+			placed[root] = True
+			queue = [root]
+			while len( queue ) > 0:
+				variable = queue.pop(0)
+				order.append( variable )
+				for neighbor in sorted( adjacency[variable], key=lambda idx: -len(adjacency[idx]) ):
+					if not placed[neighbor]:
+						placed[neighbor] = True
+						queue.append( neighbor )
+
+		# the number of the chains using the qubits
+		usage = np.zeros( self.qubit_num+1, dtype=np.int64 )
+		usage[self.qubit_num] = UNREACHABLE
+		center_distances = self.get_distances( np.array([self.qubit_num // 2]), np.ones( self.qubit_num+1, dtype=np.int64 ) )
+
+		# the clique embedding embeds any graph of at most 4*size variables
+		clique_chain = self.get_clique_chain( variable_num )
+
+		overlaps = None
+		for round_idx in range(0, self.rounds):
+			if round_idx > 0:
+				round_overlaps = int( np.sum( np.maximum( usage[:self.qubit_num]-1, 0 ) ) )
+				# the rounds are finished when no qubit is shared or the overlaps are not reduced any more
+				if round_overlaps == 0 or (overlaps is not None and round_overlaps >= overlaps):
+					break
+				# the later rounds remove the overlaps by longer chains, so they can not beat the clique embedding any more
+				if clique_chain is not None and max( len(chain) for chain in chains ) > clique_chain:
+					break
+				overlaps = round_overlaps
+
+			for variable in order:
+				if chains[variable] is not None:
+					# rip-up of the chain in the later rounds
+					usage[chains[variable]] = usage[chains[variable]] - 1
+					chains[variable] = None
+
+				chains[variable] = self.get_chain( [chains[neighbor] for neighbor in adjacency[variable] if chains[neighbor] is not None], usage, center_distances, 2**(round_idx+1) )
+				usage[chains[variable]] = usage[chains[variable]] + 1
+
+		overlaps = int( np.sum( np.maximum( usage[:self.qubit_num]-1, 0 ) ) )
+		method = 'heuristic'
+
+		if clique_chain is not None and variable_num > 0 and (overlaps > 0 or max( len(chain) for chain in chains ) > clique_chain):
+			chains = self.get_clique_chains( variable_num )
+			overlaps = 0
+			method = 'clique'
+
+		self.chains = chains
+
+		chain_lengths = [len(chain) for chain in chains]
+		degree_bounds = [self.get_degree_bound( len(neighbors) ) for neighbors in adjacency]
+		result = {'lattice': self.lattice, 'size': self.size, 'qubits': sum(chain_lengths), 'embedded': overlaps == 0, 'overlaps': overlaps, 'chain_lengths': chain_lengths,
+			'max_chain': max( chain_lengths, default=0 ), 'mean_chain': sum(chain_lengths) / max( variable_num, 1 ), 'max_degree_bound': max( degree_bounds, default=0 ), 'clique_chain': clique_chain, 'method': method, 'time': time.time() - start_time}
+
+		if DEBUG:
+			print('Embedding estimate: ' + str(result['qubits']) + ' qubits, max chain ' + str(result['max_chain']) + ', mean chain ' + str(result['mean_chain']))
+
+		return result
+
+
+##
+# @brief Analyses the BQM cost function of a factorization problem
+# @param p_bits The bit length of the first factor
+# @param q_bits The bit length of the second factor
+# @param block_size The maximal size of the blocks in the multiplication table
+# @param target The number to be factorized (optional). For None the product of the smallest odd numbers of the given bit lengths is used, since the interaction graph does not depend on the target.
+# @param estimator An instance of class embedding_estimator (optional). For None the embedding is not estimated.
+# @return Returns with a dictionary {'p_bits', 'q_bits', 'block_size', 'blocks', 'compose_time'} completed by the keys of function graph_stats and by {'embedding'} if an estimator is given
+def analyse_BQM( p_bits, q_bits, block_size, target=None, estimator=None ):
+	if target is None:
+		target = (2**(p_bits-1)+1) * (2**(q_bits-1)+1)
+
+	start_time = time.time()
+	num1 = abstract_bin_num( p_bits )
+	num2 = abstract_bin_num( q_bits )
+	num1.set_bit( 0, 1 )
+	num2.set_bit( 0, 1 )
+	cBQM = BQM_from_multiplication_table( num1, num2, bin_num(target) )
+	cBQM.determine_blocks( block_size )
+	cBQM.compose_cost_function()
+	(BQM_model, constant) = cBQM.get_cost_function()
+
+	result = {'p_bits': p_bits, 'q_bits': q_bits, 'block_size': block_size, 'blocks': len( cBQM.get_blocks()[0] ), 'compose_time': time.time() - start_time}
+	result.update( graph_stats( BQM_model ) )
+
+	if estimator is not None:
+		embedding = estimator.estimate( interaction_graph( BQM_model )[1] )
+		del embedding['chain_lengths']
+		result['embedding'] = embedding
+
+	return result
+
+
+##
+# @brief Analyses the BQM cost functions over a grid of balanced factor sizes and block sizes
+# @param bit_lengths Iterable of the bit lengths of the factors
+# @param block_sizes Iterable of the maximal block sizes
+# @param lattice The type of the lattice of the embedding estimate (for None the embedding is not estimated)
+# @param size The number of the rows (and columns) of the cells of the lattice
+# @return Returns with a list of the dictionaries of function analyse_BQM. Layouts which can not be composed (see method multiplication_table.determine_blocks) are reported by an 'error' key.
+def analyse_grid( bit_lengths, block_sizes, lattice=LATTICE_CHIMERA, size=16 ):
+	estimator = embedding_estimator( lattice, size ) if lattice is not None else None
+
+	results = list()
+	for bits in bit_lengths:
+		for block_size in block_sizes:
+			try:
+				results.append( analyse_BQM( bits, bits, block_size, estimator=estimator ) )
+			except Exception as err:
+				results.append( {'p_bits': bits, 'q_bits': bits, 'block_size': block_size, 'error': str(err)} )
+
+	return results
+
+
+if __name__ == '__main__':
+	# python -m compose_BQM.analysis [lattice [size]]: the analysis of the grid in JSON lines format
+	for result in analyse_grid( range(4, 11, 2), range(2, 6), *sys.argv[1:2], *[int(arg) for arg in sys.argv[2:3]] ):
+		print( json.dumps( result ) )
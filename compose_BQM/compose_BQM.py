@@ -29,6 +29,8 @@ class reduce_higher_order_polynomials():
 		self._penalties = dict()
 		# The default value of the panelty amplitude
 		self._penalty_amplitude = 30
+		# a dictionary collecting the (new variable: increase of the panelty amplitude) pairs while the cost function is streamed (None otherwise)
+		self._penalty_increments = None
 
 	##
 	# @brief Gets the default amplitude of the panelty function.
@@ -88,6 +90,24 @@ class reduce_higher_order_polynomials():
 			raise('The new variable has not yet been introduced. Use method set_substitution to create the substitution first.')
 			pass
 
+		if self._penalty_increments is not None:
+			self._penalty_increments[subs_var] = self._penalty_increments.get( subs_var, 0 ) + panelty_amplitude
+
+
+	##
+	# @brief Gets the BQM terms of a penalty of a substitution with a given amplitude (see Eq. (5) in arXiv:1804.02733v2)
+	# @param subs_var A string of the variable that has been introduced as a substitution
+	# @param panelty_amplitude A scalar amplitude of the panelty function
+	# @return Returns with the dictionary of the BQM terms of the penalty
+	def get_penalty_terms( self, subs_var, panelty_amplitude ):
+		(x1, x2) = self._substituted_vars[ subs_var ]
+		panelty = dict()
+		panelty[ tuple( sorted([x1,x2])) ] = panelty_amplitude
+		panelty[ tuple( sorted([x1,subs_var])) ] = - 2*panelty_amplitude
+		panelty[ tuple( sorted([x2,subs_var])) ] = - 2*panelty_amplitude
+		panelty[(subs_var,subs_var)] = 3*panelty_amplitude
+		return panelty
+
 
 	##
 	# @brief Gets the substituted variable pairs
@@ -215,6 +235,62 @@ class BQM_from_multiplication_table( multiplication_table, reduce_higher_order_p
 	def get_cost_function(self):
 		return (self._cost_function, self._cost_function_constant)
 
+	##
+	# @brief Composes the cost function of all the blocks including the penalties of the substitutions
+	# @return Returns with the cost function and its contant part in form of a (dict, constants) tuple.
+	def compose_cost_function(self):
+		self._cost_function = dict()
+		self._cost_function_constant = 0
+		for block_id in range(0, len(self._block_list)):
+			self.cost_function_of_block( block_id, update_cost_function=True )
+
+		self.add_penalties_to_cost_function()
+		return self.get_cost_function()
+
+	##
+	# @brief Generates the cost function block by block without collecting it in the memory. The sum of the yielded terms equals to the cost function composed by method compose_cost_function (the same terms might be yielded by several blocks and their coefficients should be added). Only the terms of the current block are stored by the class.
+	# @return Yields tuples (block_id, cost_function, constant, penalties) of the dictionary of the BQM terms of the block, its constant part and the dictionary of the BQM terms of the penalties created or increased by the block
+	def iterate_cost_function(self):
+		for block_id in range(0, len(self._block_list)):
+			self._penalty_increments = dict()
+			try:
+				self.cost_function_of_block( block_id, update_cost_function=False )
+				increments = self._penalty_increments
+			finally:
+				self._penalty_increments = None
+
+			penalties = dict()
+			for subs_var, panelty_amplitude in increments.items():
+				for key, value in self.get_penalty_terms( subs_var, panelty_amplitude ).items():
+					penalties[key] = penalties.get( key, 0 ) + value
+
+			(cost_function, constant) = self.get_cost_function()
+			yield (block_id, cost_function, constant, penalties)
+
+		self._cost_function = dict()
+		self._cost_function_constant = 0
+
+	##
+	# @brief Gets the decimal values of the factors p and q from a sample of the cost function. The known bits of p and q are taken from the abstract binary numbers.
+	# @param sample A dictionary (or a mapping) of (variable label: value) pairs
+	# @return Returns with a tuple (p, q) of integers
+	def get_factors_from_sample(self, sample):
+		factors = list()
+		for num in (self._p, self._q):
+			bit_labels = num.get_bit_labels()
+			value = 0
+			for bit in range(0, num.bit_length()):
+				if num.check_bit( bit ):
+					bit_value = num.get_bit( bit )
+				elif bit_labels[bit] in sample:
+					bit_value = sample[bit_labels[bit]]
+				else:
+					bit_value = 0
+				value = value + int(bit_value)*2**bit
+			factors.append( value )
+
+		return tuple(factors)
+
 	##
 	# @brief Generate the cost function (pq-n)**2 for the bits of a given block for qbsolv. The higher order terms are reduced to quadratic forms
 	# @param block_id >= 0 The number identificating the corresponding block
@@ -388,17 +464,19 @@ class BQM_from_multiplication_table( multiplication_table, reduce_higher_order_p
 			if DEBUG:
 				print('The BQM model of the col=' + str(col) + ' :' + str(col_BQM_dict))
 			
-			# adding the column BQM to the block BQM
-			constant = block_BQM_dict[ CONST ] #first save the constant from beeing overwritten
-			block_BQM_dict.update( col_BQM_dict )
-			block_BQM_dict[ CONST ] = block_BQM_dict[ CONST ] + constant
+			# adding the column BQM to the block BQM (the linear terms of the known bits might appear in several columns)
+			for key, value in col_BQM_dict.items():
+				if key in block_BQM_dict.keys():
+					block_BQM_dict[key] = block_BQM_dict[key] + value
+				else:
+					block_BQM_dict[key] = value
 
 			# Now add the carry in the given column from the BQM model
 			carry = self.get_carry(col)
 			if type(carry) == str:
-				block_BQM_dict[ carry ] = 2**power
+				block_BQM_dict[ carry ] = self.get_carry_weight(col, power)
 			elif carry != None:
-				block_BQM_dict[ CONST ] = block_BQM_dict[ CONST ] + carry*2**power
+				block_BQM_dict[ CONST ] = block_BQM_dict[ CONST ] + carry*self.get_carry_weight(col, power)
 			else:
 				pass
 			
@@ -428,9 +506,9 @@ class BQM_from_multiplication_table( multiplication_table, reduce_higher_order_p
 			# Now subtrack the carry in the given column from the BQM model
 				carry = self.get_carry(col)
 				if type(carry) == str:
-					block_BQM_dict[ carry ] = -2**power
+					block_BQM_dict[ carry ] = -self.get_carry_weight(col, power)
 				elif carry != None:
-					block_BQM_dict[ CONST ] = block_BQM_dict[ CONST ] - carry*2**power
+					block_BQM_dict[ CONST ] = block_BQM_dict[ CONST ] - carry*self.get_carry_weight(col, power)
 				else:
 					pass
 
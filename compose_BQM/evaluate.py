@@ -0,0 +1,112 @@
+from compose_BQM.sparse import sparse_BQM
+
+import numpy as np
+
+# Set True to show debug information, or False otherwise
+DEBUG = False
+
+# The number of the bits decoded at once into int64 integers
+CHUNK_BITS = 62
+
+
+##
+# @brief Class to evaluate many samples of a BQM cost function at once: energies, consistency of the substitutions, decoded factors p and q, and the check p*q == n.
+class sample_evaluator():
+
+	##
+	# @brief Constructor of the class.
+	# @param cBQM An instance of class compose_BQM.compose_BQM.BQM_from_multiplication_table (or of a derived class) providing the substitutions and the bits of p and q
+	# @param target The number to be factorized (integer, optional). For None the validity of the factors is not checked.
+	# @param cost_function The cost function given by a (dict, constant) tuple or by an instance of class compose_BQM.sparse.sparse_BQM (optional). For None method cBQM.get_cost_function is used.
+	def __init__( self, cBQM, target=None, cost_function=None ):
+		if cost_function is None:
+			cost_function = cBQM.get_cost_function()
+		if not isinstance( cost_function, sparse_BQM ):
+			cost_function = sparse_BQM( cost_function[0], cost_function[1] )
+
+		## The sparse form of the cost function
+		self.sparse = cost_function
+		## The number to be factorized
+		self.target = target
+
+		index = self.sparse.index
+
+		# the index arrays of the substitutions s = a*b
+		substitutions = [(pair, subs_var) for pair, subs_var in cBQM.get_substitutions().items() if subs_var in index]
+		self._subs_a = np.array( [index[pair[0]] for pair, subs_var in substitutions], dtype=np.int32 )
+		self._subs_b = np.array( [index[pair[1]] for pair, subs_var in substitutions], dtype=np.int32 )
+		self._subs_s = np.array( [index[subs_var] for pair, subs_var in substitutions], dtype=np.int32 )
+
+		# the unknown bits of p and q given by (bit, index of the variable), and the values of the known bits
+		(p, q) = cBQM.get_abstract_nums()
+		self._nums = list()
+		for num in (p, q):
+			bit_labels = num.get_bit_labels()
+			known_value = 0
+			unknown_bits = list()
+			for bit in range(0, num.bit_length()):
+				if num.check_bit( bit ):
+					known_value = known_value + num.get_bit( bit )*2**bit
+				elif bit_labels[bit] in index:
+					unknown_bits.append( (bit, index[bit_labels[bit]]) )
+			self._nums.append( (known_value, unknown_bits) )
+
+
+	##
+	# @brief Decodes the values of a number from the samples
+	# @param samples A (number of samples x number of variables) uint8 matrix
+	# @param known_value The value of the known bits
+	# @param unknown_bits A list of (bit, index of the variable) tuples
+	# @return Returns with an array of the decoded values (int64 if they fit, otherwise Python integers)
+	def decode( self, samples, known_value, unknown_bits ):
+		max_bit = max( [bit for bit, idx in unknown_bits] + [known_value.bit_length()-1, 0] )
+
+		if max_bit < CHUNK_BITS:
+			values = np.full( samples.shape[0], known_value, dtype=np.int64 )
+			if len( unknown_bits ) > 0:
+				columns = np.array( [idx for bit, idx in unknown_bits], dtype=np.int32 )
+				weights = np.array( [2**bit for bit, idx in unknown_bits], dtype=np.int64 )
+				values = values + samples[:, columns].astype(np.int64).dot( weights )
+			return values
+
+		# decode the bits in chunks of CHUNK_BITS bits and combine the chunks with Python integers
+		values = np.full( samples.shape[0], known_value, dtype=object )
+		for chunk_start in range(0, max_bit+1, CHUNK_BITS):
+			chunk = [(bit, idx) for bit, idx in unknown_bits if chunk_start <= bit < chunk_start+CHUNK_BITS]
+			if len( chunk ) == 0:
+				continue
+			columns = np.array( [idx for bit, idx in chunk], dtype=np.int32 )
+			weights = np.array( [2**(bit-chunk_start) for bit, idx in chunk], dtype=np.int64 )
+			values = values + (samples[:, columns].astype(np.int64).dot( weights )).astype(object) * 2**chunk_start
+
+		return values
+
+
+	##
+	# @brief Evaluates the samples
+	# @param samples A (number of samples x number of variables) matrix with columns ordered as self.sparse.variables, or an iterable of dictionaries of (variable label: value) pairs
+	# @return Returns with a dictionary of arrays {'energy', 'substitutions_ok', 'p', 'q', 'valid'}. 'valid' is True if p*q equals the target (or None if no target was given).
+	def evaluate( self, samples ):
+		if not isinstance( samples, np.ndarray ):
+			samples = self.sparse.samples_to_matrix( samples )
+		samples = np.asarray( samples, dtype=np.uint8 )
+
+		result = dict()
+		result['energy'] = self.sparse.energies( samples )
+		result['substitutions_ok'] = np.all( samples[:, self._subs_s] == (samples[:, self._subs_a] & samples[:, self._subs_b]), axis=1 )
+		result['p'] = self.decode( samples, *self._nums[0] )
+		result['q'] = self.decode( samples, *self._nums[1] )
+
+		if self.target is None:
+			result['valid'] = None
+		elif result['p'].dtype == np.int64 and result['q'].dtype == np.int64 and int(result['p'].max(initial=0)).bit_length() + int(result['q'].max(initial=0)).bit_length() <= CHUNK_BITS:
+			# the products fit into int64
+			result['valid'] = result['p']*result['q'] == self.target
+		else:
+			result['valid'] = np.array( [int(p)*int(q) == self.target for p, q in zip(result['p'], result['q'])], dtype=bool )
+
+		if DEBUG:
+			print('Evaluated ' + str(samples.shape[0]) + ' samples, valid factorizations: ' + str(np.count_nonzero(result['valid'])))
+
+		return result
+
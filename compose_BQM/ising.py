@@ -0,0 +1,180 @@
+from compose_BQM.sparse import sparse_BQM, INT64_LIMIT, MAX_CHUNK_ELEMENTS
+
+import copy
+import numpy as np
+
+# Set True to show debug information, or False otherwise
+DEBUG = False
+
+
+##
+# @brief Class to store a BQM cost function in Ising form E(s) = sum_i h_i s_i + sum_{i<j} J_ij s_i s_j + offset with spins s_i = 2x_i-1 in {-1, +1}.
+# @description The conversion is exact: the four-fold coefficients 4h, 4J and 4*offset are integers, which are kept in int64 (or in Python integers if int64 could overflow). The float64 arrays h and J can be scaled into the coefficient range of an annealer and quantized onto an integer grid, while the energies stay reversibly mapped to the energies of the QUBO cost function: E_QUBO = scale*E_Ising.
+class ising_BQM():
+
+	##
+	# @brief Constructor of the class.
+	# @param cost_function The cost function given by a (dict, constant) tuple or by an instance of class compose_BQM.sparse.sparse_BQM
+	def __init__( self, cost_function ):
+		if not isinstance( cost_function, sparse_BQM ):
+			cost_function = sparse_BQM( cost_function[0], cost_function[1] )
+
+		## The sparse form of the QUBO cost function
+		self.sparse = cost_function
+		## The list of the variable labels
+		self.variables = self.sparse.variables
+
+		variable_num = self.sparse.get_variable_num()
+		# the four-fold coefficients might overflow int64
+		dtype = self.sparse.coeffs.dtype if 4*self.sparse.max_energy <= INT64_LIMIT else object
+		diagonal = self.sparse.rows == self.sparse.cols
+
+		# the coefficients of (x_i, x_j) and (x_j, x_i) are merged into one coupling with i<j
+		rows = np.minimum( self.sparse.rows[~diagonal], self.sparse.cols[~diagonal] )
+		cols = np.maximum( self.sparse.rows[~diagonal], self.sparse.cols[~diagonal] )
+		(pairs, inverse) = np.unique( rows.astype(np.int64)*variable_num + cols, return_inverse=True )
+		quadratic = np.zeros( len(pairs), dtype=dtype )
+		np.add.at( quadratic, inverse.ravel(), self.sparse.coeffs[~diagonal].astype( dtype ) )
+		linear = np.zeros( variable_num, dtype=dtype )
+		np.add.at( linear, self.sparse.rows[diagonal], self.sparse.coeffs[diagonal].astype( dtype ) )
+
+		## The indices of the first spins of the couplings
+		self.rows = (pairs // variable_num).astype( np.int32 )
+		## The indices of the second spins of the couplings
+		self.cols = (pairs % variable_num).astype( np.int32 )
+
+		# x_i = (1+s_i)/2 gives 4h_i = 2a_i + sum_j b_ij, 4J_ij = b_ij and 4*offset = 4c + 2*sum_i a_i + sum_ij b_ij
+		self._h4 = 2*linear
+		np.add.at( self._h4, self.rows, quadratic )
+		np.add.at( self._h4, self.cols, quadratic )
+		self._J4 = quadratic
+		self._offset4 = 4*self.sparse.constant + 2*int( linear.sum() ) + int( quadratic.sum() )
+
+		## The linear coefficients of the spins
+		self.h = self._h4.astype( np.float64 ) / 4
+		## The couplings of the spins
+		self.J = self._J4.astype( np.float64 ) / 4
+		## The constant part of the energy
+		self.offset = self._offset4 / 4
+		## The factor mapping the energies onto the energies of the QUBO cost function
+		self.scale = 1.0
+		## The report of the last quantization (or None)
+		self.quantization = None
+
+		if DEBUG:
+			print('Ising model of ' + str(variable_num) + ' spins and ' + str(len(self.J)) + ' couplings')
+
+
+	##
+	# @brief Gets the exact Ising coefficients of the unscaled model
+	# @return Returns with a tuple (h4, J4, offset4) of the four-fold coefficients given by integers
+	def get_exact_coefficients( self ):
+		return (self._h4, self._J4, self._offset4)
+
+
+	##
+	# @brief Gets the Ising model in the dictionary format of the samplers
+	# @return Returns with a tuple (h, J, offset) of the dictionaries {variable label: value}, {(label_i, label_j): value} and the constant part
+	def get_ising( self ):
+		h = dict( zip( self.variables, self.h.tolist() ) )
+		labels = np.array( self.variables, dtype=object )
+		J = dict( zip( zip( labels[self.rows].tolist(), labels[self.cols].tolist() ), self.J.tolist() ) )
+		return (h, J, self.offset)
+
+
+	##
+	# @brief Scales the coefficients into the given ranges (the ranges must contain zero)
+	# @param h_range Tuple (min, max) of the allowed range of the linear coefficients
+	# @param J_range Tuple (min, max) of the allowed range of the couplings
+	# @return Returns with a new instance of the scaled model. Its energies are mapped to the QUBO energies by method to_QUBO_energies.
+	def scaled( self, h_range=(-2.0, 2.0), J_range=(-1.0, 1.0) ):
+		ratios = [1e-300]
+		for (coeffs, (low, high)) in ((self.h, h_range), (self.J, J_range)):
+			if len( coeffs ) == 0:
+				continue
+			if high > 0:
+				ratios.append( coeffs.max() / high )
+			if low < 0:
+				ratios.append( coeffs.min() / low )
+		factor = float( max( ratios ) )
+
+		model = copy.copy( self )
+		model.h = self.h / factor
+		model.J = self.J / factor
+		model.offset = self.offset / factor
+		model.scale = self.scale * factor
+		model.quantization = None
+		return model
+
+
+	##
+	# @brief Quantizes the coefficients onto an integer grid
+	# @param bits The number of the bits of the signed integer levels of the largest coefficient (the step of the grid is max|coeff| / (2^(bits-1)-1)).
+	# @param step The step of the grid (optional, overrides bits)
+	# @return Returns with a new instance of the quantized model. The report of the precision loss is stored in attribute quantization: {'step', 'max_h_error', 'max_J_error', 'energy_error_bound'}. The bound of the energy error is given in the units of the QUBO energies.
+	def quantized( self, bits=8, step=None ):
+		if step is None:
+			max_coeff = max( np.abs(self.h).max( initial=0 ), np.abs(self.J).max( initial=0 ) )
+			step = max_coeff / (2**(bits-1)-1) if max_coeff > 0 else 1.0
+		step = float( step )
+
+		model = copy.copy( self )
+		model.h = np.round( self.h / step ) * step
+		model.J = np.round( self.J / step ) * step
+
+		h_error = np.abs( model.h - self.h )
+		J_error = np.abs( model.J - self.J )
+		model.quantization = {'step': step, 'max_h_error': float( h_error.max( initial=0 ) ), 'max_J_error': float( J_error.max( initial=0 ) ), 'energy_error_bound': float( (h_error.sum() + J_error.sum()) * self.scale )}
+
+		if DEBUG:
+			print('Quantization: ' + str(model.quantization))
+
+		return model
+
+
+	##
+	# @brief Converts 0/1 samples into spins
+	# @param samples A (number of samples x number of variables) matrix of 0/1 values
+	# @return Returns with the int8 matrix of the spins
+	def samples_to_spins( self, samples ):
+		return 2*np.asarray( samples, dtype=np.int8 ) - 1
+
+
+	##
+	# @brief Converts spins into 0/1 samples
+	# @param spins A (number of samples x number of variables) matrix of -1/+1 values
+	# @return Returns with the uint8 matrix of the samples
+	def spins_to_samples( self, spins ):
+		return ((np.asarray( spins ) + 1) // 2).astype( np.uint8 )
+
+
+	##
+	# @brief Calculates the Ising energies of spins
+	# @param spins A (number of samples x number of variables) matrix of -1/+1 values with columns ordered as self.variables
+	# @return Returns with the float64 array of the energies including the offset
+	def energies( self, spins ):
+		spins = np.asarray( spins, dtype=np.float64 )
+		chunk_size = max( MAX_CHUNK_ELEMENTS // max(len(self.J), 1), 1 )
+
+		energies = np.empty( spins.shape[0], dtype=np.float64 )
+		for start in range(0, spins.shape[0], chunk_size):
+			chunk = spins[start:start+chunk_size]
+			energies[start:start+chunk_size] = chunk.dot( self.h ) + (chunk[:, self.rows] * chunk[:, self.cols]).dot( self.J )
+
+		return energies + self.offset
+
+
+	##
+	# @brief Maps Ising energies of the model onto the energies of the QUBO cost function
+	# @param energies The array of the Ising energies
+	# @return Returns with the array of the QUBO energies
+	def to_QUBO_energies( self, energies ):
+		return np.asarray( energies ) * self.scale
+
+
+	##
+	# @brief Maps energies of the QUBO cost function onto the Ising energies of the model
+	# @param energies The array of the QUBO energies
+	# @return Returns with the array of the Ising energies
+	def from_QUBO_energies( self, energies ):
+		return np.asarray( energies, dtype=np.float64 ) / self.scale
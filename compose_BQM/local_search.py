@@ -0,0 +1,226 @@
+from compose_BQM.sparse import sparse_BQM, FLOAT64_LIMIT
+
+import numpy as np
+
+# Set True to show debug information, or False otherwise
+DEBUG = False
+
+# Local search method: steepest descent until a local minimum is reached
+METHOD_GREEDY = 'greedy'
+
+# Local search method: tabu search
+METHOD_TABU = 'tabu'
+
+
+##
+# @brief Class of local search post-processing of QUBO samples: steepest (greedy) descent and tabu search. The samples of a batch are processed simultaneously, and the energy changes of the single bit flips are updated incrementally.
+# @description For a QUBO E(x) = sum_ij Q_ij x_i x_j the energy change of flipping x_i is (1-2x_i)*h_i with the local field h_i = Q_ii + sum_(j!=i) W_ij x_j, where W = Q + Q^T without the diagonal. After flipping x_k the fields change by W_k (1-2x_k).
+class local_search():
+
+	##
+	# @brief Constructor of the class.
+	# @param cost_function The cost function given by a (dict, constant) tuple or by an instance of class compose_BQM.sparse.sparse_BQM
+	def __init__( self, cost_function ):
+		if not isinstance( cost_function, sparse_BQM ):
+			cost_function = sparse_BQM( cost_function[0], cost_function[1] )
+
+		## The sparse form of the cost function
+		self.sparse = cost_function
+
+		# exact float64 arithmetic is used if the energies are small enough, since it is accelerated by BLAS
+		if self.sparse.coeffs.dtype != object and self.sparse.max_energy < FLOAT64_LIMIT:
+			self._dtype = np.float64
+		else:
+			self._dtype = self.sparse.coeffs.dtype
+
+		variable_num = self.sparse.get_variable_num()
+		coeffs = self.sparse.coeffs.astype( self._dtype )
+		diagonal = self.sparse.rows == self.sparse.cols
+
+		# The value masking the energy changes of the tabu bits (above any energy change)
+		if self._dtype == np.float64:
+			self._masked_delta = np.inf
+		elif self._dtype == np.int64:
+			self._masked_delta = np.iinfo( np.int64 ).max
+		else:
+			self._masked_delta = 2*self.sparse.max_energy + 1
+
+		# The linear terms
+		self._linear = np.zeros( variable_num, dtype=self._dtype )
+		np.add.at( self._linear, self.sparse.rows[diagonal], coeffs[diagonal] )
+
+		# The symmetric coupling matrix without diagonal
+		self._couplings = np.zeros( (variable_num, variable_num), dtype=self._dtype )
+		np.add.at( self._couplings, (self.sparse.rows[~diagonal], self.sparse.cols[~diagonal]), coeffs[~diagonal] )
+		self._couplings = self._couplings + self._couplings.T
+
+
+	##
+	# @brief Calculates the local fields of the samples
+	# @param samples A (number of samples x number of variables) matrix of 0/1 values
+	# @return Returns with the (number of samples x number of variables) matrix of the local fields
+	def get_fields( self, samples ):
+		return self._linear + samples.astype( self._dtype ).dot( self._couplings )
+
+
+	##
+	# @brief Flips one bit in each of the given samples and updates the local fields and energies
+	# @param samples The matrix of the samples (modified in place)
+	# @param fields The matrix of the local fields (modified in place)
+	# @param energies The array of the energies (modified in place)
+	# @param sample_indices The indices of the samples to be changed
+	# @param bits The indices of the bits to be flipped in the samples
+	# @param deltas The energy changes of the flips
+	def flip( self, samples, fields, energies, sample_indices, bits, deltas ):
+		signs = 1 - 2*samples[sample_indices, bits].astype( self._dtype )
+		samples[sample_indices, bits] = 1 - samples[sample_indices, bits]
+		fields[sample_indices] = fields[sample_indices] + signs[:, None]*self._couplings[bits]
+		energies[sample_indices] = energies[sample_indices] + deltas
+
+
+	##
+	# @brief Steepest descent: in each step the bit with the most negative energy change is flipped, until a local minimum is reached
+	# @param samples A (number of samples x number of variables) matrix of 0/1 values with columns ordered as self.sparse.variables
+	# @param max_steps The maximal number of the steps (optional)
+	# @return Returns with a tuple (samples, energies) of the improved samples and their energies (including the constant part)
+	def greedy_descent( self, samples, max_steps=None ):
+		samples = np.array( samples, dtype=np.uint8 )
+		fields = self.get_fields( samples )
+		energies = self.sparse.energies( samples ).astype( self._dtype )
+
+		step = 0
+		active = np.arange( samples.shape[0] )
+		while len( active ) > 0 and (max_steps is None or step < max_steps):
+			deltas = (1 - 2*samples[active].astype( self._dtype )) * fields[active]
+			bits = np.argmin( deltas, axis=1 )
+			best_deltas = deltas[np.arange(len(active)), bits]
+
+			# the samples in a local minimum are finished
+			improving = best_deltas < 0
+			active = active[improving]
+			self.flip( samples, fields, energies, active, bits[improving], best_deltas[improving] )
+			step = step + 1
+
+		return (samples, energies)
+
+
+	##
+	# @brief Tabu search: in each step the best non-tabu bit is flipped (even if the energy increases), and the flipped bit becomes tabu for a given number of steps. A tabu bit is allowed if it leads to an energy below the best one found so far.
+	# @param samples A (number of samples x number of variables) matrix of 0/1 values with columns ordered as self.sparse.variables
+	# @param num_steps The number of the steps
+	# @param tenure The number of the steps a flipped bit remains tabu (for None it is min(20, number of variables/4))
+	# @param target_energy The known ground state energy (optional). The search of a sample is finished when it reaches the target energy, for None all the steps are made.
+	# @return Returns with a tuple (samples, energies) of the best samples found and their energies (including the constant part)
+	def tabu_search( self, samples, num_steps=100, tenure=None, target_energy=None ):
+		samples = np.array( samples, dtype=np.uint8 )
+		(sample_num, variable_num) = samples.shape
+		if tenure is None:
+			tenure = max( min( 20, variable_num//4 ), 1 )
+
+		fields = self.get_fields( samples )
+		energies = self.sparse.energies( samples ).astype( self._dtype )
+		best_samples = samples.copy()
+		best_energies = energies.copy()
+
+		all_samples = np.arange( sample_num )
+		tabu_until = np.zeros( (sample_num, variable_num), dtype=np.int64 )
+		for step in range(0, num_steps):
+			# the samples reaching the ground state can not be improved
+			active = all_samples if target_energy is None else all_samples[best_energies > target_energy]
+			if len( active ) == 0:
+				break
+
+			deltas = (1 - 2*samples[active].astype( self._dtype )) * fields[active]
+			allowed = (tabu_until[active] <= step) | (energies[active][:, None] + deltas < best_energies[active][:, None])
+			masked_deltas = np.where( allowed, deltas, self._masked_delta )
+			bits = np.argmin( masked_deltas, axis=1 )
+			best_deltas = deltas[np.arange(len(active)), bits]
+
+			self.flip( samples, fields, energies, active, bits, best_deltas )
+			tabu_until[active, bits] = step + tenure + 1
+
+			# save the improved samples
+			improved = active[energies[active] < best_energies[active]]
+			best_samples[improved] = samples[improved]
+			best_energies[improved] = energies[improved]
+
+		return (best_samples, best_energies)
+
+
+	##
+	# @brief Repairs a batch of samples by local search
+	# @param samples A (number of samples x number of variables) matrix with columns ordered as self.sparse.variables, or an iterable of dictionaries of (variable label: value) pairs
+	# @param method The local search method: METHOD_GREEDY or METHOD_TABU
+	# @param kwargs Keyword arguments of the method greedy_descent or tabu_search. The tabu search is finished at zero energy, since the cost functions of the factorization are non-negative.
+	# @return Returns with a tuple (samples, energies, stats), where stats is a dictionary {'samples', 'initial_zero', 'final_zero', 'repaired'} counting the samples of zero energy before and after the local search
+	def repair( self, samples, method=METHOD_TABU, **kwargs ):
+		if not isinstance( samples, np.ndarray ):
+			samples = self.sparse.samples_to_matrix( samples )
+
+		initial_energies = self.sparse.energies( samples )
+		if method == METHOD_GREEDY:
+			(samples, energies) = self.greedy_descent( samples, **kwargs )
+		elif method == METHOD_TABU:
+			(samples, energies) = self.tabu_search( samples, **dict( {'target_energy': 0}, **kwargs ) )
+		else:
+			raise Exception('Unknown local search method ' + str(method))
+
+		energies = energies.astype( self.sparse.coeffs.dtype )
+		stats = dict()
+		stats['samples'] = samples.shape[0]
+		stats['initial_zero'] = int( np.count_nonzero( initial_energies == 0 ) )
+		stats['final_zero'] = int( np.count_nonzero( energies == 0 ) )
+		stats['repaired'] = int( np.count_nonzero( (initial_energies != 0) & (energies == 0) ) )
+
+		if DEBUG:
+			print('Local search (' + method + '): ' + str(stats))
+
+		return (samples, energies, stats)
+
+
+##
+# @brief Class of the samples returned by class tabu_sampler. It provides the methods of the dimod sample sets used in this package.
+class sample_set():
+
+	##
+	# @brief Constructor of the class.
+	# @param samples The list of the samples given by dictionaries of (variable label: value) pairs
+	# @param energies The list of the energies of the samples
+	def __init__( self, samples, energies ):
+		order = np.argsort( energies, kind='stable' )
+		self._samples = [samples[idx] for idx in order]
+		self._energies = [energies[idx] for idx in order]
+		## The data vectors of the samples
+		self.data_vectors = {'energy': self._energies}
+
+
+	##
+	# @brief Gets the samples ordered by their energies
+	# @return Returns with the list of the samples
+	def samples( self ):
+		return self._samples
+
+
+##
+# @brief Class of a QUBO sampler starting tabu searches (see method local_search.tabu_search) from random samples. The interface follows the dimod samplers.
+class tabu_sampler():
+
+	##
+	# @brief Samples a QUBO
+	# @param Q The dictionary of the QUBO {(x_i, x_j): value}
+	# @param num_reads The number of the random starting samples
+	# @param num_steps The number of the tabu steps
+	# @param tenure The number of the steps a flipped bit remains tabu (optional)
+	# @param seed The seed of the random starting samples (optional)
+	# @param target_energy The known ground state energy of the QUBO (optional, for example minus the constant part of a cost function of the factorization). The search of a sample is finished when it reaches the target energy.
+	# @return Returns with an instance of class sample_set. The energies do not contain a constant part.
+	def sample_qubo( self, Q, num_reads=100, num_steps=200, tenure=None, seed=None, target_energy=None ):
+		search = local_search( (Q, 0) )
+		rng = np.random.default_rng( seed )
+		samples = rng.integers( 0, 2, size=(num_reads, search.sparse.get_variable_num()), dtype=np.uint8 )
+		(samples, energies) = search.tabu_search( samples, num_steps=num_steps, tenure=tenure, target_energy=target_energy )
+
+		variables = search.sparse.variables
+		sample_dicts = [dict( zip(variables, sample.tolist()) ) for sample in samples]
+		return sample_set( sample_dicts, energies.astype( search.sparse.coeffs.dtype ).tolist() )
+
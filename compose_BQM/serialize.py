@@ -0,0 +1,193 @@
+from compose_BQM.sparse import sparse_BQM, sparse_BQM_from_arrays
+
+import json
+import mmap
+import numpy as np
+import os
+import struct
+
+# Set True to show debug information, or False otherwise
+DEBUG = False
+
+# The magic bytes at the beginning of the format
+MAGIC = b'QACBQM\x00\x00'
+
+# The version of the format
+FORMAT_VERSION = 1
+
+# The layout of the fixed part of the header: magic bytes, version, length of the JSON header
+FIXED_HEADER = struct.Struct( '<8sII' )
+
+# The alignment of the arrays in bytes
+ALIGNMENT = 8
+
+# The range of the coefficients stored in the int64 array
+INT64_MIN = -2**63
+INT64_MAX = 2**63 - 1
+
+
+##
+# @brief Calculates the padding of an offset to the alignment of the arrays
+# @param offset The offset in bytes
+# @return Returns with the number of the padding bytes
+def _padding( offset ):
+	return (-offset) % ALIGNMENT
+
+
+##
+# @brief Serializes a cost function with its substitutions and penalties into a compact binary format: a fixed header, a JSON header (variable table, constant, substitution map, penalty amplitudes, array layout) and the aligned arrays of the int32 indices and of the int64 (or float64) coefficients. The coefficients overflowing int64 are stored in the JSON header.
+# @param cost_function The dictionary of the cost function {(x_i, x_j): value} or an instance of class compose_BQM.sparse.sparse_BQM
+# @param constant The constant part of the cost function (ignored for a sparse_BQM)
+# @param substitutions The dictionary of the substitutions {(x_i, x_j): new variable} (see method reduce_higher_order_polynomials.get_substitutions)
+# @param penalties The dictionary of the penalties {new variable: penalty BQM} (see method reduce_higher_order_polynomials.get_penalties)
+# @return Returns with the bytes of the serialized cost function
+def to_bytes( cost_function, constant=0, substitutions=None, penalties=None ):
+	if not isinstance( cost_function, sparse_BQM ):
+		cost_function = sparse_BQM( cost_function, constant )
+
+	coeffs = cost_function.coeffs
+	overflow = dict()
+	if coeffs.dtype == object:
+		if all( isinstance(coeff, (int, np.integer)) for coeff in coeffs ):
+			overflow = {str(idx): str(coeff) for idx, coeff in enumerate(coeffs) if not INT64_MIN <= coeff <= INT64_MAX}
+			coeffs = np.array( [coeff if INT64_MIN <= coeff <= INT64_MAX else 0 for coeff in coeffs], dtype=np.int64 )
+		else:
+			coeffs = coeffs.astype( np.float64 )
+	coeffs = np.ascontiguousarray( coeffs )
+
+	# the amplitude of a penalty is the third of its diagonal term
+	penalty_amplitudes = dict()
+	if penalties is not None:
+		penalty_amplitudes = {subs_var: penalty[(subs_var, subs_var)] // 3 for subs_var, penalty in penalties.items()}
+
+	header = {'variables': cost_function.variables, 'terms': len(coeffs), 'coeff_dtype': str(coeffs.dtype), 'constant': str(cost_function.constant) if isinstance(cost_function.constant, (int, np.integer)) else float(cost_function.constant),
+		'overflow': overflow, 'substitutions': [[subs_var, pair[0], pair[1]] for pair, subs_var in (substitutions or dict()).items()], 'penalties': [[subs_var, str(amplitude)] for subs_var, amplitude in penalty_amplitudes.items()]}
+	header_bytes = json.dumps( header ).encode( 'utf-8' )
+
+	chunks = [FIXED_HEADER.pack( MAGIC, FORMAT_VERSION, len(header_bytes) ), header_bytes]
+	offset = FIXED_HEADER.size + len(header_bytes)
+	for array in (cost_function.rows.astype( np.int32 ), cost_function.cols.astype( np.int32 ), coeffs):
+		chunks.append( b'\x00'*_padding( offset ) )
+		offset = offset + _padding( offset )
+		chunks.append( array.tobytes() )
+		offset = offset + array.nbytes
+
+	return b''.join( chunks )
+
+
+##
+# @brief Class to access a serialized cost function. The arrays of the terms are not copied: they are views of the given buffer (for example of a memory mapped file).
+class serialized_BQM():
+
+	##
+	# @brief Constructor of the class.
+	# @param buffer A bytes-like object (bytes, memoryview, mmap) of the serialized cost function (see function to_bytes)
+	def __init__( self, buffer ):
+		(magic, version, header_length) = FIXED_HEADER.unpack_from( buffer, 0 )
+		if magic != MAGIC:
+			raise Exception('The buffer is not a serialized BQM')
+		if version != FORMAT_VERSION:
+			raise Exception('Unsupported version of the serialized BQM: ' + str(version))
+
+		offset = FIXED_HEADER.size
+		header = json.loads( bytes( buffer[offset:offset+header_length] ).decode( 'utf-8' ) )
+		offset = offset + header_length
+
+		arrays = list()
+		for dtype in (np.int32, np.int32, np.dtype( header['coeff_dtype'] )):
+			offset = offset + _padding( offset )
+			arrays.append( np.frombuffer( buffer, dtype=dtype, count=header['terms'], offset=offset ) )
+			offset = offset + arrays[-1].nbytes
+		(rows, cols, coeffs) = arrays
+
+		if len( header['overflow'] ) > 0:
+			coeffs = coeffs.astype( object )
+			for (idx, value) in header['overflow'].items():
+				coeffs[int(idx)] = int(value)
+
+		constant = header['constant']
+		constant = int( constant ) if isinstance( constant, str ) else constant
+
+		## The buffer of the serialized cost function (kept alive while the arrays are used)
+		self.buffer = buffer
+		## The cost function in sparse format (instance of class compose_BQM.sparse.sparse_BQM)
+		self.sparse = sparse_BQM_from_arrays( header['variables'], rows, cols, coeffs, constant )
+		# The dictionary of the substitutions {(x_i, x_j): new variable}
+		self._substitutions = {(x1, x2): subs_var for (subs_var, x1, x2) in header['substitutions']}
+		# The dictionary of the penalty amplitudes {new variable: amplitude}
+		self._penalty_amplitudes = {subs_var: int(amplitude) for (subs_var, amplitude) in header['penalties']}
+
+
+	##
+	# @brief Gets the cost function in the dictionary format (the repeated terms are added)
+	# @return Returns with the cost function and its contant part in form of a (dict, constants) tuple.
+	def get_cost_function( self ):
+		cost_function = dict()
+		labels = self.sparse.variables
+		for (row, col, coeff) in zip( self.sparse.rows.tolist(), self.sparse.cols.tolist(), self.sparse.coeffs.tolist() ):
+			key = (labels[row], labels[col])
+			cost_function[key] = cost_function.get( key, 0 ) + coeff
+
+		return (cost_function, self.sparse.constant)
+
+
+	##
+	# @brief Gets the substituted variable pairs
+	# @return Returns with the directory containing the substituted pairs.
+	def get_substitutions( self ):
+		return self._substitutions
+
+
+	##
+	# @brief Gets the panelty BQMs
+	# @return Returns with the dictionary of the BQM panelties of the substitutions
+	def get_penalties( self ):
+		penalties = dict()
+		for (pair, subs_var) in self._substitutions.items():
+			if subs_var not in self._penalty_amplitudes:
+				continue
+			amplitude = self._penalty_amplitudes[subs_var]
+			(x1, x2) = pair
+			penalty = dict()
+			penalty[ tuple( sorted([x1,x2])) ] = amplitude
+			penalty[ tuple( sorted([x1,subs_var])) ] = - 2*amplitude
+			penalty[ tuple( sorted([x2,subs_var])) ] = - 2*amplitude
+			penalty[(subs_var,subs_var)] = 3*amplitude
+			penalties[subs_var] = penalty
+
+		return penalties
+
+
+##
+# @brief Saves the composed cost function of a BQM_from_multiplication_table instance with its substitutions and penalties into a file (written atomically)
+# @param cBQM An instance of class compose_BQM.compose_BQM.BQM_from_multiplication_table with composed cost function
+# @param path The path of the file
+# @return Returns with the size of the file in bytes
+def save_BQM( cBQM, path ):
+	(cost_function, constant) = cBQM.get_cost_function()
+	data = to_bytes( cost_function, constant, cBQM.get_substitutions(), cBQM.get_penalties() )
+
+	tmp_path = path + '.tmp' + str(os.getpid())
+	with open( tmp_path, 'wb' ) as f:
+		f.write( data )
+	os.replace( tmp_path, path )
+
+	if DEBUG:
+		print('Serialized BQM of ' + str(len(data)) + ' bytes written to ' + path)
+
+	return len( data )
+
+
+##
+# @brief Loads a serialized cost function from a file
+# @param path The path of the file
+# @param use_mmap Set True to map the file into the memory without copying the arrays (the file should not be modified while it is used)
+# @return Returns with an instance of class serialized_BQM
+def load_BQM( path, use_mmap=True ):
+	with open( path, 'rb' ) as f:
+		if use_mmap:
+			buffer = mmap.mmap( f.fileno(), 0, access=mmap.ACCESS_READ )
+		else:
+			buffer = f.read()
+
+	return serialized_BQM( buffer )
@@ -0,0 +1,135 @@
+import numpy as np
+
+# Set True to show debug information, or False otherwise
+DEBUG = False
+
+# The largest absolute value of an energy that can be accumulated in int64 without overflow
+INT64_LIMIT = 2**63 - 1
+
+# The largest absolute value of an energy that can be accumulated exactly in float64 (used for BLAS accelerated products)
+FLOAT64_LIMIT = 2**53
+
+# The maximal number of the (sample, term) products evaluated at once
+MAX_CHUNK_ELEMENTS = 2**22
+
+
+##
+# @brief Class to store a BQM cost function (see method BQM_from_multiplication_table.get_cost_function) in a sparse array format: a table of the variables, int32 index arrays of the terms and an array of the coefficients.
+# @description The linear terms (x_i, x_i) are stored as diagonal terms. The coefficients are stored in int64 if the energies can not overflow, otherwise in an array of Python integers (dtype=object) to keep the arithmetic exact.
+class sparse_BQM():
+
+	##
+	# @brief Constructor of the class.
+	# @param cost_function The dictionary of the cost function {(x_i, x_j): value}
+	# @param constant The constant part of the cost function
+	# @param variables The list of the variable labels defining the order of the variables (optional). For None the variables are sorted.
+	def __init__( self, cost_function, constant=0, variables=None ):
+
+		if variables is None:
+			variables = set()
+			for key in cost_function.keys():
+				variables.update( key )
+			variables = sorted( variables )
+
+		## The list of the variable labels
+		self.variables = list( variables )
+		## The dictionary (variable label: index)
+		self.index = {variable: idx for idx, variable in enumerate(self.variables)}
+		## The constant part of the cost function
+		self.constant = constant
+
+		keys = list( cost_function.keys() )
+		## The indices of the first variables of the terms
+		self.rows = np.fromiter( (self.index[key[0]] for key in keys), dtype=np.int32, count=len(keys) )
+		## The indices of the second variables of the terms
+		self.cols = np.fromiter( (self.index[key[1]] for key in keys), dtype=np.int32, count=len(keys) )
+
+		coeffs = [cost_function[key] for key in keys]
+		## The upper bound of the absolute value of the energies
+		self.max_energy = sum( abs(coeff) for coeff in coeffs ) + abs(constant)
+		if self.max_energy <= INT64_LIMIT and all( isinstance(coeff, (int, np.integer)) for coeff in coeffs ):
+			## The coefficients of the terms
+			self.coeffs = np.array( coeffs, dtype=np.int64 )
+		else:
+			self.coeffs = np.array( coeffs, dtype=object )
+
+		if DEBUG:
+			print('Sparse BQM of ' + str(len(self.variables)) + ' variables and ' + str(len(keys)) + ' terms (' + str(self.coeffs.dtype) + ' coefficients)')
+
+
+	##
+	# @brief Gets the number of the variables
+	# @return Returns with the number of the variables
+	def get_variable_num( self ):
+		return len( self.variables )
+
+
+	##
+	# @brief Converts samples into a matrix of the variables
+	# @param samples An iterable of dictionaries (or mappings) of (variable label: value) pairs. The missing variables are set to zero.
+	# @return Returns with a (number of samples x number of variables) uint8 matrix
+	def samples_to_matrix( self, samples ):
+		samples = list( samples )
+		matrix = np.zeros( (len(samples), len(self.variables)), dtype=np.uint8 )
+		for sample_idx in range(0, len(samples)):
+			sample = samples[sample_idx]
+			for variable, idx in self.index.items():
+				if variable in sample:
+					matrix[sample_idx, idx] = sample[variable]
+
+		return matrix
+
+
+	##
+	# @brief Calculates the energies of samples
+	# @param samples A (number of samples x number of variables) matrix of 0/1 values with columns ordered as self.variables
+	# @param chunk_size The number of the samples processed at once (for None it is chosen to bound the memory of the temporary arrays)
+	# @return Returns with an array of the energies including the constant part
+	def energies( self, samples, chunk_size=None ):
+		samples = np.asarray( samples, dtype=np.uint8 )
+		if chunk_size is None:
+			chunk_size = max( MAX_CHUNK_ELEMENTS // max(len(self.coeffs), 1), 1 )
+
+		# the products of float64 values are exact for small enough energies and use BLAS
+		use_float = self.coeffs.dtype != object and self.max_energy < FLOAT64_LIMIT
+		if use_float:
+			coeffs = self.coeffs.astype( np.float64 )
+
+		energies = np.empty( samples.shape[0], dtype=self.coeffs.dtype )
+		for start in range(0, samples.shape[0], chunk_size):
+			chunk = samples[start:start+chunk_size]
+			products = chunk[:, self.rows] & chunk[:, self.cols]
+			if use_float:
+				energies[start:start+chunk_size] = products.astype(np.float64).dot( coeffs )
+			elif self.coeffs.dtype == object:
+				energies[start:start+chunk_size] = products.astype(object).dot( self.coeffs )
+			else:
+				energies[start:start+chunk_size] = products.astype(np.int64).dot( self.coeffs )
+
+		return energies + self.constant
+
+
+
+##
+# @brief Creates a sparse BQM from arrays of the terms (for example loaded from a file). Repeated terms are allowed: their coefficients are added in the energies.
+# @param variables The list of the variable labels
+# @param rows The int32 array of the indices of the first variables of the terms
+# @param cols The int32 array of the indices of the second variables of the terms
+# @param coeffs The int64 (or object) array of the coefficients
+# @param constant The constant part of the cost function
+# @return Returns with an instance of class sparse_BQM sharing the given arrays
+def sparse_BQM_from_arrays( variables, rows, cols, coeffs, constant=0 ):
+	cBQM = sparse_BQM( dict(), constant, variables )
+	cBQM.rows = rows
+	cBQM.cols = cols
+	cBQM.coeffs = coeffs
+	if coeffs.dtype == object:
+		cBQM.max_energy = sum( abs(coeff) for coeff in coeffs ) + abs(constant)
+	else:
+		# the bound is accumulated in float64 (exact, since the partial sums of the absolute values do not exceed the total), and in Python integers if the total reaches FLOAT64_LIMIT
+		cBQM.max_energy = int( np.abs( coeffs.astype(np.float64) ).sum() ) + abs(constant)
+		if cBQM.max_energy >= FLOAT64_LIMIT:
+			cBQM.max_energy = sum( abs(int(coeff)) for coeff in coeffs ) + abs(constant)
+		if cBQM.max_energy > INT64_LIMIT:
+			cBQM.coeffs = coeffs.astype( object )
+	return cBQM
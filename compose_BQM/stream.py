@@ -0,0 +1,146 @@
+from compose_BQM.sparse import sparse_BQM_from_arrays
+
+import json
+import numpy as np
+import os
+
+# Set True to show debug information, or False otherwise
+DEBUG = False
+
+# The version of the columnar format
+COLUMNAR_VERSION = 1
+
+# The file names of the columnar format: the variable labels (one in a line), the int32 indices of the first and second variables of the terms, the int64 coefficients, the coefficients overflowing int64 (term index and decimal value in a line) and the metadata
+VARIABLES_FILE = 'variables.txt'
+ROWS_FILE = 'rows.i32'
+COLS_FILE = 'cols.i32'
+COEFFS_FILE = 'coeffs.i64'
+OVERFLOW_FILE = 'overflow.txt'
+META_FILE = 'meta.json'
+
+# The range of the coefficients stored in the int64 column
+INT64_MIN = -2**63
+INT64_MAX = 2**63 - 1
+
+
+##
+# @brief Class to write BQM terms into a directory in a columnar format chunk by chunk: the terms are appended to the files and only the table of the variable indices is kept in the memory.
+class columnar_writer():
+
+	##
+	# @brief Constructor of the class.
+	# @param directory The directory of the files (created if does not exist, the existing files are overwritten)
+	def __init__( self, directory ):
+		os.makedirs( directory, exist_ok=True )
+
+		## The directory of the files
+		self.directory = directory
+		# The dictionary (variable label: index)
+		self._index = dict()
+		# The number of the written terms
+		self._term_num = 0
+		# The number of the written chunks
+		self._chunk_num = 0
+		# The constant part of the cost function
+		self._constant = 0
+		# The open files
+		self._files = {name: open( os.path.join(directory, name), 'w' if name.endswith('.txt') else 'wb' ) for name in (VARIABLES_FILE, ROWS_FILE, COLS_FILE, COEFFS_FILE, OVERFLOW_FILE)}
+
+
+	##
+	# @brief Appends BQM terms to the files
+	# @param terms The dictionary of the BQM terms {(x_i, x_j): value}
+	# @param constant A constant to be added to the constant part of the cost function
+	def write( self, terms, constant=0 ):
+		rows = np.empty( len(terms), dtype=np.int32 )
+		cols = np.empty( len(terms), dtype=np.int32 )
+		coeffs = np.zeros( len(terms), dtype=np.int64 )
+
+		for idx, (key, value) in enumerate( terms.items() ):
+			for label in key:
+				if label not in self._index:
+					self._index[label] = len( self._index )
+					self._files[VARIABLES_FILE].write( str(label) + '\n' )
+			rows[idx] = self._index[key[0]]
+			cols[idx] = self._index[key[1]]
+
+			if INT64_MIN <= value <= INT64_MAX:
+				coeffs[idx] = value
+			else:
+				self._files[OVERFLOW_FILE].write( str(self._term_num+idx) + ' ' + str(value) + '\n' )
+
+		self._files[ROWS_FILE].write( rows.tobytes() )
+		self._files[COLS_FILE].write( cols.tobytes() )
+		self._files[COEFFS_FILE].write( coeffs.tobytes() )
+		self._term_num = self._term_num + len(terms)
+		self._chunk_num = self._chunk_num + 1
+		self._constant = self._constant + constant
+
+
+	##
+	# @brief Closes the files and writes the metadata
+	# @return Returns with the dictionary of the metadata {'version', 'terms', 'variables', 'chunks', 'constant'}
+	def close( self ):
+		for f in self._files.values():
+			f.close()
+
+		meta = {'version': COLUMNAR_VERSION, 'terms': self._term_num, 'variables': len(self._index), 'chunks': self._chunk_num, 'constant': str(self._constant)}
+		with open( os.path.join(self.directory, META_FILE), 'w' ) as f:
+			json.dump( meta, f )
+
+		if DEBUG:
+			print('Columnar cost function written to ' + self.directory + ': ' + str(meta))
+
+		return meta
+
+
+##
+# @brief Writes the cost function of a BQM_from_multiplication_table instance into a directory in the columnar format block by block, without composing the whole cost function in the memory
+# @param cBQM An instance of class compose_BQM.compose_BQM.BQM_from_multiplication_table with determined blocks
+# @param directory The directory of the files
+# @return Returns with the dictionary of the metadata (see method columnar_writer.close)
+def spill_cost_function( cBQM, directory ):
+	writer = columnar_writer( directory )
+	try:
+		for (block_id, cost_function, constant, penalties) in cBQM.iterate_cost_function():
+			writer.write( cost_function, constant )
+			writer.write( penalties )
+	finally:
+		meta = writer.close()
+
+	return meta
+
+
+##
+# @brief Loads a cost function written in the columnar format
+# @param directory The directory of the files
+# @param mmap Set True to map the index and coefficient arrays from the files without reading them into the memory
+# @return Returns with an instance of class compose_BQM.sparse.sparse_BQM. (The same terms might be stored several times, their coefficients are added in the energies.)
+def load_cost_function( directory, mmap=True ):
+	with open( os.path.join(directory, META_FILE) ) as f:
+		meta = json.load( f )
+	if meta['version'] != COLUMNAR_VERSION:
+		raise Exception('Unsupported version of the columnar format: ' + str(meta['version']))
+
+	with open( os.path.join(directory, VARIABLES_FILE) ) as f:
+		variables = [line.rstrip('\n') for line in f]
+
+	arrays = list()
+	for (name, dtype) in ((ROWS_FILE, np.int32), (COLS_FILE, np.int32), (COEFFS_FILE, np.int64)):
+		path = os.path.join( directory, name )
+		if meta['terms'] == 0:
+			arrays.append( np.zeros( 0, dtype=dtype ) )
+		elif mmap:
+			arrays.append( np.memmap( path, dtype=dtype, mode='r', shape=(meta['terms'],) ) )
+		else:
+			arrays.append( np.fromfile( path, dtype=dtype, count=meta['terms'] ) )
+	(rows, cols, coeffs) = arrays
+
+	with open( os.path.join(directory, OVERFLOW_FILE) ) as f:
+		overflow = [line.split() for line in f]
+	if len( overflow ) > 0:
+		coeffs = coeffs.astype( object )
+		for (term_idx, value) in overflow:
+			coeffs[int(term_idx)] = int(value)
+
+	return sparse_BQM_from_arrays( variables, rows, cols, coeffs, int(meta['constant']) )
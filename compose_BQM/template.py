@@ -0,0 +1,123 @@
+from abstract_binary.binary_number import bin_num
+from compose_BQM.compose_BQM import BQM_from_multiplication_table
+
+
+# Set True to show debug information, or False otherwise
+DEBUG = False
+
+# String in the dictionaries labeling a constant value
+CONST = 'constant'
+
+##
+# @brief Class to compose the target independent part of the BQM cost function for a given shape (bit lengths of p and q and block layout) of the factorization problem.
+# @description For a block the cost function reads (S-T)**2 = S**2 - 2*T*S + T**2, where S is the sum of the block (including the carries) and T is the part of the target number covered by the block. The template composes S**2 (including the substitutions and their penalties) only once, while the cost function of a specific target is obtained by the cheap linear update -2*T*S + T**2.
+class BQM_template( BQM_from_multiplication_table ):
+
+
+	##
+	# @brief Constructor of the class. Values num1 and num2 are stores by class attributes _p and _q such that bit_length(_p) >= bit_length(_q)
+	# @param num1 The first abstract binary number (an instance of class abstract_bin_num)
+	# @param num2 The second abstract binary number (an instance of class abstract_bin_num)
+	# @param max_block_size The maximal block size used to determine the blocks of the multiplication table
+	# @param compact_carries Set True to encode the carries by the exact ranges of their values (see method multiplication_table.determine_compact_carries)
+	def __init__( self, num1, num2, max_block_size, compact_carries=False ):
+		# the template is composed with a vanishing target number
+		BQM_from_multiplication_table.__init__(self, num1, num2, bin_num(0))
+
+		## The maximal block size used to determine the blocks
+		self._max_block_size = max_block_size
+		## Set True to encode the carries compactly
+		self._compact_carries = compact_carries
+		# The list of the columns in the blocks
+		self._block_cols = list()
+		# The list of the linear terms of the blocks multiplied by the target part T of the blocks
+		self._target_terms = list()
+		# The list of the constant parts of the block sums
+		self._block_constants = list()
+
+		self.compose()
+
+
+	##
+	# @brief Composes the target independent part of the cost function and the terms multiplied by the target bits
+	def compose( self ):
+		self.determine_blocks( self._max_block_size, self._compact_carries )
+
+		self._cost_function = dict()
+		self._cost_function_constant = 0
+		for block_id in range(0, len(self._block_list)):
+
+			# determine the columns in the block
+			if block_id == 0:
+				cols = [0]
+			else:
+				cols = list( range( self._block_list[block_id-1]+1, self._block_list[block_id]+1 ) )
+			self._block_cols.append( cols )
+
+			# the terms of -2*T*S divided by T
+			block_BQM_dict = self.sum_up_block( block_id )
+			target_terms = dict()
+			for key, value in block_BQM_dict.items():
+				if key == CONST:
+					continue
+				if isinstance( key, str ):
+					key_new = (key,key)
+				else:
+					key_new = key
+
+				if key_new in target_terms.keys():
+					target_terms[key_new] = target_terms[key_new] - 2*value
+				else:
+					target_terms[key_new] = -2*value
+
+			self._target_terms.append( target_terms )
+			self._block_constants.append( block_BQM_dict[CONST] )
+
+			# the target independent part S**2
+			self.cost_function_of_block( block_id, update_cost_function=True )
+
+		self.add_penalties_to_cost_function()
+
+		if DEBUG:
+			print('The template of the cost function composed for the block layout: ' + str(self._block_list))
+
+
+	##
+	# @brief Gets the part of the target number covered by a given block
+	# @param block_id >= 0 The number identificating the corresponding block
+	# @param target_num The number to be factorized (an instance of class abstract_binary.binary_number.bin_num)
+	# @return Returns with the integer sum( 2**(col-first_col)*n_col ) over the columns of the block
+	def get_block_target( self, block_id, target_num ):
+		cols = self._block_cols[block_id]
+		block_target = 0
+		for col in cols:
+			block_target = block_target + target_num.get_bit(col)*2**(col-cols[0])
+
+		return block_target
+
+
+	##
+	# @brief Gets the cost function for a given target number by substituting the target bits into the template
+	# @param target_num The number to be factorized (an instance of class abstract_binary.binary_number.bin_num, or an integer)
+	# @return Returns with the cost function and its contant part in form of a (dict, constants) tuple.
+	def get_target_cost_function( self, target_num ):
+		if not isinstance(target_num, bin_num):
+			target_num = bin_num( target_num )
+
+		if target_num.bit_length() > self._p.bit_length() + self._q.bit_length():
+			raise Exception('The target number has more bits than the product of p and q')
+
+		cost_function = dict( self._cost_function )
+		constant = self._cost_function_constant
+		for block_id in range(0, len(self._block_cols)):
+			block_target = self.get_block_target( block_id, target_num )
+			if block_target == 0:
+				continue
+
+			for key, value in self._target_terms[block_id].items():
+				cost_function[key] = cost_function[key] + block_target*value
+
+			constant = constant + block_target**2 - 2*block_target*self._block_constants[block_id]
+
+		return (cost_function, constant)
+
@@ -0,0 +1,183 @@
+from abstract_binary.abstract_binary_number import abstract_bin_num
+from abstract_binary.multiply import multiplication_table
+from compose_BQM.template import BQM_template
+
+from collections import OrderedDict
+import hashlib
+import os
+import pickle
+
+# Set True to show debug information, or False otherwise
+DEBUG = False
+
+
+##
+# @brief Class to cache the templates of the BQM cost functions (see class compose_BQM.template.BQM_template) keyed by the shape of the factorization problem: (bit length of p, bit length of q, block list, known bits of p and q).
+# @description The templates are kept in an in-memory LRU cache, and optionally pickled into a directory, so the composition is reused among runs.
+class template_cache():
+
+	##
+	# @brief Constructor of the class.
+	# @param max_size The maximal number of the templates kept in the memory
+	# @param cache_dir The directory to store the pickled templates (optional). For None the templates are kept only in the memory.
+	def __init__( self, max_size=16, cache_dir=None ):
+		## The maximal number of the templates kept in the memory
+		self._max_size = max_size
+		## The directory of the pickled templates
+		self._cache_dir = cache_dir
+		# The in-memory LRU cache of the templates
+		self._templates = OrderedDict()
+		# The statistics of the cache
+		self._stats = {'hits': 0, 'misses': 0, 'disk_hits': 0, 'disk_writes': 0}
+
+		if cache_dir is not None:
+			os.makedirs( cache_dir, exist_ok=True )
+
+
+	##
+	# @brief Determines the key of the template of a given problem shape
+	# @param num1 The first abstract binary number (an instance of class abstract_bin_num)
+	# @param num2 The second abstract binary number (an instance of class abstract_bin_num)
+	# @param max_block_size The maximal block size used to determine the blocks of the multiplication table
+	# @param compact_carries Set True to encode the carries compactly (see method multiplication_table.determine_compact_carries)
+	# @return Returns with a tuple (bit length of p, bit length of q, block list, known bits of p, known bits of q, compact encoding of the carries)
+	def get_key( self, num1, num2, max_block_size, compact_carries=False ):
+		if num1.bit_length() >= num2.bit_length():
+			(p, q) = (num1, num2)
+		else:
+			(p, q) = (num2, num1)
+
+		# the block layout depends only on the bit lengths
+		table = multiplication_table( abstract_bin_num(p.bit_length()), abstract_bin_num(q.bit_length()) )
+		table.determine_blocks( max_block_size )
+		(block_list, carry_col_dict) = table.get_blocks()
+
+		known_bits = list()
+		for num in (p, q):
+			known_bits.append( tuple( (bit, num.get_bit(bit)) for bit in range(0, num.bit_length()) if num.check_bit(bit) ) )
+
+		return (p.bit_length(), q.bit_length(), tuple(block_list), known_bits[0], known_bits[1], compact_carries)
+
+
+	##
+	# @brief Gets the template of the BQM cost function for a given problem shape. The template is composed only if it is not found in the cache.
+	# @param num1 The first abstract binary number (an instance of class abstract_bin_num)
+	# @param num2 The second abstract binary number (an instance of class abstract_bin_num)
+	# @param max_block_size The maximal block size used to determine the blocks of the multiplication table
+	# @param compact_carries Set True to encode the carries compactly (see method multiplication_table.determine_compact_carries)
+	# @return Returns with an instance of class compose_BQM.template.BQM_template
+	def get_template( self, num1, num2, max_block_size, compact_carries=False ):
+		key = self.get_key( num1, num2, max_block_size, compact_carries )
+
+		if key in self._templates.keys():
+			self._stats['hits'] = self._stats['hits'] + 1
+			self._templates.move_to_end( key )
+			return self._templates[key]
+
+		template = self.load( key )
+		if template is not None:
+			self._stats['disk_hits'] = self._stats['disk_hits'] + 1
+		else:
+			self._stats['misses'] = self._stats['misses'] + 1
+
+			# compose the template from copies, so later changes of num1 and num2 do not affect the cached template
+			(p_bits, q_bits, block_list, p_known_bits, q_known_bits, compact_carries) = key
+			p = abstract_bin_num( p_bits )
+			for (bit, value) in p_known_bits:
+				p.set_bit( bit, value )
+			q = abstract_bin_num( q_bits )
+			for (bit, value) in q_known_bits:
+				q.set_bit( bit, value )
+
+			template = BQM_template( p, q, max_block_size, compact_carries )
+			self.store( key, template )
+
+		self._templates[key] = template
+		if len( self._templates ) > self._max_size:
+			self._templates.popitem( last=False )
+
+		return template
+
+
+	##
+	# @brief Gets the name of the file of a pickled template
+	# @param key The key of the template (see method get_key)
+	# @return Returns with the path of the file, or None if there is no cache directory
+	def get_file_name( self, key ):
+		if self._cache_dir is None:
+			return None
+
+		return os.path.join( self._cache_dir, 'template_' + hashlib.sha1( repr(key).encode() ).hexdigest() + '.pickle' )
+
+
+	##
+	# @brief Loads a pickled template from the cache directory
+	# @param key The key of the template (see method get_key)
+	# @return Returns with the template, or None if it was not found
+	def load( self, key ):
+		file_name = self.get_file_name( key )
+		if file_name is None or not os.path.isfile( file_name ):
+			return None
+
+		with open( file_name, 'rb' ) as f:
+			(stored_key, template) = pickle.load( f )
+
+		# protect against hash collisions
+		if stored_key != key:
+			return None
+
+		if DEBUG:
+			print('Template loaded from ' + file_name)
+
+		return template
+
+
+	##
+	# @brief Pickles a template into the cache directory (if given)
+	# @param key The key of the template (see method get_key)
+	# @param template The template to be stored
+	def store( self, key, template ):
+		file_name = self.get_file_name( key )
+		if file_name is None:
+			return
+
+		# write into a temporary file first, so concurrent readers never see a partial file
+		tmp_file_name = file_name + '.' + str(os.getpid()) + '.tmp'
+		with open( tmp_file_name, 'wb' ) as f:
+			pickle.dump( (key, template), f, protocol=pickle.HIGHEST_PROTOCOL )
+		os.replace( tmp_file_name, file_name )
+
+		self._stats['disk_writes'] = self._stats['disk_writes'] + 1
+
+
+	##
+	# @brief Gets the statistics of the cache
+	# @return Returns with a dictionary {'hits', 'misses', 'disk_hits', 'disk_writes', 'size'}
+	def get_stats( self ):
+		stats = dict( self._stats )
+		stats['size'] = len( self._templates )
+		return stats
+
+
+	##
+	# @brief Removes the templates from the memory (the pickled templates are kept) and resets the statistics
+	def clear( self ):
+		self._templates = OrderedDict()
+		for key in self._stats.keys():
+			self._stats[key] = 0
+
+
+## The default cache of the templates
+default_cache = template_cache()
+
+
+##
+# @brief Gets the template of the BQM cost function for a given problem shape from the default cache
+# @param num1 The first abstract binary number (an instance of class abstract_bin_num)
+# @param num2 The second abstract binary number (an instance of class abstract_bin_num)
+# @param max_block_size The maximal block size used to determine the blocks of the multiplication table
+# @param compact_carries Set True to encode the carries compactly (see method multiplication_table.determine_compact_carries)
+# @return Returns with an instance of class compose_BQM.template.BQM_template
+def get_template( num1, num2, max_block_size, compact_carries=False ):
+	return default_cache.get_template( num1, num2, max_block_size, compact_carries )
+
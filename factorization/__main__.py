@@ -0,0 +1,4 @@
+# command line entry point of the factorization package
+from factorization.factor import main
+
+main()
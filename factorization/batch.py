@@ -0,0 +1,97 @@
+from abstract_binary.multiply import multiplication_table
+from abstract_binary.binary_number import bin_num
+from abstract_binary.abstract_binary_number import abstract_bin_num
+from compose_BQM import template_cache
+from factorization.iterative import iterative_factorization
+
+import multiprocessing
+
+# Set True to show debug information, or False otherwise
+DEBUG = False
+
+
+##
+# @brief Runs the iterative factorization of a single target in a worker process
+# @param args Tuple of (bit length of p, bit length of q, block size, adaptive, block list, target)
+# @return Returns with the list of the exact solutions of form {p:binary_format, q:binary_format, CARRY:binary_format}
+def _run_iterative_target( args ):
+	(p_bits, q_bits, block_size, adaptive, block_list, target) = args
+
+	cIter = iterative_factorization( abstract_bin_num(p_bits), abstract_bin_num(q_bits), bin_num(target), block_size, adaptive )
+	cIter.set_blocks( block_list )
+	cIter.run_iterations()
+	return cIter.get_exact_solutions()
+
+
+##
+# @brief Class to factorize many target numbers of the same shape (bit lengths of p and q and block size). The block structure and the symbolic cost function are composed only once, while the targets are substituted afterwards.
+class batch_factorization():
+
+	##
+	# @brief Constructor of the class.
+	# @param p_bits The bit length of the first factor
+	# @param q_bits The bit length of the second factor
+	# @param block_size The (maximal) size of the blocks in the multiplication table
+	# @param adaptive Set True to use adaptive blocks in the iterative solver (see method multiplication_table.determine_adaptive_blocks)
+	# @param cache The cache of the BQM templates (an instance of class compose_BQM.template_cache.template_cache). For None the default cache is used.
+	def __init__( self, p_bits, q_bits, block_size=5, adaptive=False, cache=None ):
+		## The bit length of the first factor
+		self._p_bits = p_bits
+		## The bit length of the second factor
+		self._q_bits = q_bits
+		## The (maximal) size of the blocks
+		self._block_size = block_size
+		## Logical variable to use adaptive blocks in the iterative solver
+		self._adaptive = adaptive
+		# The template of the BQM cost function (composed on demand)
+		self._template = None
+		# The cache of the BQM templates
+		self._cache = template_cache.default_cache if cache is None else cache
+
+		# the block layout of the iterative solver is determined once for all the targets
+		table = multiplication_table( abstract_bin_num(p_bits), abstract_bin_num(q_bits) )
+		if adaptive:
+			table.determine_adaptive_blocks( block_size, carry_overlap=True )
+		else:
+			table.determine_blocks( block_size )
+		(self._block_list, carry_col_dict) = table.get_blocks()
+
+
+	##
+	# @brief Gets the template of the BQM cost function of the shape (composed at the first call, or retrieved from the cache)
+	# @return Returns with an instance of class compose_BQM.template.BQM_template
+	def get_template( self ):
+		if self._template is None:
+			self._template = self._cache.get_template( abstract_bin_num(self._p_bits), abstract_bin_num(self._q_bits), self._block_size )
+
+		return self._template
+
+
+	##
+	# @brief Gets the BQM cost functions of the given targets
+	# @param targets List of the numbers to be factorized (integers)
+	# @return Returns with a list of (dict, constant) tuples of the cost functions. (The substitutions are common, see method get_template)
+	def get_cost_functions( self, targets ):
+		template = self.get_template()
+		return [template.get_target_cost_function( target ) for target in targets]
+
+
+	##
+	# @brief Runs the iterative factorization for the given targets concurrently
+	# @param targets List of the numbers to be factorized (integers)
+	# @param workers The number of the worker processes. (For None the number of the CPU cores is used, for 1 the targets are processed in the calling process.)
+	# @return Returns with a list of the exact solutions (see method iterative_factorization.get_exact_solutions) for each target
+	def run_iterative( self, targets, workers=None ):
+		args = [(self._p_bits, self._q_bits, self._block_size, self._adaptive, self._block_list, target) for target in targets]
+
+		if workers == 1 or len(args) <= 1:
+			return [_run_iterative_target( arg ) for arg in args]
+
+		with multiprocessing.Pool( workers ) as pool:
+			results = pool.map( _run_iterative_target, args )
+
+		if DEBUG:
+			print('Factorized ' + str(len(results)) + ' targets with the block layout: ' + str(self._block_list))
+
+		return results
+
@@ -0,0 +1,183 @@
+import numpy as np
+
+# Set True to show debug information, or False otherwise
+DEBUG = False
+
+# String in the dictionaries labeling carry bits
+CARRY = 'carry'
+
+# The number of the lanes (candidates) packed into a machine word
+LANES = 64
+
+# The maximal number of the lanes evaluated in one batch
+MAX_BATCH_LANES = 2**16
+
+
+##
+# @brief Packs a 0/1 value of each lane into a bit plane
+# @param bits The array of the 0/1 values of the lanes
+# @param word_num The number of the words of the plane
+# @return Returns with the uint64 array of the plane: lane l is stored in bit l%64 of word l//64
+def pack_lanes( bits, word_num ):
+	packed = np.zeros( word_num*8, dtype=np.uint8 )
+	packed_bits = np.packbits( np.asarray( bits, dtype=np.uint8 ), bitorder='little' )
+	packed[:len(packed_bits)] = packed_bits
+	return packed.view( '<u8' )
+
+
+##
+# @brief Unpacks the bits of the lanes from a bit plane
+# @param plane The uint64 array of the plane
+# @param lane_num The number of the lanes
+# @return Returns with the uint8 array of the 0/1 values of the lanes
+def unpack_lanes( plane, lane_num ):
+	return np.unpackbits( plane.view( np.uint8 ), bitorder='little' )[:lane_num]
+
+
+##
+# @brief Adds the bit planes of the same weight by full adders (or by a half adder for the last two planes)
+# @param levels The list of the lists of the planes ordered by their weight. The planes of levels[0] are reduced into a single plane, the carries are appended to levels[1].
+# @param zeros The plane of zero lanes
+# @return Returns with the plane of the sum of levels[0]
+def compress_level( levels, zeros ):
+	planes = levels[0]
+	if len( levels ) == 1:
+		levels.append( list() )
+
+	while len( planes ) > 1:
+		a = planes.pop()
+		b = planes.pop()
+		if len( planes ) > 0:
+			c = planes.pop()
+			a_xor_b = a ^ b
+			planes.append( a_xor_b ^ c )
+			levels[1].append( (a & b) | (c & a_xor_b) )
+		else:
+			planes.append( a ^ b )
+			levels[1].append( a & b )
+
+	return planes[0] if len( planes ) > 0 else zeros
+
+
+##
+# @brief Evaluates the candidate bit assignments of a block for a batch of partial solutions by bit-sliced arithmetic. Each bit of p and q is given by a bit plane over the candidates (lanes), the column sums of the multiplication table are added by full adders, and the lanes whose column sums do not reproduce the bits of the target are rejected.
+# @param p_bit_length The bit length of p
+# @param q_bit_length The bit length of q
+# @param first_col The first column of the block
+# @param last_col The last column of the block
+# @param target_bits The list of the bits of the target in the columns 0,...,last_col
+# @param previous_solutions The list of the partial solutions of the previous blocks of form {p:binary_format, q:binary_format, CARRY:binary_format} with the same number of assigned bits
+# @param p_known Iterable of the pairs (bit index, value) of the known new bits of p in the block. The lanes contradicting them are rejected.
+# @param q_known Iterable of the pairs (bit index, value) of the known new bits of q in the block
+# @return Returns with the list of the partial solutions including the block in the order of method iterative_factorization.run_iteration
+def expand_block( p_bit_length, q_bit_length, first_col, last_col, target_bits, previous_solutions, p_known=(), q_known=() ):
+	if len( previous_solutions ) == 0:
+		return list()
+
+	p_bit_num = max( min(last_col, p_bit_length-1) - first_col + 1, 0 )
+	q_bit_num = max( min(last_col, q_bit_length-1) - first_col + 1, 0 )
+	candidate_num = 2**(p_bit_num + q_bit_num)
+
+	# the partial solutions are evaluated in batches of at most MAX_BATCH_LANES lanes
+	batch_size = max( MAX_BATCH_LANES // candidate_num, 1 )
+	exact_solutions = list()
+	for start in range(0, len(previous_solutions), batch_size):
+		exact_solutions.extend( _expand_batch( p_bit_length, q_bit_length, first_col, last_col, target_bits, previous_solutions[start:start+batch_size], p_bit_num, q_bit_num, p_known, q_known ) )
+
+	return exact_solutions
+
+
+##
+# @brief Evaluates the candidate bit assignments of a block for a batch of partial solutions (see function expand_block)
+# @param p_bit_length The bit length of p
+# @param q_bit_length The bit length of q
+# @param first_col The first column of the block
+# @param last_col The last column of the block
+# @param target_bits The list of the bits of the target in the columns 0,...,last_col
+# @param previous_solutions The list of the partial solutions in the batch
+# @param p_bit_num The number of the new bits of p in the block
+# @param q_bit_num The number of the new bits of q in the block
+# @param p_known Iterable of the pairs (bit index, value) of the known new bits of p in the block
+# @param q_known Iterable of the pairs (bit index, value) of the known new bits of q in the block
+# @return Returns with the list of the partial solutions including the block
+def _expand_batch( p_bit_length, q_bit_length, first_col, last_col, target_bits, previous_solutions, p_bit_num, q_bit_num, p_known, q_known ):
+	candidate_num = 2**(p_bit_num + q_bit_num)
+	lane_num = len(previous_solutions) * candidate_num
+	word_num = (lane_num + LANES - 1) // LANES
+
+	# lane = solution_idx*candidate_num + p_idx*2**q_bit_num + q_idx
+	candidates = np.arange( candidate_num, dtype=np.int64 )
+	zeros = np.zeros( word_num, dtype=np.uint64 )
+
+	# the bit planes of p and q: the assigned bits are repeated over the candidates of a partial solution, the new bits are enumerated
+	planes = list()
+	for (solution_key, bit_length, bit_num, shift) in (('p', p_bit_length, p_bit_num, q_bit_num), ('q', q_bit_length, q_bit_num, 0)):
+		assigned_num = len( previous_solutions[0][solution_key] )
+		assigned = np.frombuffer( ''.join( solution[solution_key] for solution in previous_solutions ).encode(), dtype=np.uint8 ).reshape( len(previous_solutions), assigned_num ) - ord('0')
+
+		num_planes = list()
+		for bit in range(0, min(last_col+1, bit_length)):
+			if bit < assigned_num:
+				num_planes.append( pack_lanes( np.repeat( assigned[:, assigned_num-bit-1], candidate_num ), word_num ) )
+			else:
+				num_planes.append( pack_lanes( np.tile( (candidates >> (shift + bit - first_col)) & 1, len(previous_solutions) ), word_num ) )
+		planes.append( num_planes )
+	(p_planes, q_planes) = planes
+
+	# the carries from the previous blocks are the initial planes of the column sums
+	carries_in = [int( solution[CARRY], 2 ) for solution in previous_solutions]
+	levels = [list()]
+	for bit in range(0, max(carries_in).bit_length()):
+		if len( levels ) <= bit:
+			levels.append( list() )
+		levels[bit].append( pack_lanes( np.repeat( [(carry >> bit) & 1 for carry in carries_in], candidate_num ), word_num ) )
+
+	# the lanes rejected by the bits of the target (the padding lanes of the last word are rejected from the start)
+	mismatch = ~pack_lanes( np.ones( lane_num, dtype=np.uint8 ), word_num )
+
+	# the lanes contradicting the known bits are rejected
+	for (num_planes, known) in ((p_planes, p_known), (q_planes, q_known)):
+		for (bit, value) in known:
+			mismatch |= ~num_planes[bit] if value else num_planes[bit]
+
+	for col in range(first_col, last_col+1):
+		for p_idx in range(max(0, col-q_bit_length+1), min(col, p_bit_length-1)+1):
+			levels[0].append( p_planes[p_idx] & q_planes[col-p_idx] )
+
+		column_bit = compress_level( levels, zeros )
+		if target_bits[col]:
+			mismatch |= ~column_bit
+		else:
+			mismatch |= column_bit
+		levels.pop(0)
+
+		if not np.any( ~mismatch ):
+			return list()
+
+	# the carry to the next block
+	carry_planes = list()
+	while len( levels ) > 0:
+		carry_planes.append( compress_level( levels, zeros ) )
+		levels.pop(0)
+		if all( len(planes) == 0 for planes in levels ):
+			break
+
+	accepted = np.flatnonzero( unpack_lanes( ~mismatch, lane_num ) )
+	carries = np.zeros( len(accepted), dtype=object if len(carry_planes) >= 63 else np.int64 )
+	for bit in range(0, len(carry_planes)):
+		carries = carries + (unpack_lanes( carry_planes[bit], lane_num )[accepted].astype( carries.dtype ) << bit)
+
+	if DEBUG:
+		print('Bit-sliced block ' + str((first_col, last_col)) + ': ' + str(len(accepted)) + ' of ' + str(lane_num) + ' lanes accepted')
+
+	p_format = '{0:0' + str(p_bit_num) + 'b}'
+	q_format = '{0:0' + str(q_bit_num) + 'b}'
+	exact_solutions = list()
+	for (lane, carry) in zip( accepted.tolist(), carries.tolist() ):
+		previous_solution = previous_solutions[lane // candidate_num]
+		candidate = lane % candidate_num
+		p_bin = p_format.format( candidate >> q_bit_num ) if p_bit_num > 0 else ''
+		q_bin = q_format.format( candidate & (2**q_bit_num-1) ) if q_bit_num > 0 else ''
+		exact_solutions.append( {'p': p_bin + previous_solution['p'], 'q': q_bin + previous_solution['q'], CARRY: '{0:b}'.format( carry )} )
+
+	return exact_solutions
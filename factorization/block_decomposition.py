@@ -0,0 +1,232 @@
+from compose_BQM.local_search import local_search
+
+import itertools
+import numpy as np
+import time
+
+# Set True to show debug information, or False otherwise
+DEBUG = False
+
+# Inner solver enumerating all the assignments of the block variables
+INNER_EXACT = 'exact'
+
+# Inner solver running a tabu search over the block variables
+INNER_TABU = 'tabu'
+
+
+##
+# @brief Class to minimize the BQM cost function by a decomposition aligned with the blocks of the multiplication table: the variables of one block (new bits of p and q, carries and substitutions) are optimized while all the other variables are held fixed, sweeping over the blocks until convergence.
+class block_decomposition_solver( local_search ):
+
+	##
+	# @brief Constructor of the class.
+	# @param cBQM An instance of class compose_BQM.compose_BQM.BQM_from_multiplication_table with determined blocks and composed cost function
+	# @param cost_function The cost function given by a (dict, constant) tuple (optional). For None method cBQM.get_cost_function is used.
+	# @param inner The inner solver of the blocks: INNER_EXACT or INNER_TABU
+	# @param max_exact_vars The maximal number of the free variables of a block solved by the exact inner solver. Larger blocks are solved by the tabu inner solver.
+	def __init__( self, cBQM, cost_function=None, inner=INNER_EXACT, max_exact_vars=16 ):
+		if inner not in (INNER_EXACT, INNER_TABU):
+			raise ValueError('Unknown inner solver: ' + str(inner))
+
+		if cost_function is None:
+			cost_function = cBQM.get_cost_function()
+		local_search.__init__( self, cost_function )
+
+		## The inner solver of the blocks
+		self.inner = inner
+		## The maximal number of the free variables of a block solved by the exact inner solver
+		self.max_exact_vars = max_exact_vars
+		## The list of the (free, dependent, pairs) index arrays of the variables of the blocks
+		self.block_variables = self.get_block_variables( cBQM )
+		# The statistics of the last run
+		self._stats = dict()
+
+
+	##
+	# @brief Determines the variables of the blocks. The free variables of a block are the bits of p and q first involved in the columns of the block and the carries of the block and of the next block. The substitutions of products involving the free variables are dependent variables of the block: they are set to the product of the substituted variables, so their penalties are kept satisfied.
+	# @param cBQM An instance of class compose_BQM.compose_BQM.BQM_from_multiplication_table with determined blocks
+	# @return Returns with a list of tuples (free, dependent, pairs) of int32 index arrays: the free variables, the dependent variables and the (number of dependent variables x 2) matrix of the substituted variables (blocks without free variables are left out)
+	def get_block_variables( self, cBQM ):
+		(block_list, carry_col_dict) = cBQM.get_blocks()
+		index = self.sparse.index
+
+		block_variables = list()
+		for block_id in range(0, len(block_list)):
+			first_col = 0 if block_id == 0 else block_list[block_id-1]+1
+			last_col = block_list[block_id]
+
+			# the new bits of the block
+			labels = set()
+			for num in cBQM.get_abstract_nums():
+				bit_labels = num.get_bit_labels()
+				for bit in range(first_col, min(last_col+1, num.bit_length())):
+					labels.add( bit_labels[bit] )
+
+			# the carries entering and leaving the block
+			next_last_col = block_list[block_id+1] if block_id+1 < len(block_list) else last_col
+			for col in range(first_col, next_last_col+1):
+				carry = carry_col_dict.get( col )
+				if isinstance( carry, str ):
+					labels.add( carry )
+
+			free = sorted( index[label] for label in labels if label in index )
+			if len( free ) == 0:
+				continue
+
+			# the substitutions of products involving the new bits
+			dependent = list()
+			pairs = list()
+			for (pair, subs_var) in cBQM.get_substitutions().items():
+				if subs_var in index and (pair[0] in labels or pair[1] in labels) and pair[0] in index and pair[1] in index:
+					dependent.append( index[subs_var] )
+					pairs.append( (index[pair[0]], index[pair[1]]) )
+
+			block_variables.append( (np.array( free, dtype=np.int32 ), np.array( dependent, dtype=np.int32 ), np.array( pairs, dtype=np.int32 ).reshape( (-1, 2) )) )
+
+		return block_variables
+
+
+	##
+	# @brief Calculates the energies of assignments of the variables of a block
+	# @param assignments A (number of assignments x number of block variables) matrix of the assignments
+	# @param external_fields The linear terms of the block variables including the fields of the fixed variables
+	# @param couplings The symmetric coupling matrix of the block variables
+	# @return Returns with the array of the energies
+	def get_block_energies( self, assignments, external_fields, couplings ):
+		quadratic = np.sum( assignments.dot( couplings ) * assignments, axis=1 )
+		if self._dtype == np.float64:
+			quadratic = quadratic / 2
+		else:
+			quadratic = quadratic // 2
+		return assignments.dot( external_fields ) + quadratic
+
+
+	##
+	# @brief Completes assignments of the free variables of a block with the values of the dependent variables
+	# @param assignments A (number of assignments x number of free variables) matrix of the assignments
+	# @param sample The sample vector providing the values of the fixed variables
+	# @param free The index array of the free variables
+	# @param pairs The index matrix of the variables substituted by the dependent variables
+	# @return Returns with the (number of assignments x number of block variables) matrix of the completed assignments
+	def complete_assignments( self, assignments, sample, free, pairs ):
+		if len( pairs ) == 0:
+			return assignments
+
+		# the values of the substituted variables are taken from the assignments or from the fixed sample
+		positions = np.searchsorted( free, pairs )
+		in_block = free[np.minimum( positions, len(free)-1 )] == pairs
+		values = np.where( in_block[None, :, :], assignments[:, np.minimum( positions, len(free)-1 )], sample[pairs][None, :, :].astype( self._dtype ) )
+		return np.hstack( [assignments, values[:, :, 0]*values[:, :, 1]] )
+
+
+	##
+	# @brief Minimizes the energy of the variables of one block while the other variables are fixed
+	# @param sample The sample vector (modified in place)
+	# @param fields The local fields of the sample (modified in place)
+	# @param block A tuple (free, dependent, pairs) of the variables of the block (see get_block_variables)
+	# @param rng The random number generator of the tabu inner solver
+	# @return Returns with the change of the energy (<= 0)
+	def optimize_block( self, sample, fields, block, rng ):
+		(free, dependent, pairs) = block
+		variables = np.concatenate( [free, dependent] )
+		couplings = self._couplings[np.ix_(variables, variables)]
+		current = sample[variables].astype( self._dtype )
+
+		# the fields of the fixed variables acting on the block
+		external_fields = fields[variables] - couplings.dot( current )
+		current_energy = self.get_block_energies( current[None, :], external_fields, couplings )[0]
+
+		if self.inner == INNER_EXACT and len( free ) <= self.max_exact_vars:
+			assignments = np.array( list( itertools.product( (0, 1), repeat=len(free) ) ), dtype=self._dtype )
+			assignments = self.complete_assignments( assignments, sample, free, pairs )
+			energies = self.get_block_energies( assignments, external_fields, couplings )
+			best_idx = np.argmin( energies )
+			(best, best_energy) = (assignments[best_idx], energies[best_idx])
+		else:
+			# tabu search over all the variables of the block
+			sub_QUBO = dict( ((i, i), external_fields[i]) for i in range(0, len(variables)) )
+			(rows, cols) = np.nonzero( np.triu( couplings, 1 ) )
+			sub_QUBO.update( zip( zip( rows.tolist(), cols.tolist() ), couplings[rows, cols] ) )
+			sub_search = local_search( (sub_QUBO, 0) )
+			sub_index = [sub_search.sparse.index.get( i ) for i in range(0, len(variables))]
+			starts = np.zeros( (8, sub_search.sparse.get_variable_num()), dtype=np.uint8 )
+			starts[1:] = rng.integers( 0, 2, size=(7, sub_search.sparse.get_variable_num()), dtype=np.uint8 )
+			for i in range(0, len(variables)):
+				if sub_index[i] is not None:
+					starts[0, sub_index[i]] = current[i]
+			(sub_samples, sub_energies) = sub_search.tabu_search( starts, num_steps=10*len(variables) )
+			best_idx = np.argmin( sub_energies )
+			best = np.zeros( len(variables), dtype=self._dtype )
+			for i in range(0, len(variables)):
+				if sub_index[i] is not None:
+					best[i] = sub_samples[best_idx, sub_index[i]]
+			best_energy = self.get_block_energies( best[None, :], external_fields, couplings )[0]
+
+		delta = best_energy - current_energy
+		if delta < 0:
+			sample[variables] = best.astype( np.uint8 )
+			fields[:] = fields + self._couplings[:, variables].dot( best - current )
+			return delta
+
+		return 0
+
+
+	##
+	# @brief Minimizes the cost function by sweeps over the blocks, starting from random samples (or given samples)
+	# @param num_restarts The number of the random starting samples (ignored if samples are given)
+	# @param max_sweeps The maximal number of the sweeps over the blocks of a start
+	# @param seed The seed of the random numbers (optional)
+	# @param samples A (number of samples x number of variables) matrix of the starting samples (optional)
+	# @param run_budget The budget of the run (an instance of class factorization.budget.budget). It is checked before each start.
+	# @return Returns with a tuple (sample, energy) of the best sample (dictionary of variable label: value) and its energy including the constant part
+	def solve( self, num_restarts=10, max_sweeps=50, seed=None, samples=None, run_budget=None ):
+		start_time = time.time()
+		rng = np.random.default_rng( seed )
+		if samples is None:
+			samples = rng.integers( 0, 2, size=(num_restarts, self.sparse.get_variable_num()), dtype=np.uint8 )
+		samples = np.array( samples, dtype=np.uint8 )
+
+		self._stats = {'restarts': 0, 'sweeps': 0, 'status': None}
+		best_sample = None
+		best_energy = None
+		for sample in samples:
+			if run_budget is not None and best_sample is not None:
+				self._stats['status'] = run_budget.check()
+				if self._stats['status'] is not None:
+					break
+
+			self._stats['restarts'] = self._stats['restarts'] + 1
+			fields = self.get_fields( sample[None, :] )[0]
+			energy = self.sparse.energies( sample[None, :] )[0]
+
+			for sweep in range(0, max_sweeps):
+				self._stats['sweeps'] = self._stats['sweeps'] + 1
+				sweep_delta = 0
+				for block in self.block_variables:
+					sweep_delta = sweep_delta + self.optimize_block( sample, fields, block, rng )
+
+				energy = energy + sweep_delta
+				if energy == 0 or sweep_delta == 0:
+					break
+
+			if best_energy is None or energy < best_energy:
+				best_sample = sample.copy()
+				best_energy = energy
+
+			if best_energy == 0:
+				break
+
+		self._stats['time'] = time.time() - start_time
+		if DEBUG:
+			print('Block decomposition: ' + str(self._stats) + ', best energy: ' + str(best_energy))
+
+		best_energy = self.sparse.energies( best_sample[None, :] )[0]
+		return (dict( zip( self.sparse.variables, best_sample.tolist() ) ), best_energy)
+
+
+	##
+	# @brief Gets the statistics of the last run
+	# @return Returns with a dictionary {'restarts', 'sweeps', 'status', 'time'}. The status describes the exceeded limit of the budget, or it is None.
+	def get_stats( self ):
+		return self._stats
+
@@ -0,0 +1,105 @@
+import os
+import time
+
+# Set True to show debug information, or False otherwise
+DEBUG = False
+
+# Status of a run completed within the budget
+STATUS_COMPLETE = 'complete'
+
+# Status of a run stopped by the wall-clock deadline
+STATUS_TIME_LIMIT = 'time_limit'
+
+# Status of a run stopped by the maximal number of the partial solutions
+STATUS_FRONTIER_LIMIT = 'frontier_limit'
+
+# Status of a run stopped by the maximal resident memory
+STATUS_MEMORY_LIMIT = 'memory_limit'
+
+
+##
+# @brief Exception raised when a budget is exceeded during the expansion of a block
+class budget_exceeded( Exception ):
+
+	##
+	# @brief Constructor of the class.
+	# @param status The status describing the exceeded limit (STATUS_TIME_LIMIT, STATUS_FRONTIER_LIMIT or STATUS_MEMORY_LIMIT)
+	def __init__( self, status ):
+		Exception.__init__( self, 'Budget exceeded: ' + status )
+		## The status describing the exceeded limit
+		self.status = status
+
+
+##
+# @brief Gets the resident memory of the current process
+# @return Returns with the resident set size in bytes (or the peak resident set size if the current one is not accessible)
+def get_rss():
+	try:
+		with open( '/proc/self/statm' ) as f:
+			return int( f.read().split()[1] ) * os.sysconf('SC_PAGE_SIZE')
+	except (OSError, ValueError, IndexError):
+		import resource
+		import sys
+		max_rss = resource.getrusage( resource.RUSAGE_SELF ).ru_maxrss
+		# ru_maxrss is given in kilobytes on Linux and in bytes on macOS
+		return max_rss if sys.platform == 'darwin' else max_rss*1024
+
+
+##
+# @brief Class describing the budget of a factorization run: wall-clock deadline, maximal number of partial solutions (frontier entries) and maximal resident memory.
+class budget():
+
+	##
+	# @brief Constructor of the class. The clock of the deadline starts at the construction.
+	# @param time_limit The wall-clock time limit in seconds (optional)
+	# @param max_frontier The maximal number of the partial solutions (optional)
+	# @param max_rss The maximal resident memory of the process in bytes (optional)
+	# @param check_interval The number of the expanded partial solutions between the checks within a block
+	def __init__( self, time_limit=None, max_frontier=None, max_rss=None, check_interval=64 ):
+		## The wall-clock deadline (given by time.time())
+		self.deadline = None if time_limit is None else time.time() + time_limit
+		## The maximal number of the partial solutions
+		self.max_frontier = max_frontier
+		## The maximal resident memory in bytes
+		self.max_rss = max_rss
+		## The number of the expanded partial solutions between the checks within a block
+		self.check_interval = check_interval
+
+
+	##
+	# @brief Checks the budget
+	# @param frontier_size The current number of the partial solutions
+	# @return Returns with None if the budget is not exceeded, or with the status describing the exceeded limit
+	def check( self, frontier_size=0 ):
+		if self.deadline is not None and time.time() > self.deadline:
+			return STATUS_TIME_LIMIT
+
+		if self.max_frontier is not None and frontier_size > self.max_frontier:
+			return STATUS_FRONTIER_LIMIT
+
+		if self.max_rss is not None and get_rss() > self.max_rss:
+			return STATUS_MEMORY_LIMIT
+
+		return None
+
+
+	##
+	# @brief Checks the budget and raises an exception if it is exceeded
+	# @param frontier_size The current number of the partial solutions
+	def enforce( self, frontier_size=0 ):
+		status = self.check( frontier_size )
+		if status is not None:
+			if DEBUG:
+				print('Budget exceeded: ' + status)
+			raise budget_exceeded( status )
+
+
+	##
+	# @brief Gets the remaining time until the deadline
+	# @return Returns with the remaining time in seconds, or None if there is no deadline
+	def get_remaining_time( self ):
+		if self.deadline is None:
+			return None
+
+		return max( self.deadline - time.time(), 0 )
+
@@ -0,0 +1,439 @@
+from abstract_binary.binary_number import bin_num
+from abstract_binary.abstract_binary_number import abstract_bin_num
+from factorization import kernel
+from factorization.factor import select_factors
+from factorization.iterative import iterative_factorization, ENGINE_BITSLICE, ENGINE_SCALAR
+
+from collections import deque
+from multiprocessing.connection import Listener, Client, wait
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import time
+
+# Set True to show debug information, or False otherwise
+DEBUG = False
+
+# The minimal number of the partial solutions expanded by a worker between two messages (the bit-sliced engine gets at least one batch of lanes)
+SUBCHUNK_SIZE = 64
+
+# The time in seconds to wait for the first worker before an expansion fails
+CONNECT_TIMEOUT = 30
+
+# The time in seconds to wait for the busy workers to abandon their chunks after an expansion was aborted
+DRAIN_TIMEOUT = 30
+
+# The messages of the protocol: the coordinator sends (EXPAND, start, end, spec, solutions, engine, bounds), (STEAL,), (ABORT,) and (STOP,), the workers send (PARTIAL, offset, count, solutions), (STOLEN, split or None) and (DONE,)
+EXPAND = 'expand'
+STEAL = 'steal'
+ABORT = 'abort'
+STOP = 'stop'
+PARTIAL = 'partial'
+STOLEN = 'stolen'
+DONE = 'done'
+
+
+##
+# @brief Parses an address given in form host:port
+# @param address The address string
+# @return Returns with a tuple (host, port)
+def parse_address( address ):
+	(host, port) = address.rsplit( ':', 1 )
+	return (host, int(port))
+
+
+##
+# @brief Runs a worker expanding the frontier chunks of a coordinator (see class frontier_coordinator) until the coordinator stops it or closes the connection. The chunk is expanded in sub-chunks streamed back to the coordinator, and between the sub-chunks the second half of the unprocessed part is given back on a steal request, or the chunk is abandoned on an abort request.
+# @param address The address (host, port) of the coordinator
+# @param authkey The authentication key of the coordinator (bytes)
+def run_worker( address, authkey ):
+	conn = Client( address, authkey=authkey )
+	try:
+		while True:
+			message = conn.recv()
+			if message[0] == STOP:
+				break
+			if message[0] == STEAL:
+				# the chunk was already finished
+				conn.send( (STOLEN, None) )
+				continue
+			if message[0] == ABORT:
+				# the chunk was finished before the expansion was aborted
+				continue
+
+			(kind, start, end, spec, solutions, engine, bounds) = message
+			(p_bit_num, q_bit_num) = kernel.get_new_bit_num( spec )
+			subchunk_size = SUBCHUNK_SIZE
+			if engine == ENGINE_BITSLICE:
+				# numpy is imported only by the bit-sliced engine
+				from factorization import bitslice
+				subchunk_size = max( SUBCHUNK_SIZE, bitslice.MAX_BATCH_LANES // 2**(p_bit_num+q_bit_num) )
+
+			pos = start
+			while pos < end:
+				while conn.poll():
+					request = conn.recv()
+					if request[0] == STOP:
+						return
+					if request[0] == ABORT:
+						end = pos
+						break
+					if end - pos > subchunk_size:
+						split = end - (end-pos) // 2
+						conn.send( (STOLEN, split) )
+						end = split
+					else:
+						conn.send( (STOLEN, None) )
+
+				if pos >= end:
+					break
+				stop = min( pos+subchunk_size, end )
+				new_solutions = kernel.expand_block( spec, solutions[pos-start:stop-start], engine, bounds )
+				conn.send( (PARTIAL, pos, stop-pos, new_solutions) )
+				pos = stop
+
+			conn.send( (DONE,) )
+	except (EOFError, OSError):
+		# the coordinator closed the connection
+		pass
+	finally:
+		conn.close()
+
+
+##
+# @brief Class to expand the frontiers of the iterative factorization on worker processes connected over TCP. The frontier of a block is cut into chunks dispatched to the idle workers; the workers stream back the expanded sub-chunks, and when the queue runs dry the idle workers steal the second half of the unprocessed part of the busiest worker. The results are merged in the order of the frontier, so the next block gets the same frontier as in a single process. The workers get the immutable description of each block (see function factorization.kernel.get_block_spec) derived from the block layout of the coordinating solver, so they all agree on the column structure.
+class frontier_coordinator():
+
+	##
+	# @brief Constructor of the class. The coordinator starts listening for the workers immediately.
+	# @param address The address (host, port) to listen on. (For port 0 a free port is chosen, see attribute address.)
+	# @param authkey The authentication key of the workers (bytes). For None a random key is generated.
+	# @param chunk_size The number of the partial solutions in a chunk. For None the frontier is cut into four chunks per worker.
+	def __init__( self, address=('localhost', 0), authkey=None, chunk_size=None ):
+		## The authentication key of the workers
+		self.authkey = authkey if authkey is not None else os.urandom( 16 )
+		# The listener of the connections
+		self._listener = Listener( address, authkey=self.authkey )
+		## The address the coordinator is listening on
+		self.address = self._listener.address
+		## The number of the partial solutions in a chunk
+		self.chunk_size = chunk_size
+		# The connections of the workers
+		self._connections = list()
+		# The lock of the list of the connections
+		self._lock = threading.Lock()
+		# The worker processes started by method start_local_workers
+		self._processes = list()
+		# The statistics of the expansions
+		self._stats = {'expansions': 0, 'chunks': 0, 'partials': 0, 'steals': 0, 'failed_steals': 0, 'aborts': 0, 'lost_workers': 0}
+
+		# the connections are accepted in the background
+		self._accept_thread = threading.Thread( target=self._accept_connections, daemon=True )
+		self._accept_thread.start()
+
+
+	##
+	# @brief Accepts the connections of the workers until the listener is closed
+	def _accept_connections( self ):
+		while True:
+			try:
+				conn = self._listener.accept()
+			except (OSError, EOFError):
+				# the listener was closed
+				break
+			except Exception as err:
+				# failed authentication
+				if DEBUG:
+					print('Rejected worker: ' + str(err))
+				continue
+
+			with self._lock:
+				self._connections.append( conn )
+
+			if DEBUG:
+				print('Worker connected to ' + str(self.address))
+
+
+	##
+	# @brief Starts worker processes on the local machine
+	# @param num The number of the workers
+	def start_local_workers( self, num ):
+		for idx in range(0, num):
+			process = multiprocessing.Process( target=run_worker, args=(self.address, self.authkey), daemon=True )
+			process.start()
+			self._processes.append( process )
+
+
+	##
+	# @brief Waits until a given number of workers are connected
+	# @param num The number of the workers
+	# @param timeout The time limit of the waiting in seconds
+	# @return Returns with True if the workers are connected, False otherwise
+	def wait_for_workers( self, num, timeout=CONNECT_TIMEOUT ):
+		start_time = time.time()
+		while self.get_worker_num() < num:
+			if time.time() - start_time > timeout:
+				return False
+			time.sleep( 0.01 )
+
+		return True
+
+
+	##
+	# @brief Gets the number of the connected workers
+	# @return Returns with the number of the workers
+	def get_worker_num( self ):
+		with self._lock:
+			return len( self._connections )
+
+
+	##
+	# @brief Removes the connection of a lost worker
+	# @param conn The connection
+	def _remove_connection( self, conn ):
+		with self._lock:
+			if conn in self._connections:
+				self._connections.remove( conn )
+		conn.close()
+		self._stats['lost_workers'] = self._stats['lost_workers'] + 1
+
+
+	##
+	# @brief Expands a frontier over a block on the workers
+	# @param spec The description of the block (see function factorization.kernel.get_block_spec)
+	# @param solutions The list of the partial solutions of the previous blocks
+	# @param engine The engine evaluating the candidates (see function factorization.kernel.expand_block)
+	# @param bounds The bounds to prune the new partial solutions, or None to keep all of them
+	# @param run_budget The budget of the expansion (an instance of class factorization.budget.budget, optional). An exception budget_exceeded is raised when the budget is exceeded.
+	# @return Returns with the list of the partial solutions including the block
+	def expand( self, spec, solutions, engine=ENGINE_SCALAR, bounds=None, run_budget=None ):
+		if not self.wait_for_workers( 1 ):
+			raise Exception('No workers are connected to the coordinator at ' + str(self.address))
+
+		self._stats['expansions'] = self._stats['expansions'] + 1
+
+		# the assignments of the busy workers {connection: [start, end, processed, steal requested]}
+		busy = dict()
+		try:
+			return self._expand( spec, solutions, engine, bounds, run_budget, busy )
+		finally:
+			# the workers still busy after an exception abandon their chunks before the next expansion
+			if len( busy ) > 0:
+				self._abort( busy )
+
+
+	##
+	# @brief Expands a frontier over a block on the workers (see method expand)
+	# @param spec The description of the block
+	# @param solutions The list of the partial solutions of the previous blocks
+	# @param engine The engine evaluating the candidates
+	# @param bounds The bounds to prune the new partial solutions, or None to keep all of them
+	# @param run_budget The budget of the expansion (optional)
+	# @param busy The dictionary of the assignments of the busy workers to be filled
+	# @return Returns with the list of the partial solutions including the block
+	def _expand( self, spec, solutions, engine, bounds, run_budget, busy ):
+		chunk_size = self.chunk_size if self.chunk_size is not None else max( len(solutions) // (4*self.get_worker_num()), 1 )
+		pending = deque( (start, min(start+chunk_size, len(solutions))) for start in range(0, len(solutions), chunk_size) )
+
+		# the expanded sub-chunks {offset: partial solutions}
+		results = dict()
+		processed = 0
+		new_solution_num = 0
+		# the loop also waits for the DONE messages, so no message of the block is left for the next expansion
+		while processed < len(solutions) or len( busy ) > 0:
+			with self._lock:
+				connections = list( self._connections )
+			if len( connections ) == 0 and not self.wait_for_workers( 1 ):
+				raise Exception('All the workers of the coordinator at ' + str(self.address) + ' are lost')
+
+			# dispatch the chunks to the idle workers
+			idle = [conn for conn in connections if conn not in busy]
+			while len( idle ) > 0 and len( pending ) > 0:
+				conn = idle.pop()
+				(start, end) = pending.popleft()
+				try:
+					conn.send( (EXPAND, start, end, spec, solutions[start:end], engine, bounds) )
+				except OSError:
+					pending.appendleft( (start, end) )
+					self._remove_connection( conn )
+					continue
+				busy[conn] = [start, end, start, False]
+				self._stats['chunks'] = self._stats['chunks'] + 1
+
+			# an idle worker steals the second half of the largest unprocessed part (parts shorter than two sub-chunks are not split by the workers)
+			if len( idle ) > 0 and len( pending ) == 0:
+				candidates = [(assignment[1]-assignment[2], conn) for conn, assignment in busy.items() if not assignment[3] and assignment[1]-assignment[2] > 2*SUBCHUNK_SIZE]
+				if len( candidates ) > 0:
+					(remaining, conn) = max( candidates, key=lambda candidate: candidate[0] )
+					try:
+						conn.send( (STEAL,) )
+						busy[conn][3] = True
+					except OSError:
+						pass
+
+			for conn in wait( connections, timeout=0.1 ):
+				try:
+					message = conn.recv()
+				except (EOFError, OSError):
+					# the unprocessed part of a lost worker is dispatched again
+					assignment = busy.pop( conn, None )
+					if assignment is not None and assignment[2] < assignment[1]:
+						pending.appendleft( (assignment[2], assignment[1]) )
+					self._remove_connection( conn )
+					continue
+
+				if message[0] == PARTIAL:
+					(kind, offset, count, new_solutions) = message
+					assignment = busy.get( conn )
+					if assignment is None:
+						continue
+					results[offset] = new_solutions
+					processed = processed + count
+					new_solution_num = new_solution_num + len(new_solutions)
+					assignment[2] = offset + count
+					self._stats['partials'] = self._stats['partials'] + 1
+					if run_budget is not None:
+						run_budget.enforce( new_solution_num )
+				elif message[0] == STOLEN:
+					assignment = busy.get( conn )
+					if assignment is None:
+						continue
+					assignment[3] = False
+					if message[1] is None:
+						self._stats['failed_steals'] = self._stats['failed_steals'] + 1
+					else:
+						pending.append( (message[1], assignment[1]) )
+						assignment[1] = message[1]
+						self._stats['steals'] = self._stats['steals'] + 1
+				elif message[0] == DONE:
+					busy.pop( conn, None )
+
+		# merge the expanded sub-chunks in the order of the frontier
+		exact_solutions = list()
+		for offset in sorted( results.keys() ):
+			exact_solutions.extend( results[offset] )
+
+		if DEBUG:
+			print('Distributed expansion of block ' + str(spec[2:4]) + ': ' + str(len(solutions)) + ' -> ' + str(len(exact_solutions)))
+
+		return exact_solutions
+
+
+	##
+	# @brief Aborts the chunks of the busy workers and drains their messages until their DONE messages, so no message of the aborted expansion is left for the next one. The workers not responding within DRAIN_TIMEOUT seconds are disconnected.
+	# @param busy The dictionary of the assignments of the busy workers {connection: assignment}. The dictionary is emptied.
+	def _abort( self, busy ):
+		self._stats['aborts'] = self._stats['aborts'] + 1
+		for conn in list( busy.keys() ):
+			try:
+				conn.send( (ABORT,) )
+			except OSError:
+				busy.pop( conn )
+				self._remove_connection( conn )
+
+		start_time = time.time()
+		while len( busy ) > 0:
+			remaining_time = DRAIN_TIMEOUT - (time.time() - start_time)
+			if remaining_time <= 0:
+				for conn in list( busy.keys() ):
+					busy.pop( conn )
+					self._remove_connection( conn )
+				break
+
+			for conn in wait( list( busy.keys() ), timeout=remaining_time ):
+				try:
+					message = conn.recv()
+				except (EOFError, OSError):
+					busy.pop( conn )
+					self._remove_connection( conn )
+					continue
+
+				# the sub-chunks and the steal replies of the aborted chunks are dropped
+				if message[0] == DONE:
+					busy.pop( conn )
+
+		if DEBUG:
+			print('Aborted expansion on ' + str(self.address))
+
+
+	##
+	# @brief Gets the statistics of the expansions
+	# @return Returns with a dictionary {'expansions', 'chunks', 'partials', 'steals', 'failed_steals', 'aborts', 'lost_workers', 'workers'}
+	def get_stats( self ):
+		stats = dict( self._stats )
+		stats['workers'] = self.get_worker_num()
+		return stats
+
+
+	##
+	# @brief Stops the workers and closes the listener
+	def close( self ):
+		with self._lock:
+			connections = list( self._connections )
+			self._connections = list()
+
+		for conn in connections:
+			try:
+				conn.send( (STOP,) )
+			except OSError:
+				pass
+			conn.close()
+
+		self._listener.close()
+		for process in self._processes:
+			process.join( timeout=5 )
+			if process.is_alive():
+				process.terminate()
+		self._processes = list()
+
+
+##
+# @brief Command line entry point: python -m factorization.distributed {coordinate,work} ...
+# @param argv The list of the command line arguments (for None sys.argv is used)
+def main( argv=None ):
+	parser = argparse.ArgumentParser( prog='python -m factorization.distributed', description='Distributed iterative factorization over TCP.' )
+	subparsers = parser.add_subparsers( dest='command', required=True )
+
+	coordinator_parser = subparsers.add_parser( 'coordinate', help='factorize numbers by expanding the frontiers on the connected workers' )
+	coordinator_parser.add_argument( 'targets', nargs='+', type=int, help='the numbers to be factorized' )
+	coordinator_parser.add_argument( '--listen', default='localhost:0', help='address of the coordinator in form host:port' )
+	coordinator_parser.add_argument( '--authkey', help='hexadecimal authentication key of the workers (default: random key)' )
+	coordinator_parser.add_argument( '--local-workers', type=int, default=0, help='number of the workers started on this machine' )
+	coordinator_parser.add_argument( '--p-bits', type=int, help='the bit length of the first factor' )
+	coordinator_parser.add_argument( '--q-bits', type=int, help='the bit length of the second factor' )
+	coordinator_parser.add_argument( '-b', '--block-size', type=int, default=5 )
+	coordinator_parser.add_argument( '--engine', default=ENGINE_BITSLICE, choices=[ENGINE_BITSLICE, ENGINE_SCALAR] )
+
+	worker_parser = subparsers.add_parser( 'work', help='expand the frontiers of a coordinator' )
+	worker_parser.add_argument( 'address', help='address of the coordinator in form host:port' )
+	worker_parser.add_argument( '--authkey', required=True, help='hexadecimal authentication key of the coordinator' )
+
+	args = parser.parse_args( argv )
+
+	if args.command == 'work':
+		run_worker( parse_address( args.address ), bytes.fromhex( args.authkey ) )
+		return 0
+
+	coordinator = frontier_coordinator( parse_address( args.listen ), bytes.fromhex( args.authkey ) if args.authkey is not None else None )
+	print( 'Listening on ' + str(coordinator.address[0]) + ':' + str(coordinator.address[1]) + ' with key ' + coordinator.authkey.hex(), file=sys.stderr )
+	coordinator.start_local_workers( args.local_workers )
+	try:
+		for target in args.targets:
+			p_bits = args.p_bits if args.p_bits is not None else (target.bit_length()+1) // 2
+			q_bits = args.q_bits if args.q_bits is not None else (target.bit_length()+1) // 2
+
+			start_time = time.time()
+			cIter = iterative_factorization( abstract_bin_num(p_bits), abstract_bin_num(q_bits), bin_num(target), args.block_size, engine=args.engine, prune=True )
+			cIter.run_iterations( coordinator=coordinator )
+			print( json.dumps( {'n': target, 'factors': select_factors( target, cIter.get_factors() ), 'status': cIter.get_status(), 'time': time.time()-start_time, 'stats': coordinator.get_stats()} ) )
+	finally:
+		coordinator.close()
+
+	return 0
+
+
+if __name__ == '__main__':
+	sys.exit( main() )
@@ -0,0 +1,372 @@
+from abstract_binary.binary_number import bin_num
+from abstract_binary.abstract_binary_number import abstract_bin_num
+from compose_BQM import template_cache
+from factorization.iterative import iterative_factorization, ENGINE_SCALAR, ENGINE_BITSLICE, POOL_PROCESS, POOL_THREAD
+from factorization import frontier_cache
+from factorization.hybrid import hybrid_factorization
+from factorization.budget import budget, STATUS_COMPLETE
+from factorization import samplers
+from factorization.prescreen import prescreener, default_prescreener
+
+import argparse
+import json
+import sys
+import time
+
+# Set True to show debug information, or False otherwise
+DEBUG = False
+
+# The iterative (classical) solution method
+METHOD_ITERATIVE = 'iterative'
+
+# The solution method sampling the BQM cost function
+METHOD_BQM = 'bqm'
+
+# The hybrid solution method: iterative solution of the low-order blocks and sampling of the reduced BQM of the high-order blocks
+METHOD_HYBRID = 'hybrid'
+
+# The solution method minimizing the BQM cost function by sweeps over the blocks of the multiplication table
+METHOD_DECOMPOSITION = 'decomposition'
+
+# Status of a factorization when nontrivial factors were found
+STATUS_FACTORED = 'factored'
+
+# Status of a factorization when no nontrivial factors were found
+STATUS_NOT_FOUND = 'not_found'
+
+# Status of a factorization that failed with an error
+STATUS_ERROR = 'error'
+
+
+##
+# @brief Selects the nontrivial factors from a list of candidate factor pairs
+# @param n The number to be factorized
+# @param factor_pairs Iterable of (p, q) integer tuples
+# @return Returns with a sorted [q, p] list of the first pair satisfying p*q == n and p, q > 1, or None if there is no such pair
+def select_factors( n, factor_pairs ):
+	for (p, q) in factor_pairs:
+		if p > 1 and q > 1 and p*q == n:
+			return sorted( [p, q] )
+
+	return None
+
+
+##
+# @brief Creates the abstract binary numbers of the factors
+# @param p_bits The bit length of the first factor
+# @param q_bits The bit length of the second factor
+# @param force_msb Set True to fix the most significant bits of the factors to 1, so the factors have exactly the given bit lengths
+# @return Returns with a tuple of two instances of class abstract_bin_num
+def get_abstract_factors( p_bits, q_bits, force_msb=False ):
+	num1 = abstract_bin_num( p_bits )
+	num2 = abstract_bin_num( q_bits )
+	if force_msb:
+		num1.set_bit( p_bits-1, 1 )
+		num2.set_bit( q_bits-1, 1 )
+
+	return (num1, num2)
+
+
+##
+# @brief Factorize a number by the iterative method (see class factorization.iterative.iterative_factorization)
+# @param n The number to be factorized
+# @param p_bits The bit length of the first factor
+# @param q_bits The bit length of the second factor
+# @param result The dictionary of the result to be completed
+# @param block_size The (maximal) size of the blocks
+# @param adaptive Set True to use adaptive blocks
+# @param workers The number of the worker processes
+# @param run_budget The budget of the run (an instance of class factorization.budget.budget)
+# @param prune Set True to prune the partial solutions by the magnitude bounds of p*q
+# @param engine The engine evaluating the candidates of the blocks (see class factorization.iterative.iterative_factorization)
+# @param pool The pool of the workers: POOL_PROCESS or POOL_THREAD
+# @param force_msb Set True to fix the most significant bits of the factors
+# @param cache The cache of the frontiers shared among the targets (an instance of class factorization.frontier_cache.frontier_cache), or None
+def _factor_iterative( n, p_bits, q_bits, result, block_size, adaptive, workers, run_budget, prune, engine, pool, force_msb, cache ):
+	start_time = time.time()
+	(num1, num2) = get_abstract_factors( p_bits, q_bits, force_msb )
+	cIter = iterative_factorization( num1, num2, bin_num(n), block_size, adaptive, prune, engine )
+	result['times']['compose'] = time.time() - start_time
+
+	start_time = time.time()
+	cIter.run_iterations( workers=workers, run_budget=run_budget, cache=cache, pool=pool )
+	result['times']['solve'] = time.time() - start_time
+
+	# the partial solutions are kept when the budget is exceeded
+	result['frontier'] = len( cIter.get_exact_solutions() )
+	if cIter.get_status() == STATUS_COMPLETE:
+		result['factors'] = select_factors( n, cIter.get_factors() )
+	else:
+		result['status'] = cIter.get_status()
+
+
+##
+# @brief Factorize a number by sampling the BQM cost function (see class compose_BQM.compose_BQM.BQM_from_multiplication_table)
+# @param n The number to be factorized
+# @param p_bits The bit length of the first factor
+# @param q_bits The bit length of the second factor
+# @param result The dictionary of the result to be completed
+# @param block_size The maximal size of the blocks
+# @param run_budget The budget of the run (an instance of class factorization.budget.budget). It is checked before the sampling.
+# @param workers The number of the worker processes. For more than one worker the sampler is invoked num_starts times with distinct seeds on a process pool (see class factorization.multistart.multistart_sampler).
+# @param num_starts The number of the sampler invocations on the process pool
+# @param sampler The name of the sampler (see factorization.samplers.get_sampler_names), or a sampler instance
+# @param sampler_kwargs Keyword arguments passed to the sample_qubo method of the sampler
+# @param force_msb Set True to fix the most significant bits of the factors
+# @param compact_carries Set True to encode the carries by the exact ranges of their values
+def _factor_BQM( n, p_bits, q_bits, result, block_size, run_budget, workers, num_starts, sampler, sampler_kwargs, force_msb, compact_carries ):
+	start_time = time.time()
+
+	# the first bits of the factors of an odd number are 1
+	(num1, num2) = get_abstract_factors( p_bits, q_bits, force_msb )
+	num1.set_bit( 0, 1 )
+	num2.set_bit( 0, 1 )
+
+	template = template_cache.get_template( num1, num2, block_size, compact_carries )
+	(BQM_model, constant) = template.get_target_cost_function( n )
+	result['times']['compose'] = time.time() - start_time
+
+	status = run_budget.check()
+	if status is not None:
+		result['status'] = status
+		return
+
+	start_time = time.time()
+	if workers > 1:
+		# numpy is imported only by the multi-start sampling
+		from factorization.multistart import multistart_sampler
+		cMultistart = multistart_sampler( template, n, (BQM_model, constant), sampler, workers, **sampler_kwargs )
+		factors = cMultistart.run( num_starts=num_starts if num_starts is not None else 4*workers, run_budget=run_budget )
+		result['factors'] = None if factors is None else sorted( factors )
+		result['multistart'] = cMultistart.get_stats()
+		if cMultistart.get_stats()['status'] not in (None, STATUS_COMPLETE):
+			result['status'] = cMultistart.get_stats()['status']
+	else:
+		response = samplers.get_sampler( sampler ).sample_qubo( BQM_model, **sampler_kwargs )
+		result['factors'] = select_factors( n, (template.get_factors_from_sample( sample ) for sample in response.samples()) )
+	result['times']['solve'] = time.time() - start_time
+
+
+##
+# @brief Factorize a number by minimizing the BQM cost function block by block (see class factorization.block_decomposition.block_decomposition_solver)
+# @param n The number to be factorized
+# @param p_bits The bit length of the first factor
+# @param q_bits The bit length of the second factor
+# @param result The dictionary of the result to be completed
+# @param block_size The maximal size of the blocks
+# @param run_budget The budget of the run (an instance of class factorization.budget.budget). It is checked before each start.
+# @param num_starts The number of the random starting samples (for None 100)
+# @param force_msb Set True to fix the most significant bits of the factors
+# @param compact_carries Set True to encode the carries by the exact ranges of their values
+def _factor_decomposition( n, p_bits, q_bits, result, block_size, run_budget, num_starts, force_msb, compact_carries ):
+	start_time = time.time()
+
+	# the first bits of the factors of an odd number are 1
+	(num1, num2) = get_abstract_factors( p_bits, q_bits, force_msb )
+	num1.set_bit( 0, 1 )
+	num2.set_bit( 0, 1 )
+
+	template = template_cache.get_template( num1, num2, block_size, compact_carries )
+	# numpy is imported only by the decomposition solver
+	from factorization.block_decomposition import block_decomposition_solver
+	cSolver = block_decomposition_solver( template, template.get_target_cost_function( n ) )
+	result['times']['compose'] = time.time() - start_time
+
+	start_time = time.time()
+	(sample, energy) = cSolver.solve( num_restarts=num_starts if num_starts is not None else 100, run_budget=run_budget )
+	result['times']['solve'] = time.time() - start_time
+	result['decomposition'] = cSolver.get_stats()
+
+	if energy == 0:
+		result['factors'] = select_factors( n, [template.get_factors_from_sample( sample )] )
+	elif cSolver.get_stats()['status'] is not None:
+		result['status'] = cSolver.get_stats()['status']
+
+
+##
+# @brief Factorize a number by the hybrid method (see class factorization.hybrid.hybrid_factorization)
+# @param n The number to be factorized
+# @param p_bits The bit length of the first factor
+# @param q_bits The bit length of the second factor
+# @param result The dictionary of the result to be completed
+# @param block_size The maximal size of the blocks
+# @param split_block The id of the last block solved by the iterative method (optional)
+# @param run_budget The budget of the run (an instance of class factorization.budget.budget)
+# @param sampler The name of the sampler (see factorization.samplers.get_sampler_names), or a sampler instance
+# @param sampler_kwargs Keyword arguments passed to the sample_qubo method of the sampler
+# @param force_msb Set True to fix the most significant bits of the factors
+# @param compact_carries Set True to encode the carries of the sampled blocks by the exact ranges of their values
+def _factor_hybrid( n, p_bits, q_bits, result, block_size, split_block, run_budget, sampler, sampler_kwargs, force_msb, compact_carries ):
+	start_time = time.time()
+	(num1, num2) = get_abstract_factors( p_bits, q_bits, force_msb )
+	cHybrid = hybrid_factorization( num1, num2, bin_num(n), block_size, compact_carries )
+	factors = cHybrid.run_hybrid( sampler, split_block=split_block, run_budget=run_budget, **sampler_kwargs )
+	result['times']['solve'] = time.time() - start_time
+	result['hybrid'] = cHybrid.get_hybrid_stats()
+
+	if factors is not None:
+		result['factors'] = sorted( factors )
+	elif cHybrid.get_status() != STATUS_COMPLETE:
+		result['status'] = cHybrid.get_status()
+
+
+##
+# @brief Factorize a number into two factors of given bit lengths
+# @param n The (odd) number to be factorized
+# @param method The solution method: METHOD_ITERATIVE, METHOD_BQM, METHOD_HYBRID or METHOD_DECOMPOSITION
+# @param p_bits The bit length of the first factor. (For None half of the bit length of n is used.)
+# @param q_bits The bit length of the second factor. (For None half of the bit length of n is used.)
+# @param block_size The (maximal) size of the blocks in the multiplication table
+# @param adaptive Set True to use adaptive blocks in the iterative method
+# @param prune Set True to prune the partial solutions of the iterative method by the magnitude bounds of p*q
+# @param engine The engine of the iterative method: ENGINE_BITSLICE or ENGINE_SCALAR (without numpy the scalar engine is used)
+# @param pool The pool of the workers of the iterative method: POOL_PROCESS or POOL_THREAD
+# @param workers The number of the worker processes of the iterative and BQM methods
+# @param num_starts The number of the sampler invocations of the BQM method for more than one worker (for None 4*workers), or the number of the random starts of the decomposition method (for None 100)
+# @param time_limit The wall-clock time limit in seconds (optional)
+# @param max_frontier The maximal number of the partial solutions of the iterative method (optional)
+# @param max_rss The maximal resident memory of the process in bytes (optional)
+# @param split_block The id of the last block solved by the iterative part of the hybrid method (optional)
+# @param force_msb Set True to fix the most significant bits of the factors, so the factors have exactly the given bit lengths (see module factorization.sweep)
+# @param cache Set True to share the frontiers of the low-order blocks of the iterative method among the targets by the default cache, or give an instance of class factorization.frontier_cache.frontier_cache. (For None the frontiers are not cached. The pruned frontiers are shared only by the runs of the same target.)
+# @param compact_carries Set True to encode the carries of the BQM cost functions by the exact ranges of their values (see method multiplication_table.determine_compact_carries)
+# @param prescreen Set True to pre-screen the target by the default pre-screener, or give an instance of class factorization.prescreen.prescreener. (For False the solution method is invoked directly.) A target proven to be a prime is not found without invoking the solution method.
+# @param sampler The name of the sampler of the BQM and hybrid methods (see factorization.samplers.get_sampler_names), or a sampler instance
+# @param sampler_kwargs Keyword arguments passed to the sample_qubo method of the sampler
+# @return Returns with a dictionary {'n', 'method', 'p_bits', 'q_bits', 'status', 'factors', 'times'}. The factors are given by a sorted list [q, p], or None if no factors were found. When the budget is exceeded, the status describes the exceeded limit (see module factorization.budget). When the pre-screening found the factors or proved the target to be a prime, the key 'prescreen' gives the stage (see module factorization.prescreen) and the solution method is not invoked. When the bit lengths of the factors were guessed and no factors were found, the key 'hint' points to the sweep over the splits (see module factorization.sweep).
+def factor( n, method=METHOD_ITERATIVE, p_bits=None, q_bits=None, block_size=5, adaptive=False, prune=True, engine=ENGINE_BITSLICE, pool=POOL_PROCESS, workers=1, time_limit=None, max_frontier=None, max_rss=None, split_block=None, num_starts=None, force_msb=False, cache=None, compact_carries=False, prescreen=False, sampler='qbsolv', **sampler_kwargs ):
+	start_time = time.time()
+	run_budget = budget( time_limit=time_limit, max_frontier=max_frontier, max_rss=max_rss )
+
+	if n % 2 == 0:
+		raise Exception('The number to be factorized should be odd')
+
+	# the factors of a balanced semiprime have half as many bits as the target
+	balanced_guess = p_bits is None or q_bits is None
+	if p_bits is None:
+		p_bits = (n.bit_length()+1) // 2
+	if q_bits is None:
+		q_bits = (n.bit_length()+1) // 2
+
+	result = {'n': n, 'method': method, 'p_bits': p_bits, 'q_bits': q_bits, 'status': None, 'factors': None, 'times': dict()}
+
+	# targets with small or close factors are factorized classically before composing the multiplication table
+	screened = None
+	if prescreen:
+		prescreen_start = time.time()
+		screened = (default_prescreener if prescreen is True else prescreen).screen( n )
+		result['times']['prescreen'] = time.time() - prescreen_start
+
+	if screened is not None:
+		(result['factors'], result['prescreen']) = screened
+	elif method == METHOD_ITERATIVE:
+		_factor_iterative( n, p_bits, q_bits, result, block_size, adaptive, workers, run_budget, prune, engine, pool, force_msb, frontier_cache.default_cache if cache is True else cache )
+	elif method == METHOD_BQM:
+		_factor_BQM( n, p_bits, q_bits, result, block_size, run_budget, workers, num_starts, sampler, sampler_kwargs, force_msb, compact_carries )
+	elif method == METHOD_HYBRID:
+		_factor_hybrid( n, p_bits, q_bits, result, block_size, split_block, run_budget, sampler, sampler_kwargs, force_msb, compact_carries )
+	elif method == METHOD_DECOMPOSITION:
+		_factor_decomposition( n, p_bits, q_bits, result, block_size, run_budget, num_starts, force_msb, compact_carries )
+	else:
+		raise Exception('Unknown method ' + str(method))
+
+	if result['status'] is None:
+		result['status'] = STATUS_FACTORED if result['factors'] is not None else STATUS_NOT_FOUND
+
+	if result['status'] == STATUS_NOT_FOUND and balanced_guess and 'prescreen' not in result:
+		result['hint'] = 'The bit lengths of the factors were guessed for a balanced semiprime. Give p_bits and q_bits, or sweep over the splits by python -m factorization.sweep.'
+
+	result['times']['total'] = time.time() - start_time
+
+	if DEBUG:
+		print( result )
+
+	return result
+
+
+##
+# @brief Factorize the numbers of a stream and write the results in JSON lines format
+# @param lines An iterable of text lines containing the numbers (one number in a line; empty lines and lines starting with # are skipped)
+# @param output A writable text stream of the results
+# @param kwargs Keyword arguments passed to function factor
+# @return Returns with the number of the processed targets
+def factor_stream( lines, output, **kwargs ):
+	target_num = 0
+	for line in lines:
+		line = line.strip()
+		if len(line) == 0 or line.startswith('#'):
+			continue
+
+		target_num = target_num + 1
+		try:
+			result = factor( int(line), **kwargs )
+		except Exception as err:
+			result = {'n': line, 'status': STATUS_ERROR, 'error': str(err)}
+
+		output.write( json.dumps( result ) + '\n' )
+		output.flush()
+
+	return target_num
+
+
+##
+# @brief Command line entry point: python -m factorization [targets] [options]
+# @param argv The list of the command line arguments (for None sys.argv is used)
+def main( argv=None ):
+	parser = argparse.ArgumentParser( prog='python -m factorization', description='Factorize odd semiprimes and write the results in JSON lines format.' )
+	parser.add_argument( 'targets', nargs='*', help='the numbers to be factorized' )
+	parser.add_argument( '-i', '--input', help='file of the numbers to be factorized (one in a line), - for the standard input' )
+	parser.add_argument( '-o', '--output', help='file of the results (default: standard output)' )
+	parser.add_argument( '-m', '--method', default=METHOD_ITERATIVE, choices=[METHOD_ITERATIVE, METHOD_BQM, METHOD_HYBRID, METHOD_DECOMPOSITION] )
+	parser.add_argument( '--p-bits', type=int, help='the bit length of the first factor' )
+	parser.add_argument( '--q-bits', type=int, help='the bit length of the second factor' )
+	parser.add_argument( '-b', '--block-size', type=int, default=5 )
+	parser.add_argument( '--adaptive', action='store_true', help='use adaptive blocks in the iterative method' )
+	parser.add_argument( '--no-prune', action='store_true', help='do not prune the partial solutions of the iterative method by the magnitude bounds' )
+	parser.add_argument( '--engine', default=ENGINE_BITSLICE, choices=[ENGINE_BITSLICE, ENGINE_SCALAR], help='engine evaluating the candidates of the blocks in the iterative method' )
+	parser.add_argument( '--pool', default=POOL_PROCESS, choices=[POOL_PROCESS, POOL_THREAD], help='pool of the workers of the iterative method' )
+	parser.add_argument( '-w', '--workers', type=int, default=1 )
+	parser.add_argument( '-t', '--time-limit', type=float, help='time limit of a factorization in seconds' )
+	parser.add_argument( '--max-frontier', type=int, help='maximal number of the partial solutions of the iterative method' )
+	parser.add_argument( '--max-rss', type=float, help='maximal resident memory in megabytes' )
+	parser.add_argument( '--num-starts', type=int, help='number of the sampler invocations of the BQM method on the worker processes, or of the random starts of the decomposition method' )
+	parser.add_argument( '--force-msb', action='store_true', help='fix the most significant bits of the factors to 1' )
+	parser.add_argument( '--frontier-cache', action='store_true', help='share the frontiers of the low-order blocks of the iterative method among the targets' )
+	parser.add_argument( '--frontier-cache-dir', help='directory of the pickled frontiers shared among the runs (implies --frontier-cache)' )
+	parser.add_argument( '--compact-carries', action='store_true', help='encode the carries of the BQM cost functions by the exact ranges of their values' )
+	parser.add_argument( '--prescreen', action='store_true', help='pre-screen the targets by trial division, Fermat and Pollard rho methods' )
+	parser.add_argument( '--trial-bound', type=int, help='upper bound of the primes of the trial division in the pre-screening (implies --prescreen)' )
+	parser.add_argument( '--fermat-iterations', type=int, help='maximal number of the iterations of the Fermat method in the pre-screening (implies --prescreen)' )
+	parser.add_argument( '--rho-iterations', type=int, help='maximal number of the iterations of the Pollard rho method in the pre-screening (implies --prescreen)' )
+	parser.add_argument( '--split-block', type=int, help='last block solved by the iterative part of the hybrid method' )
+	parser.add_argument( '-s', '--sampler', default='qbsolv', help='sampler of the BQM method: ' + ', '.join(samplers.get_sampler_names()) )
+	args = parser.parse_args( argv )
+
+	lines = list( args.targets )
+	if args.input == '-':
+		lines = lines + list( sys.stdin )
+	elif args.input is not None:
+		with open( args.input ) as f:
+			lines = lines + f.readlines()
+
+	kwargs = {'method': args.method, 'p_bits': args.p_bits, 'q_bits': args.q_bits, 'block_size': args.block_size, 'adaptive': args.adaptive, 'prune': not args.no_prune, 'engine': args.engine, 'pool': args.pool, 'workers': args.workers, 'time_limit': args.time_limit, 'max_frontier': args.max_frontier, 'split_block': args.split_block, 'num_starts': args.num_starts, 'force_msb': args.force_msb, 'compact_carries': args.compact_carries, 'sampler': args.sampler}
+	if args.max_rss is not None:
+		kwargs['max_rss'] = int( args.max_rss*2**20 )
+
+	if args.frontier_cache_dir is not None:
+		kwargs['cache'] = frontier_cache.frontier_cache( cache_dir=args.frontier_cache_dir )
+	elif args.frontier_cache:
+		kwargs['cache'] = True
+
+	if args.trial_bound is not None or args.fermat_iterations is not None or args.rho_iterations is not None:
+		prescreen_budgets = {'trial_bound': args.trial_bound, 'fermat_iterations': args.fermat_iterations, 'rho_iterations': args.rho_iterations}
+		kwargs['prescreen'] = prescreener( **{key: value for (key, value) in prescreen_budgets.items() if value is not None} )
+	elif args.prescreen:
+		kwargs['prescreen'] = True
+
+	if args.output is None:
+		factor_stream( lines, sys.stdout, **kwargs )
+	else:
+		with open( args.output, 'w' ) as f:
+			factor_stream( lines, f, **kwargs )
+
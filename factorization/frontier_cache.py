@@ -0,0 +1,181 @@
+from collections import OrderedDict
+import hashlib
+import os
+import pickle
+
+# Set True to show debug information, or False otherwise
+DEBUG = False
+
+
+##
+# @brief Class to cache the partial solutions (frontiers) of the iterative factorization (see class factorization.iterative.iterative_factorization) shared among targets.
+# @description Without pruning the partial solutions after block k depend only on the shape of the problem (bit lengths, block layout, known bits of p and q) and on the bits of the target in the columns 0,...,k. The pruning bounds depend on the magnitude of the target, so the pruned frontiers are shared only by the runs of the same target. The frontiers are keyed by (shape, k, low-order bits of the target or the target itself), kept in an in-memory LRU cache bounded by the total number of the partial solutions, and optionally pickled into a directory, so a new target sharing the low-order bits starts from the deepest cached frontier.
+class frontier_cache():
+
+	##
+	# @brief Constructor of the class.
+	# @param max_solutions The maximal total number of the partial solutions kept in the memory
+	# @param cache_dir The directory to store the pickled frontiers (optional). For None the frontiers are kept only in the memory.
+	def __init__( self, max_solutions=2**20, cache_dir=None ):
+		## The maximal total number of the partial solutions kept in the memory
+		self._max_solutions = max_solutions
+		## The directory of the pickled frontiers
+		self._cache_dir = cache_dir
+		# The in-memory LRU cache of the frontiers
+		self._frontiers = OrderedDict()
+		# The total number of the partial solutions in the memory
+		self._solution_num = 0
+		# The statistics of the cache
+		self._stats = {'hits': 0, 'misses': 0, 'disk_hits': 0, 'disk_writes': 0, 'skipped_blocks': 0}
+
+		if cache_dir is not None:
+			os.makedirs( cache_dir, exist_ok=True )
+
+
+	##
+	# @brief Determines the shape of a problem
+	# @param solver An instance of class factorization.iterative.iterative_factorization with determined blocks
+	# @return Returns with a tuple (bit length of p, bit length of q, block list, known bits of p, known bits of q, pruning of the solver)
+	def get_shape( self, solver ):
+		(p, q) = solver.get_abstract_nums()
+		known_bits = list()
+		for num in (p, q):
+			known_bits.append( tuple( (bit, num.get_bit(bit)) for bit in range(0, num.bit_length()) if num.check_bit(bit) ) )
+
+		return (p.bit_length(), q.bit_length(), tuple(solver.get_blocks()[0]), known_bits[0], known_bits[1], solver.get_pruning())
+
+
+	##
+	# @brief Determines the key of the frontier of a block
+	# @param shape The shape of the problem (see method get_shape)
+	# @param block_id The id of the last solved block
+	# @param target The number to be factorized
+	# @return Returns with a tuple (shape, block_id, low-order bits of the target up to the last column of the block), or (shape, block_id, target) for a pruning solver
+	def get_key( self, shape, block_id, target ):
+		if shape[5]:
+			# the pruning bounds are given by the whole target
+			return (shape, block_id, target)
+
+		last_col = shape[2][block_id]
+		return (shape, block_id, target % 2**(last_col+1))
+
+
+	##
+	# @brief Looks up the deepest cached frontier of a problem
+	# @param shape The shape of the problem (see method get_shape)
+	# @param target The number to be factorized
+	# @param last_block The id of the last block to be solved
+	# @return Returns with a tuple (block_id, frontier) of the deepest cached block and a copy of its list of partial solutions, or (0, None) if no block was cached
+	def lookup( self, shape, target, last_block ):
+		for block_id in range(last_block, 0, -1):
+			key = self.get_key( shape, block_id, target )
+
+			if key in self._frontiers.keys():
+				self._stats['hits'] = self._stats['hits'] + 1
+				self._stats['skipped_blocks'] = self._stats['skipped_blocks'] + block_id
+				self._frontiers.move_to_end( key )
+				return (block_id, list( self._frontiers[key] ))
+
+			frontier = self.load( key )
+			if frontier is not None:
+				self._stats['disk_hits'] = self._stats['disk_hits'] + 1
+				self._stats['skipped_blocks'] = self._stats['skipped_blocks'] + block_id
+				self.add( key, frontier )
+				return (block_id, list( frontier ))
+
+		self._stats['misses'] = self._stats['misses'] + 1
+		return (0, None)
+
+
+	##
+	# @brief Stores the frontier of a block
+	# @param shape The shape of the problem (see method get_shape)
+	# @param block_id The id of the last solved block
+	# @param target The number to be factorized
+	# @param frontier The list of the partial solutions after the block (the list and its entries should not be modified later)
+	def store( self, shape, block_id, target, frontier ):
+		key = self.get_key( shape, block_id, target )
+		if key in self._frontiers.keys():
+			return
+
+		self.add( key, frontier )
+
+		file_name = self.get_file_name( key )
+		if file_name is not None and not os.path.isfile( file_name ):
+			# write into a temporary file first, so concurrent readers never see a partial file
+			tmp_file_name = file_name + '.' + str(os.getpid()) + '.tmp'
+			with open( tmp_file_name, 'wb' ) as f:
+				pickle.dump( (key, frontier), f, protocol=pickle.HIGHEST_PROTOCOL )
+			os.replace( tmp_file_name, file_name )
+			self._stats['disk_writes'] = self._stats['disk_writes'] + 1
+
+
+	##
+	# @brief Adds a frontier to the in-memory cache and evicts the least recently used frontiers above the limit
+	# @param key The key of the frontier (see method get_key)
+	# @param frontier The list of the partial solutions
+	def add( self, key, frontier ):
+		if len( frontier ) > self._max_solutions:
+			return
+
+		self._frontiers[key] = frontier
+		self._solution_num = self._solution_num + len( frontier )
+		while self._solution_num > self._max_solutions:
+			(evicted_key, evicted_frontier) = self._frontiers.popitem( last=False )
+			self._solution_num = self._solution_num - len( evicted_frontier )
+
+
+	##
+	# @brief Gets the name of the file of a pickled frontier
+	# @param key The key of the frontier (see method get_key)
+	# @return Returns with the path of the file, or None if there is no cache directory
+	def get_file_name( self, key ):
+		if self._cache_dir is None:
+			return None
+
+		return os.path.join( self._cache_dir, 'frontier_' + hashlib.sha1( repr(key).encode() ).hexdigest() + '.pickle' )
+
+
+	##
+	# @brief Loads a pickled frontier from the cache directory
+	# @param key The key of the frontier (see method get_key)
+	# @return Returns with the list of the partial solutions, or None if it was not found
+	def load( self, key ):
+		file_name = self.get_file_name( key )
+		if file_name is None or not os.path.isfile( file_name ):
+			return None
+
+		with open( file_name, 'rb' ) as f:
+			(stored_key, frontier) = pickle.load( f )
+
+		# protect against hash collisions
+		if stored_key != key:
+			return None
+
+		if DEBUG:
+			print('Frontier loaded from ' + file_name)
+
+		return frontier
+
+
+	##
+	# @brief Gets the statistics of the cache
+	# @return Returns with a dictionary {'hits', 'misses', 'disk_hits', 'disk_writes', 'skipped_blocks', 'size', 'solutions'}
+	def get_stats( self ):
+		stats = dict( self._stats )
+		stats['size'] = len( self._frontiers )
+		stats['solutions'] = self._solution_num
+		return stats
+
+
+	##
+	# @brief Removes the frontiers from the memory (the pickled frontiers are kept) and resets the statistics
+	def clear( self ):
+		self._frontiers = OrderedDict()
+		self._solution_num = 0
+		for key in self._stats.keys():
+			self._stats[key] = 0
+
+
+## The default cache of the frontiers
+default_cache = frontier_cache()
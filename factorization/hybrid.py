@@ -0,0 +1,169 @@
+from abstract_binary.abstract_binary_number import abstract_bin_num
+from compose_BQM.compose_BQM import BQM_from_multiplication_table
+from factorization.iterative import iterative_factorization, CARRY
+from factorization.budget import budget, STATUS_COMPLETE
+from factorization import samplers
+
+import time
+
+# Set True to show debug information, or False otherwise
+DEBUG = False
+
+
+##
+# @brief Class to solve the factorization problem by a hybrid method: the low-order blocks are solved by the iterative (classical) method, while for each surviving partial solution a reduced BQM cost function of the remaining high-order blocks is composed and sampled.
+# @description The block layout is determined by method multiplication_table.determine_blocks, so the carries of the iterative solutions can be mapped onto the carry bits of the BQM model.
+class hybrid_factorization( iterative_factorization ):
+
+
+	##
+	# @brief Constructor of the class. Values num1 and num2 are stores by class attributes _p and _q such that bit_length(_p) >= bit_length(_q)
+	# @param num1 The first abstract binary number (an instance of class abstract_bin_num)
+	# @param num2 The second abstract binary number (an instance of class abstract_bin_num)
+	# @param target_num The number to be factorized (an instance of class abstract_binary.binary_number.bin_num)
+	# @param block_size The maximal size of the blocks in the multiplication table
+	# @param compact_carries Set True to encode the carries of the sampled blocks by the exact ranges of their values (see method multiplication_table.determine_compact_carries)
+	def __init__( self, num1, num2, target_num, block_size=5, compact_carries=False ):
+		iterative_factorization.__init__(self, num1, num2, target_num, block_size)
+
+		## Set True to encode the carries of the sampled blocks compactly
+		self._compact_carries = compact_carries
+
+		# The statistics of the hybrid solution
+		self._hybrid_stats = {'iterative_time': 0, 'branches': 0, 'skipped_branches': 0, 'compose_time': 0, 'sample_time': 0, 'max_variables': 0, 'max_terms': 0}
+		# The factors found by the sampler
+		self._factors = None
+
+
+	##
+	# @brief Gets the default block separating the iterative and the sampled parts: the last block covering only the lower half of the bits of q
+	# @return Returns with the id of the block
+	def get_default_split_block( self ):
+		split_block = 1
+		for block_id in range(1, len(self._block_list)-1):
+			if self._block_list[block_id] < self._q.bit_length() // 2:
+				split_block = block_id
+
+		return split_block
+
+
+	##
+	# @brief Composes the reduced BQM cost function of the blocks following a given block for a partial solution of the iterative method
+	# @param split_block The id of the last block solved by the iterative method
+	# @param solution A partial solution of form {p:binary_format, q:binary_format, CARRY:binary_format}
+	# @return Returns with an instance of class compose_BQM.compose_BQM.BQM_from_multiplication_table containing the reduced cost function, or None if the carry of the partial solution can not be represented by the carry bits of the BQM model
+	def compose_branch( self, split_block, solution ):
+
+		# fix the bits of the partial solution and the known higher bits
+		p = abstract_bin_num( self._p.bit_length() )
+		for bit_idx in range(0, len(solution['p'])):
+			p.set_bit( bit_idx, int(solution['p'][-bit_idx-1]) )
+		for bit_idx in range(len(solution['p']), self._p.bit_length()):
+			if self._p.check_bit( bit_idx ):
+				p.set_bit( bit_idx, self._p.get_bit( bit_idx ) )
+
+		q = abstract_bin_num( self._q.bit_length() )
+		for bit_idx in range(0, len(solution['q'])):
+			q.set_bit( bit_idx, int(solution['q'][-bit_idx-1]) )
+		for bit_idx in range(len(solution['q']), self._q.bit_length()):
+			if self._q.check_bit( bit_idx ):
+				q.set_bit( bit_idx, self._q.get_bit( bit_idx ) )
+
+		# fix the carry bits entering the first sampled block
+		carry_bits = self.get_carry_bits( self._block_list[split_block]+1, self.bin_to_dec( solution[CARRY] ) )
+		if carry_bits is None:
+			return None
+		carry_col_dict = dict( self._carry_col_dict )
+		carry_col_dict.update( carry_bits )
+
+		cBQM = BQM_from_multiplication_table( p, q, self._target_num )
+		cBQM.set_blocks( self._block_list, carry_col_dict, self._carry_weight_dict )
+
+		# compose the cost function of the remaining blocks
+		for block_id in range(split_block+1, len(self._block_list)):
+			cBQM.cost_function_of_block( block_id, update_cost_function=True )
+		cBQM.add_penalties_to_cost_function()
+
+		return cBQM
+
+
+	##
+	# @brief Runs the hybrid solution
+	# @param sampler The name of the sampler (see factorization.samplers.get_sampler_names), or a sampler instance
+	# @param split_block The id of the last block solved by the iterative method (for None method get_default_split_block is used)
+	# @param max_branches The maximal number of the sampled partial solutions (optional)
+	# @param run_budget The budget of the run (an instance of class factorization.budget.budget, optional)
+	# @param sampler_kwargs Keyword arguments passed to the sample_qubo method of the sampler
+	# @return Returns with a tuple (p, q) of the factors, or None if no factors were found
+	def run_hybrid( self, sampler='qbsolv', split_block=None, max_branches=None, run_budget=None, **sampler_kwargs ):
+		if run_budget is None:
+			run_budget = budget()
+
+		if len( self._block_list ) == 0:
+			self.determine_blocks( self._block_size, self._compact_carries )
+		if split_block is None:
+			split_block = self.get_default_split_block()
+
+		# the iterative solution of the low-order blocks
+		start_time = time.time()
+		self.run_iterations( run_budget=run_budget, last_block=split_block )
+		self._hybrid_stats['iterative_time'] = time.time() - start_time
+		if self._status != STATUS_COMPLETE:
+			return None
+
+		sampler = samplers.get_sampler( sampler )
+		target = self._target_num.get_decimal()
+
+		# sample the reduced cost functions of the surviving branches
+		for solution in self._exact_solutions:
+			if max_branches is not None and self._hybrid_stats['branches'] >= max_branches:
+				break
+
+			status = run_budget.check()
+			if status is not None:
+				self._status = status
+				break
+
+			start_time = time.time()
+			cBQM = self.compose_branch( split_block, solution )
+			self._hybrid_stats['compose_time'] = self._hybrid_stats['compose_time'] + time.time() - start_time
+			if cBQM is None:
+				self._hybrid_stats['skipped_branches'] = self._hybrid_stats['skipped_branches'] + 1
+				continue
+
+			(BQM_model, constant) = cBQM.get_cost_function()
+			variables = set()
+			for key in BQM_model.keys():
+				variables.update( key )
+			self._hybrid_stats['branches'] = self._hybrid_stats['branches'] + 1
+			self._hybrid_stats['max_variables'] = max( self._hybrid_stats['max_variables'], len(variables) )
+			self._hybrid_stats['max_terms'] = max( self._hybrid_stats['max_terms'], len(BQM_model) )
+
+			# all the bits might be fixed by the iterative part
+			if len( variables ) == 0:
+				samples = [dict()] if constant == 0 else []
+			else:
+				start_time = time.time()
+				samples = sampler.sample_qubo( BQM_model, **sampler_kwargs ).samples()
+				self._hybrid_stats['sample_time'] = self._hybrid_stats['sample_time'] + time.time() - start_time
+
+			for sample in samples:
+				(p, q) = cBQM.get_factors_from_sample( sample )
+				if p > 1 and q > 1 and p*q == target:
+					self._factors = (p, q)
+					if DEBUG:
+						print('Factors found in branch ' + str(self._hybrid_stats['branches']) + ': ' + str(self._factors))
+					return self._factors
+
+		if DEBUG:
+			print('The statistics of the hybrid solution: ' + str(self._hybrid_stats))
+
+		return None
+
+
+	##
+	# @brief Gets the statistics of the hybrid solution
+	# @return Returns with a dictionary {'iterative_time', 'branches', 'skipped_branches', 'compose_time', 'sample_time', 'max_variables', 'max_terms'}
+	def get_hybrid_stats( self ):
+		return self._hybrid_stats
+
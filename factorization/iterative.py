@@ -1,8 +1,12 @@
 from abstract_binary.multiply import multiplication_table
 from abstract_binary.binary_number import bin_num
-from dwave_qbsolv import QBSolv
 
 from abstract_binary.abstract_binary_number import abstract_bin_num
+from factorization.budget import budget, budget_exceeded, STATUS_COMPLETE
+from factorization import kernel
+from factorization.kernel import ENGINE_SCALAR, ENGINE_BITSLICE
+
+import time
 
 # Set True to show debug information, or False otherwise
 DEBUG = False
@@ -14,6 +18,11 @@ CONST = 'constant'
 # String in the dictionaries labeling carry bits
 CARRY = 'carry'
 
+# The pools of the workers expanding the partial solutions: processes or threads (the threads run the stateless kernel of module factorization.kernel without locks, in parallel on free-threaded Python builds)
+POOL_PROCESS = 'process'
+POOL_THREAD = 'thread'
+
+
 ##
 # @brief Class to reduce the higher order terms in binary polinomials via a substitutional method of <a href="https://docs.dwavesys.com/docs/latest/c_handbook_3.html#non-quadratic-higher-degree-polynomials-to-ising-qubo">DWave dimod</a>
 # @description The substituted variables x_k = x_i*y_j are stored in a dictionary with a penalty function. This class might be used to reduce the polinomial orders while the BQM model is under construction. Thus this solution might be faster than the post processing solution of the Dwave API, and the data produced during the reduction are also accessible.
@@ -25,142 +34,318 @@ class iterative_factorization( multiplication_table ):
 	# @brief Constructor of the class. Values num1 and num2 are stores by class attributes _p and _q such that bit_length(_p) >= bit_length(_q)
 	# @param num1 The first abstract binary number (an instance of class abstract_bin_num)
 	# @param num2 The second abstract binary number (an instance of class abstract_bin_num)
-	def __init__( self, num1, num2, target_num ):
+	# @param block_size The (maximal) size of the blocks in the multiplication table
+	# @param adaptive Set True to determine the blocks by the cost model of method multiplication_table.determine_adaptive_blocks, or False to use the carry-width rules of method multiplication_table.determine_blocks
+	# @param prune Set True to discard the partial solutions whose ranges of p*q exclude the target (see method prune_solutions)
+	# @param engine The engine evaluating the candidates of a block: ENGINE_SCALAR or ENGINE_BITSLICE (without numpy the scalar engine is used)
+	def __init__( self, num1, num2, target_num, block_size=5, adaptive=False, prune=False, engine=ENGINE_SCALAR ):
 		multiplication_table.__init__(self, num1, num2)
 
 		# The number to be factorized given as an instance of class abstract_binary.binary_number.bin_num
 		self._target_num = target_num
 		# The default size of the blocks in the multiplication table
-		self._block_size = 5
+		self._block_size = block_size
+		# Logical variable to use adaptive block sizes
+		self._adaptive = adaptive
 		# The number of blocks in the multiplication table
 		self._total_block_num = None
 		# The list of exact solutions in the iteration process (The first bit is assumed to be 1 for odd numbers)
 		self._exact_solutions = list()
-		self._exact_solutions.append({'p': '1', 'q': '1' , CARRY:'0'*self._block_size})
+		self._exact_solutions.append({'p': '1', 'q': '1' , CARRY:'0'})
+		# The list of the measured costs of the blocks
+		self._block_stats = list()
+		# The status of the iterations
+		self._status = None
+		# Logical variable to prune the partial solutions by the magnitude bounds
+		self._prune = prune
+		if engine not in (ENGINE_SCALAR, ENGINE_BITSLICE):
+			raise Exception('Unknown engine ' + str(engine))
+
+		# The engine evaluating the candidates of a block
+		self._engine = kernel.get_available_engine( engine )
 
 
 	##
 	# @brief Iterations to solve the factorization problem
-	def run_iterations(self):
-
-		# generating the blocks
-		self.determine_blocks( self._block_size )
+	# @param workers The number of the workers expanding the partial solutions of a block (for 1 the blocks are expanded in the calling thread)
+	# @param time_limit The time limit of the iterations in seconds (optional). Ignored if parameter run_budget is given.
+	# @param run_budget The budget of the iterations (an instance of class factorization.budget.budget, optional). The budget is checked between the blocks and during the expansion of the blocks; when it is exceeded, the partial solutions of the last completed block are kept and the status describes the exceeded limit.
+	# @param last_block The id of the last block to be solved (optional). For None all the blocks are solved.
+	# @param cache An instance of class factorization.frontier_cache.frontier_cache (optional). The iterations start from the deepest cached frontier of the low-order bits of the target, and the frontiers of the solved blocks are stored in the cache.
+	# @param pool The pool of the workers: POOL_PROCESS or POOL_THREAD
+	# @param coordinator An instance of class factorization.distributed.frontier_coordinator expanding the partial solutions on remote workers (optional). Parameters workers and pool are ignored if it is given.
+	def run_iterations(self, workers=1, time_limit=None, run_budget=None, last_block=None, cache=None, pool=POOL_PROCESS, coordinator=None):
+
+		if run_budget is None:
+			run_budget = budget( time_limit=time_limit )
+
+		# generating the blocks (if they were not set by method multiplication_table.set_blocks)
+		if len( self._block_list ) > 0:
+			pass
+		elif self._adaptive:
+			self.determine_adaptive_blocks( self._block_size, carry_overlap=True )
+		else:
+			self.determine_blocks( self._block_size )
 
 
 		#The total number of blocks in the multiplication table
 		self._total_block_num = len(self._block_list)
 
+		if last_block is None:
+			last_block = self._total_block_num-1
+
 		if DEBUG:
 			print('The number of blocks: ' + str(self._total_block_num) )
 
+		# start from the deepest cached frontier
+		first_block = 1
+		if cache is not None:
+			shape = cache.get_shape( self )
+			target = self._target_num.get_decimal()
+			(cached_block, frontier) = cache.lookup( shape, target, last_block )
+			if frontier is not None:
+				self._exact_solutions = frontier
+				first_block = cached_block + 1
+				for block_id in range(1, first_block):
+					self._block_stats.append( {'cols': (self._block_list[block_id-1]+1, self._block_list[block_id]), 'candidates': 0, 'frontier': len(frontier) if block_id == cached_block else None, 'time': 0, 'cached': True} )
+
+		# the workers run the stateless kernel on the description of the blocks, so they need no copy of the solver
+		executor = None
+		if workers > 1 and coordinator is None:
+			# concurrent.futures is imported only when needed to keep the import of the module fast
+			import concurrent.futures
+			if pool == POOL_THREAD:
+				executor = concurrent.futures.ThreadPoolExecutor( workers )
+			elif pool == POOL_PROCESS:
+				executor = concurrent.futures.ProcessPoolExecutor( workers )
+			else:
+				raise Exception('Unknown pool ' + str(pool))
+
+		self._status = STATUS_COMPLETE
+		try:
+			# run the iterations for the blocks
+			for block_id in range(first_block, last_block+1):
+
+				status = run_budget.check( len(self._exact_solutions) )
+				if status is not None:
+					self._status = status
+					break
+				
+				if DEBUG:
+					print('Starting iteration ' + str(block_id) )
+
+				block_start_time = time.time()
+				frontier_size = len(self._exact_solutions)
+
+				# determine the exact solution for one block
+				try:
+					if coordinator is not None:
+						exact_solutions = coordinator.expand( self.get_block_spec( block_id ), self._exact_solutions, self._engine, self.get_prune_bounds( block_id ) if self._prune else None, run_budget )
+					elif executor is None:
+						exact_solutions = self.expand_solutions( block_id, self._exact_solutions, run_budget )
+					else:
+						spec = self.get_block_spec( block_id )
+						bounds = self.get_prune_bounds( block_id ) if self._prune else None
+						chunk_size = max( len(self._exact_solutions) // (4*workers), 1 )
+						chunks = [(spec, self._exact_solutions[idx:idx+chunk_size], self._engine, bounds) for idx in range(0, len(self._exact_solutions), chunk_size)]
+						exact_solutions = list()
+						for new_exact_solutions in executor.map( kernel.expand_chunk, chunks ):
+							exact_solutions.extend( new_exact_solutions )
+							run_budget.enforce( len(exact_solutions) )
+				except budget_exceeded as err:
+					# keep the partial solutions of the last completed block
+					self._status = err.status
+					break
+
+				self._exact_solutions = exact_solutions
+
+				# the measured cost of the block
+				first_col = self._block_list[block_id-1]+1
+				last_col = self._block_list[block_id]
+				(p_bit_num, q_bit_num) = self.get_new_bit_num( first_col, last_col )
+				self._block_stats.append( {'cols': (first_col, last_col), 'candidates': frontier_size*2**(p_bit_num+q_bit_num), 'frontier': len(self._exact_solutions), 'time': time.time()-block_start_time, 'cached': False} )
+
+				if cache is not None:
+					cache.store( shape, block_id, target, self._exact_solutions )
+
+				if DEBUG:				
+					print('number of exact solutions: ' + str(len(self._exact_solutions)))
+					print('Exact solustions: ')
+					print( self._exact_solutions )
+		finally:
+			if executor is not None:
+				executor.shutdown( wait=False, cancel_futures=True )
+
+		if self._status == STATUS_COMPLETE and last_block == self._total_block_num-1:
+			# the carry of the last block should vanish
+			self._exact_solutions = [solution for solution in self._exact_solutions if self.bin_to_dec(solution[CARRY]) == 0]
 
-		# run the iterations for the blocks
-		for block_id in range(1, self._total_block_num+1):
-			
-			if DEBUG:
-				print('Starting iteration ' + str(block_id) )
+		if DEBUG:
+			print('The status of the iterations: ' + self._status)
+			print('The predicted and measured costs of the blocks: ')
+			for block_report in self.get_block_report():
+				print( block_report )
 
-			# determine the exact solution for one block
-			exact_solutions = list()
-			for previous_idx in range(0, len(self._exact_solutions) ): #the new solutions are determined in terms of the previous solutions
-				new_exact_solutions = self.run_iteration(block_id, self._exact_solutions[previous_idx])
-				exact_solutions = exact_solutions + new_exact_solutions	
 
-			self._exact_solutions = exact_solutions
+	##
+	# @brief Expands a list of partial solutions over a block
+	# @param block_id The id = 1,2,3,... of the block
+	# @param previous_solutions The list of the partial solutions of the previous blocks
+	# @param run_budget The budget of the expansion (an instance of class factorization.budget.budget, optional). An exception budget_exceeded is raised when the budget is exceeded.
+	# @return Returns with the list of the partial solutions including the block
+	def expand_solutions(self, block_id, previous_solutions, run_budget=None):
+		spec = self.get_block_spec( block_id )
+		bounds = self.get_prune_bounds( block_id ) if self._prune else None
+
+		# the budget is checked between the batches of the partial solutions (the batches of the bit-sliced engine should fill its lanes)
+		batch_size = len(previous_solutions)
+		if run_budget is not None:
+			batch_size = run_budget.check_interval
+			if self._engine == ENGINE_BITSLICE:
+				# numpy is imported only by the bit-sliced engine
+				from factorization import bitslice
+				(p_bit_num, q_bit_num) = kernel.get_new_bit_num( spec )
+				batch_size = max( batch_size, bitslice.MAX_BATCH_LANES // 2**(p_bit_num+q_bit_num) )
 
-			print('number of exact solutions: ' + str(len(self._exact_solutions)))
-			if DEBUG:				
-				print('Exact solustions: ')
-				print( self._exact_solutions )
+		exact_solutions = list()
+		for start in range(0, len(previous_solutions), max(batch_size, 1)):
+			exact_solutions.extend( kernel.expand_block( spec, previous_solutions[start:start+batch_size], self._engine, bounds ) )
 
+			if run_budget is not None:
+				run_budget.enforce( len(exact_solutions) )
 
+		return exact_solutions
 
 
 	##
-	# @brief Add another bits to the exact solution stored in the self._exact_solutions
-	# @param exact_solution The list of new exact solutions in form {p:binary_format, q:binary_format, CARRY:binary_format}
-	def add_block_to_exact_solutions(self, block_id):
-		pass
+	# @brief Gets the immutable description of a block used by the kernel (see function factorization.kernel.get_block_spec)
+	# @param block_id The id = 1,2,3,... of the block
+	# @return Returns with a tuple (p_bit_length, q_bit_length, first_col, last_col, target_bits, p_known, q_known)
+	def get_block_spec( self, block_id ):
+		known_bits = [[(bit, num.get_bit(bit)) for bit in range(0, num.bit_length()) if num.check_bit(bit)] for num in (self._p, self._q)]
+		return kernel.get_block_spec( self._p.bit_length(), self._q.bit_length(), self._block_list, block_id, self._target_num.get_decimal(), known_bits[0], known_bits[1] )
 
 
 	##
-	# @brief Run one iteration in the solving process
-	# @param block_id The id = 0,1,2,3,... of the block
-	# @return Returns with a list of the exact solutions and with the carry bits for the next block of form {p:binary_format, q:binary_format, CARRY:binary_format}
-	def run_iteration(self, block_id, previous_solutions=None):
-		
-		#print(previous_solutions)
-		#setting the already known bits from the list of exact solutions
-		for bit_idx in range(0, len(previous_solutions['p']) ): 
-			self._p.set_bit( 0, int(previous_solutions['p'][bit_idx]) )
+	# @brief Gets the interval of the possible values of a number from its assigned low-order bits
+	# @param num_idx 0 for p and 1 for q
+	# @param assigned_bits The number of the assigned low-order bits
+	# @return Returns with a tuple (known, free) of the sum of the known bits and of the weights of the unknown bits above the assigned bits. The value of the number is between low+known and low+known+free, where low is the value of the assigned bits.
+	def get_high_bit_range( self, num_idx, assigned_bits ):
+		num = (self._p, self._q)[num_idx]
+		known = 0
+		free = 0
+		for bit in range(assigned_bits, num.bit_length()):
+			if num.check_bit(bit):
+				known = known + num.get_bit(bit)*2**bit
+			else:
+				free = free + 2**bit
+
+		return (known, free)
 
-		for bit_idx in range(0, len(previous_solutions['q']) ): 
-			self._q.set_bit( 0, int(previous_solutions['q'][bit_idx]) )
 
+	##
+	# @brief Discards the partial solutions whose interval bounds of p*q exclude the target. If p and q have the same bit length and the same known bits, the solutions with p > q are also discarded by the ranges (the mirrored solutions are kept).
+	# @param solutions The list of the partial solutions of form {p:binary_format, q:binary_format, CARRY:binary_format} with the same number of assigned bits
+	# @return Returns with the list of the kept partial solutions
+	def prune_solutions( self, solutions ):
+		if len( solutions ) == 0:
+			return solutions
 
-		# The new bits of the number involved in the current block (and not involved in the previous blocks)
-		p_bits = list( range(self._block_list[block_id-1]+1, self._block_list[block_id]+1) )
-		q_bits = list( range(self._block_list[block_id-1]+1, self._block_list[block_id]+1) )
-		
+		return kernel.prune_solutions( solutions, self.get_bounds( len(solutions[0]['p']), len(solutions[0]['q']) ) )
 
-		# define the range of the numbers p and q
-		max_p = 0
-		for idx in range(0, len(p_bits)):
-			max_p = max_p + 2**idx
 
+	##
+	# @brief Gets the bounds to prune the partial solutions with given numbers of assigned bits (see function factorization.kernel.prune_solutions)
+	# @param p_assigned_bits The number of the assigned low-order bits of p
+	# @param q_assigned_bits The number of the assigned low-order bits of q
+	# @return Returns with a tuple (target, p_known, p_free, q_known, q_free, symmetric)
+	def get_bounds( self, p_assigned_bits, q_assigned_bits ):
+		(p_known, p_free) = self.get_high_bit_range( 0, p_assigned_bits )
+		(q_known, q_free) = self.get_high_bit_range( 1, q_assigned_bits )
+		known_bits = [[(bit, num.get_bit(bit)) for bit in range(0, num.bit_length()) if num.check_bit(bit)] for num in (self._p, self._q)]
+		symmetric = self._p.bit_length() == self._q.bit_length() and known_bits[0] == known_bits[1]
+		return (self._target_num.get_decimal(), p_known, p_free, q_known, q_free, symmetric)
 
-		max_q = 0
-		for idx in range(0, len(q_bits)):
-			max_q = max_q+ 2**idx
 
-		
+	##
+	# @brief Gets the bounds to prune the partial solutions after a block
+	# @param block_id The id = 1,2,3,... of the block
+	# @return Returns with a tuple (target, p_known, p_free, q_known, q_free, symmetric) (see function factorization.kernel.prune_solutions)
+	def get_prune_bounds( self, block_id ):
+		last_col = self._block_list[block_id]
+		return self.get_bounds( min(last_col+1, self._p.bit_length()), min(last_col+1, self._q.bit_length()) )
 
 
-		exact_solutions = list()
-		# the iteration to find the exact solutions
-		for p_idx in range(1,max_p+1):
-			p_bin = ('{0:0'+str(len(p_bits))+'b}').format(p_idx)
+	##
+	# @brief Gets whether the partial solutions are pruned by the magnitude bounds
+	# @return Returns True if the partial solutions are pruned, False otherwise
+	def get_pruning(self):
+		return self._prune
 
-			# set the bits of the abstract binary number _q
-			for bit_idx in range(p_bits[0], p_bits[len(p_bits)-1]+1):
-				self._p.set_bit( bit_idx, int(p_bin[-(bit_idx-p_bits[0]+1)]) )
 
-			
-			for q_idx in range(1, p_idx+1):
-				q_bin = ('{0:0'+str(len(q_bits))+'b}').format(q_idx)
+	##
+	# @brief Gets the engine evaluating the candidates of the blocks
+	# @return Returns with ENGINE_SCALAR or ENGINE_BITSLICE
+	def get_engine(self):
+		return self._engine
 
-				# set the bits of the abstract binary number _q
-				for bit_idx in range(q_bits[0], q_bits[len(q_bits)-1]+1):
-					self._q.set_bit( bit_idx, int(q_bin[-(bit_idx-q_bits[0]+1)]) )
-	
-				block_BQM = self.sum_up_block( block_id )
 
-				# determine the last 2*_block_size bits of the constant in the BQM of the block
-				constant = block_BQM[CONST]
+	##
+	# @brief Gets the status of the iterations
+	# @return Returns with STATUS_COMPLETE if all the blocks were solved, the status of the exceeded limit of the budget (STATUS_TIME_LIMIT, STATUS_FRONTIER_LIMIT or STATUS_MEMORY_LIMIT), or None if the iterations were not run
+	def get_status(self):
+		return self._status
 
-				# adding the carry to the constant
-				constant = constant + self.bin_to_dec(previous_solutions[CARRY])
-				constant = ('{0:0'+str(2*self._block_size)+'b}').format(constant)
-				if constant[self._block_size:2*self._block_size] == '0'*self._block_size:  # compare the last _block_size bits of the constant to zero
-					# found an exact solution
 
-					# determine the carry bits
-					carry_bits = constant[0:self._block_size] 
-					
-					# append the exact solution to the list of exact solutions
-					exact_solutions.append( {'p':p_bin + previous_solutions['p'], 'q':q_bin + previous_solutions['q'], CARRY:carry_bits} )
+	##
+	# @brief Gets the factors from the exact solutions
+	# @return Returns with a list of (p, q) integer tuples of the exact solutions
+	def get_factors(self):
+		return [(int(solution['p'], 2), int(solution['q'], 2)) for solution in self._exact_solutions]
 
-		
+
+	##
+	# @brief Gets the exact solutions of the iteration process
+	# @return Returns with the list of the exact solutions of form {p:binary_format, q:binary_format, CARRY:binary_format}
+	def get_exact_solutions(self):
+		return self._exact_solutions
 
 
+	##
+	# @brief Gets the block layout with the predicted and the measured costs of the blocks
+	# @return Returns with a list of dictionaries {'cols': (first column, last column), 'predicted_candidates', 'predicted_frontier', 'candidates', 'frontier', 'time', 'cached'}. The blocks skipped by the frontier cache are marked by 'cached'.
+	def get_block_report(self):
+		block_costs = self.get_block_costs()
+		block_report = list()
+		for block_idx in range(0, len(self._block_stats)):
+			block_stats = self._block_stats[block_idx]
+			report = {'cols': block_stats['cols']}
+			report['predicted_candidates'] = block_costs[block_idx]['candidates']
+			report['predicted_frontier'] = block_costs[block_idx]['frontier']
+			report['candidates'] = block_stats['candidates']
+			report['frontier'] = block_stats['frontier']
+			report['time'] = block_stats['time']
+			report['cached'] = block_stats['cached']
+			block_report.append( report )
+
+		return block_report
 
 
+	##
+	# @brief Add another bits to the exact solution stored in the self._exact_solutions
+	# @param exact_solution The list of new exact solutions in form {p:binary_format, q:binary_format, CARRY:binary_format}
+	def add_block_to_exact_solutions(self, block_id):
+		pass
 
-		return exact_solutions
-						
 
-		# The number of exact solutions
-		print('The number of exact solutions: ' + str(len(exact_solutions)) )
+	##
+	# @brief Run one iteration in the solving process by the stateless kernel (the abstract binary numbers of the solver are not modified, see function factorization.kernel.evaluate_block)
+	# @param block_id The id = 1,2,3,... of the block
+	# @param previous_solutions A partial solution of the previous blocks of form {p:binary_format, q:binary_format, CARRY:binary_format}
+	# @return Returns with a list of the exact solutions and with the carry bits for the next block of form {p:binary_format, q:binary_format, CARRY:binary_format}
+	def run_iteration(self, block_id, previous_solutions=None):
+		return kernel.evaluate_block( self.get_block_spec( block_id ), previous_solutions['p'], previous_solutions['q'], previous_solutions[CARRY] )
 
 
 	##
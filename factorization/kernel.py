@@ -0,0 +1,170 @@
+# Set True to show debug information, or False otherwise
+DEBUG = False
+
+# String in the dictionaries labeling carry bits
+CARRY = 'carry'
+
+# The engines evaluating the candidates of a block: one candidate at a time by integer arithmetic, or 64 candidates per machine word via bit-sliced arithmetic (see module factorization.bitslice)
+ENGINE_SCALAR = 'scalar'
+ENGINE_BITSLICE = 'bitslice'
+
+
+##
+# @brief Selects the engine evaluating the candidates: the bit-sliced engine needs numpy, so the scalar engine is used if numpy is not installed
+# @param engine The requested engine: ENGINE_SCALAR or ENGINE_BITSLICE
+# @return Returns with the engine to be used
+def get_available_engine( engine ):
+	if engine == ENGINE_BITSLICE:
+		try:
+			# numpy is imported only by the bit-sliced engine
+			from factorization import bitslice
+		except ImportError:
+			return ENGINE_SCALAR
+
+	return engine
+
+
+##
+# @brief Describes a block of the multiplication table by immutable values, so the functions of the kernel do not depend on the state of a solver. (The functions of the module do not modify their arguments and share no state, thus they can be called from several threads at the same time.)
+# @param p_bit_length The bit length of p
+# @param q_bit_length The bit length of q
+# @param block_list The list of the last columns of the blocks (see method multiplication_table.get_blocks)
+# @param block_id The id = 1,2,3,... of the block
+# @param target The number to be factorized
+# @param p_known_bits Iterable of the pairs (bit index, value) of the known bits of p (for example the forced most significant bit)
+# @param q_known_bits Iterable of the pairs (bit index, value) of the known bits of q
+# @return Returns with a tuple (p_bit_length, q_bit_length, first_col, last_col, target_bits, p_known, q_known) where target_bits is the tuple of the bits of the target in the columns 0,...,last_col, and p_known, q_known are the tuples of the known bits (bit index, value) among the new bits of the block
+def get_block_spec( p_bit_length, q_bit_length, block_list, block_id, target, p_known_bits=(), q_known_bits=() ):
+	first_col = block_list[block_id-1]+1
+	last_col = block_list[block_id]
+	target_bits = tuple( (target >> col) & 1 for col in range(0, last_col+1) )
+	p_known = tuple( (bit, value) for (bit, value) in p_known_bits if first_col <= bit <= last_col )
+	q_known = tuple( (bit, value) for (bit, value) in q_known_bits if first_col <= bit <= last_col )
+	return (p_bit_length, q_bit_length, first_col, last_col, target_bits, p_known, q_known)
+
+
+##
+# @brief Gets the number of the new (not yet involved) bits of p and q in a block
+# @param spec The description of the block (see function get_block_spec)
+# @return Returns with a tuple (number of new p bits, number of new q bits)
+def get_new_bit_num( spec ):
+	(p_bit_length, q_bit_length, first_col, last_col, target_bits, p_known, q_known) = spec
+	p_bit_num = max( min(last_col, p_bit_length-1) - first_col + 1, 0 )
+	q_bit_num = max( min(last_col, q_bit_length-1) - first_col + 1, 0 )
+	return (p_bit_num, q_bit_num)
+
+
+##
+# @brief Evaluates the candidate bit assignments of a block for a partial solution one candidate at a time. The candidates contradicting the known bits are skipped.
+# @param spec The description of the block (see function get_block_spec)
+# @param p The assigned bits of p in binary format
+# @param q The assigned bits of q in binary format
+# @param carry The carry from the previous block in binary format
+# @return Returns with the list of the partial solutions including the block of form {p:binary_format, q:binary_format, CARRY:binary_format}
+def evaluate_block( spec, p, q, carry ):
+	(p_bit_length, q_bit_length, first_col, last_col, target_bits, p_known, q_known) = spec
+	(p_bit_num, q_bit_num) = get_new_bit_num( spec )
+	block_width = last_col - first_col + 1
+
+	# the pairs (i, j) of the p_i*q_j products in the columns of the block with the weights relative to the first column
+	products = list()
+	for col in range(first_col, last_col+1):
+		for p_idx in range(max(0, col-q_bit_length+1), min(col, p_bit_length-1)+1):
+			products.append( (p_idx, col-p_idx, col-first_col) )
+
+	# the column sums plus the carry should reproduce the bits of the target in the block
+	target_low = sum( target_bits[col] << (col-first_col) for col in range(first_col, last_col+1) )
+	mask = 2**block_width - 1
+	carry_in = int( carry, 2 )
+	p_low = int( p, 2 ) if len(p) > 0 else 0
+	q_low = int( q, 2 ) if len(q) > 0 else 0
+
+	# the masks and values of the known new bits
+	p_known_mask = sum( 1 << (bit-first_col) for (bit, value) in p_known )
+	p_known_value = sum( value << (bit-first_col) for (bit, value) in p_known )
+	q_known_mask = sum( 1 << (bit-first_col) for (bit, value) in q_known )
+	q_known_value = sum( value << (bit-first_col) for (bit, value) in q_known )
+
+	exact_solutions = list()
+	for p_idx in range(0, 2**p_bit_num):
+		if p_idx & p_known_mask != p_known_value:
+			continue
+		p_val = p_low | (p_idx << first_col)
+		p_bin = ('{0:0'+str(p_bit_num)+'b}').format(p_idx) if p_bit_num > 0 else ''
+
+		for q_idx in range(0, 2**q_bit_num):
+			if q_idx & q_known_mask != q_known_value:
+				continue
+			q_val = q_low | (q_idx << first_col)
+
+			accumulated = carry_in
+			for (i, j, weight) in products:
+				accumulated = accumulated + ((((p_val >> i) & (q_val >> j)) & 1) << weight)
+
+			if accumulated & mask == target_low:
+				q_bin = ('{0:0'+str(q_bit_num)+'b}').format(q_idx) if q_bit_num > 0 else ''
+				exact_solutions.append( {'p': p_bin + p, 'q': q_bin + q, CARRY: '{0:b}'.format( accumulated >> block_width )} )
+
+	return exact_solutions
+
+
+##
+# @brief Discards the partial solutions whose interval bounds of p*q exclude the target (see method iterative_factorization.prune_solutions)
+# @param solutions The list of the partial solutions with the same number of assigned bits
+# @param bounds Tuple (target, p_known, p_free, q_known, q_free, symmetric): the sums of the known bits and of the weights of the unknown bits above the assigned bits of p and q, and True if the solutions with p > q should be discarded
+# @return Returns with the list of the kept partial solutions
+def prune_solutions( solutions, bounds ):
+	(target, p_known, p_free, q_known, q_free, symmetric) = bounds
+
+	kept_solutions = list()
+	for solution in solutions:
+		p_min = int( solution['p'], 2 ) + p_known
+		q_min = int( solution['q'], 2 ) + q_known
+		p_max = p_min + p_free
+		q_max = q_min + q_free
+
+		if p_min*q_min > target or p_max*q_max < target:
+			continue
+		if symmetric and p_min > q_max:
+			continue
+
+		kept_solutions.append( solution )
+
+	return kept_solutions
+
+
+##
+# @brief Expands a list of partial solutions over a block
+# @param spec The description of the block (see function get_block_spec)
+# @param previous_solutions The list of the partial solutions of the previous blocks of form {p:binary_format, q:binary_format, CARRY:binary_format}
+# @param engine The engine evaluating the candidates: ENGINE_SCALAR or ENGINE_BITSLICE
+# @param bounds The bounds to prune the new partial solutions (see function prune_solutions), or None to keep all of them
+# @return Returns with the list of the partial solutions including the block
+def expand_block( spec, previous_solutions, engine=ENGINE_SCALAR, bounds=None ):
+	if engine == ENGINE_BITSLICE:
+		# numpy is imported only by the bit-sliced engine
+		from factorization import bitslice
+		(p_bit_length, q_bit_length, first_col, last_col, target_bits, p_known, q_known) = spec
+		exact_solutions = bitslice.expand_block( p_bit_length, q_bit_length, first_col, last_col, target_bits, previous_solutions, p_known, q_known )
+	elif engine == ENGINE_SCALAR:
+		exact_solutions = list()
+		for solution in previous_solutions:
+			exact_solutions.extend( evaluate_block( spec, solution['p'], solution['q'], solution[CARRY] ) )
+	else:
+		raise Exception('Unknown engine ' + str(engine))
+
+	if bounds is not None:
+		exact_solutions = prune_solutions( exact_solutions, bounds )
+
+	if DEBUG:
+		print('Block ' + str(spec[2:4]) + ' expanded from ' + str(len(previous_solutions)) + ' to ' + str(len(exact_solutions)) + ' partial solutions')
+
+	return exact_solutions
+
+
+##
+# @brief Expands a chunk of partial solutions over a block (the entry point of the worker processes and threads)
+# @param args Tuple of (spec, list of the partial solutions, engine, bounds) (see function expand_block)
+# @return Returns with the list of the partial solutions including the block
+def expand_chunk( args ):
+	return expand_block( *args )
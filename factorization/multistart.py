@@ -0,0 +1,181 @@
+from compose_BQM.sparse import sparse_BQM
+from factorization.budget import budget, STATUS_COMPLETE
+from factorization import samplers
+
+import multiprocessing
+from multiprocessing import shared_memory
+import numpy as np
+import time
+
+# Set True to show debug information, or False otherwise
+DEBUG = False
+
+# The state of the worker processes: the QUBO, the sampler and the data of the decoding
+_worker_state = None
+
+
+##
+# @brief Initializes a worker process: attaches the shared arrays of the QUBO and builds the QUBO dictionary once
+# @param shared_arrays A dictionary {name: (shared memory name, shape, dtype)} of the arrays 'rows', 'cols' and 'coeffs', or None for the arrays given in parameter arrays
+# @param arrays A dictionary of the arrays not stored in shared memory (coefficients of arbitrary precision)
+# @param meta A dictionary of the variable labels, the sampler and the decoding data
+def _init_worker( shared_arrays, arrays, meta ):
+	global _worker_state
+
+	arrays = dict( arrays )
+	for name, (shm_name, shape, dtype) in shared_arrays.items():
+		shm = shared_memory.SharedMemory( name=shm_name )
+		arrays[name] = np.ndarray( shape, dtype=dtype, buffer=shm.buf ).copy()
+		shm.close()
+
+	variables = meta['variables']
+	Q = dict()
+	for (row, col, coeff) in zip( arrays['rows'].tolist(), arrays['cols'].tolist(), arrays['coeffs'].tolist() ):
+		Q[(variables[row], variables[col])] = coeff
+
+	_worker_state = dict( meta )
+	_worker_state['Q'] = Q
+	_worker_state['sampler'] = samplers.get_sampler( meta['sampler'] )
+
+
+##
+# @brief Decodes an integer from a sample
+# @param sample A dictionary (or mapping) of (variable label: value) pairs
+# @param known_value The value of the known bits
+# @param unknown_bits A list of (bit, variable label) tuples
+# @return Returns with the decoded integer
+def _decode( sample, known_value, unknown_bits ):
+	value = known_value
+	for (bit, label) in unknown_bits:
+		if label in sample and sample[label]:
+			value = value + 2**bit
+
+	return value
+
+
+##
+# @brief Runs one sampler invocation with a given seed in a worker process and verifies the samples
+# @param seed The seed of the sampler
+# @return Returns with a tuple (seed, factors) where factors is a tuple (p, q) of a verified factorization, or None
+def _sample_worker( seed ):
+	state = _worker_state
+	sampler_kwargs = dict( state['sampler_kwargs'] )
+	if state['seed_kwarg'] is not None:
+		sampler_kwargs[state['seed_kwarg']] = seed
+
+	response = state['sampler'].sample_qubo( state['Q'], **sampler_kwargs )
+	for sample in response.samples():
+		p = _decode( sample, *state['p'] )
+		q = _decode( sample, *state['q'] )
+		if p > 1 and q > 1 and p*q == state['target']:
+			return (seed, (p, q))
+
+	return (seed, None)
+
+
+##
+# @brief Class to fan out the sampling of a BQM cost function over a process pool with distinct seeds. The QUBO is shared with the workers via shared memory, and all the workers are cancelled as soon as one of them returns a verified factorization.
+class multistart_sampler():
+
+	##
+	# @brief Constructor of the class.
+	# @param cBQM An instance of class compose_BQM.compose_BQM.BQM_from_multiplication_table (or of a derived class) providing the bits of p and q
+	# @param target The number to be factorized (integer)
+	# @param cost_function The cost function given by a (dict, constant) tuple (optional). For None method cBQM.get_cost_function is used.
+	# @param sampler The name of the sampler (see factorization.samplers.get_sampler_names). It is resolved in each worker process.
+	# @param workers The number of the worker processes (for None the number of the CPU cores)
+	# @param seed_kwarg The name of the keyword argument of the sampler receiving the seed (None if the sampler has no seed)
+	# @param sampler_kwargs Keyword arguments passed to the sample_qubo method of the sampler
+	def __init__( self, cBQM, target, cost_function=None, sampler='tabu', workers=None, seed_kwarg='seed', **sampler_kwargs ):
+		if cost_function is None:
+			cost_function = cBQM.get_cost_function()
+
+		## The sparse form of the cost function
+		self.sparse = sparse_BQM( cost_function[0], cost_function[1] )
+		## The number to be factorized
+		self.target = target
+		## The number of the worker processes
+		self.workers = workers if workers is not None else multiprocessing.cpu_count()
+
+		# the known bits and the labels of the unknown bits of p and q
+		decode_data = list()
+		for num in cBQM.get_abstract_nums():
+			bit_labels = num.get_bit_labels()
+			known_value = 0
+			unknown_bits = list()
+			for bit in range(0, num.bit_length()):
+				if num.check_bit( bit ):
+					known_value = known_value + num.get_bit( bit )*2**bit
+				else:
+					unknown_bits.append( (bit, bit_labels[bit]) )
+			decode_data.append( (known_value, unknown_bits) )
+
+		self._meta = {'variables': self.sparse.variables, 'sampler': sampler, 'sampler_kwargs': sampler_kwargs, 'seed_kwarg': seed_kwarg, 'target': target, 'p': decode_data[0], 'q': decode_data[1]}
+		# The statistics of the last run
+		self._stats = dict()
+
+
+	##
+	# @brief Runs the sampler invocations until a verified factorization is found
+	# @param num_starts The number of the sampler invocations
+	# @param seed The seed of the first invocation (the invocations get the seeds seed, seed+1, ...)
+	# @param run_budget The budget of the run (an instance of class factorization.budget.budget, optional). Only the deadline is used.
+	# @return Returns with a tuple (p, q) of the factors, or None if no factorization was found
+	def run( self, num_starts=16, seed=0, run_budget=None ):
+		if run_budget is None:
+			run_budget = budget()
+
+		start_time = time.time()
+		self._stats = {'starts': 0, 'seed': None, 'status': STATUS_COMPLETE}
+
+		# the arrays of fixed size types are shared via shared memory, the arbitrary precision coefficients are pickled once for each worker
+		shms = list()
+		shared_arrays = dict()
+		arrays = dict()
+		try:
+			for name in ('rows', 'cols', 'coeffs'):
+				array = getattr( self.sparse, name )
+				if array.dtype == object:
+					arrays[name] = array
+					continue
+				shm = shared_memory.SharedMemory( create=True, size=max(array.nbytes, 1) )
+				np.ndarray( array.shape, dtype=array.dtype, buffer=shm.buf )[:] = array
+				shms.append( shm )
+				shared_arrays[name] = (shm.name, array.shape, array.dtype.str)
+
+			factors = None
+			with multiprocessing.Pool( self.workers, initializer=_init_worker, initargs=(shared_arrays, arrays, self._meta) ) as pool:
+				results = pool.imap_unordered( _sample_worker, range(seed, seed+num_starts) )
+				for start_idx in range(0, num_starts):
+					try:
+						(start_seed, start_factors) = results.next( timeout=run_budget.get_remaining_time() )
+					except multiprocessing.TimeoutError:
+						self._stats['status'] = run_budget.check()
+						break
+
+					self._stats['starts'] = self._stats['starts'] + 1
+					if start_factors is not None:
+						factors = start_factors
+						self._stats['seed'] = start_seed
+						break
+
+				# cancel the remaining invocations
+				pool.terminate()
+		finally:
+			for shm in shms:
+				shm.close()
+				shm.unlink()
+
+		self._stats['time'] = time.time() - start_time
+		if DEBUG:
+			print('Multi-start sampling: ' + str(self._stats))
+
+		return factors
+
+
+	##
+	# @brief Gets the statistics of the last run
+	# @return Returns with a dictionary {'starts', 'seed', 'status', 'time'}, where seed is the seed of the invocation finding the factors
+	def get_stats( self ):
+		return self._stats
+
@@ -0,0 +1,191 @@
+from math import gcd, isqrt
+import time
+
+# Set True to show debug information, or False otherwise
+DEBUG = False
+
+# The stages of the pre-screening
+STAGE_TRIAL_DIVISION = 'trial_division'
+STAGE_FERMAT = 'fermat'
+STAGE_POLLARD_RHO = 'pollard_rho'
+# The stage of the targets proven to be primes by the trial division
+STAGE_PRIME = 'prime'
+
+# The number of the steps of the Pollard rho method between two gcd evaluations
+RHO_GCD_INTERVAL = 128
+
+
+##
+# @brief Creates the table of the primes by the sieve of Eratosthenes
+# @param bound The upper bound of the primes
+# @return Returns with the list of the primes less than or equal to the bound
+def get_prime_table( bound ):
+	if bound < 2:
+		return list()
+
+	sieve = bytearray( [1] ) * (bound+1)
+	sieve[0] = 0
+	sieve[1] = 0
+	for prime in range(2, isqrt(bound)+1):
+		if sieve[prime]:
+			sieve[prime*prime::prime] = bytearray( len(range(prime*prime, bound+1, prime)) )
+
+	return [prime for prime in range(2, bound+1) if sieve[prime]]
+
+
+##
+# @brief Class to pre-screen the targets by cheap classical methods before composing the multiplication table: trial division by a precomputed table of small primes, the Fermat method for factors close to the square root and the Pollard rho method for a further small factor. Each method is bounded by its own budget, so a target passing the pre-screening costs a predictable amount of time.
+class prescreener():
+
+	##
+	# @brief Constructor of the class.
+	# @param trial_bound The upper bound of the primes of the trial division (0 to skip the trial division)
+	# @param fermat_iterations The maximal number of the iterations of the Fermat method (0 to skip the Fermat method)
+	# @param rho_iterations The maximal number of the iterations of the Pollard rho method (0 to skip the Pollard rho method)
+	def __init__( self, trial_bound=2**16, fermat_iterations=2**12, rho_iterations=2**14 ):
+		## The upper bound of the primes of the trial division
+		self.trial_bound = trial_bound
+		## The maximal number of the iterations of the Fermat method
+		self.fermat_iterations = fermat_iterations
+		## The maximal number of the iterations of the Pollard rho method
+		self.rho_iterations = rho_iterations
+		# The table of the primes of the trial division (created at the first use)
+		self._primes = None
+		# The statistics of the pre-screening
+		self._stats = {'jobs': 0, 'short_circuited': 0, STAGE_TRIAL_DIVISION: 0, STAGE_FERMAT: 0, STAGE_POLLARD_RHO: 0, 'primes': 0, 'time': 0.0}
+
+
+	##
+	# @brief Pre-screens a target
+	# @param n The number to be factorized
+	# @return Returns with a tuple (sorted list [q, p] of nontrivial factors, stage) if one of the methods found the factors, a tuple (None, STAGE_PRIME) if the target is proven to be a prime, or None otherwise
+	def screen( self, n ):
+		start_time = time.time()
+		self._stats['jobs'] = self._stats['jobs'] + 1
+
+		found = None
+		for (stage, method) in ((STAGE_TRIAL_DIVISION, self.trial_division), (STAGE_FERMAT, self.fermat), (STAGE_POLLARD_RHO, self.pollard_rho)):
+			factor = method( n )
+			if factor is None:
+				continue
+			if factor == n:
+				# the trial division proved the target to be a prime
+				found = (None, STAGE_PRIME)
+				self._stats['primes'] = self._stats['primes'] + 1
+				break
+
+			found = (sorted( [factor, n//factor] ), stage)
+			self._stats[stage] = self._stats[stage] + 1
+			self._stats['short_circuited'] = self._stats['short_circuited'] + 1
+			break
+
+		self._stats['time'] = self._stats['time'] + time.time() - start_time
+
+		if DEBUG:
+			print('Pre-screening of ' + str(n) + ': ' + str(found))
+
+		return found
+
+
+	##
+	# @brief Divides the target by the primes of the prime table
+	# @param n The number to be factorized
+	# @return Returns with the smallest prime factor, n itself if the target is proven to be a prime, or None if no factor was found
+	def trial_division( self, n ):
+		if self._primes is None:
+			self._primes = get_prime_table( self.trial_bound )
+
+		for prime in self._primes:
+			if prime*prime > n:
+				return n if n > 1 else None
+			if n % prime == 0:
+				return prime
+
+		return None
+
+
+	##
+	# @brief Searches for factors close to the square root of the target by the Fermat method (n = a^2 - b^2)
+	# @param n The (odd) number to be factorized
+	# @return Returns with a nontrivial factor, or None if no factor was found within the budget
+	def fermat( self, n ):
+		a = isqrt( n )
+		if a*a < n:
+			a = a + 1
+
+		for idx in range(0, self.fermat_iterations):
+			b2 = a*a - n
+			b = isqrt( b2 )
+			if b*b == b2:
+				return a-b if a-b > 1 else None
+			a = a + 1
+
+		return None
+
+
+	##
+	# @brief Searches for a small factor by the Pollard rho method (with the cycle detection of Brent and the gcd of the accumulated products)
+	# @param n The number to be factorized
+	# @return Returns with a nontrivial factor, or None if no factor was found within the budget
+	def pollard_rho( self, n ):
+		if n < 4:
+			return None
+
+		iterations = 0
+		increment = 1
+		while iterations < self.rho_iterations:
+			# the polynomial x^2 + increment is iterated from x = 2
+			y = 2
+			cycle_length = 1
+			product = 1
+			divisor = 1
+			while divisor == 1 and iterations < self.rho_iterations:
+				x = y
+				for idx in range(0, cycle_length):
+					y = (y*y + increment) % n
+				iterations = iterations + cycle_length
+
+				steps = 0
+				while steps < cycle_length and divisor == 1:
+					saved_y = y
+					for idx in range(0, min(RHO_GCD_INTERVAL, cycle_length-steps)):
+						y = (y*y + increment) % n
+						product = product * abs(x-y) % n
+					divisor = gcd( product, n )
+					steps = steps + RHO_GCD_INTERVAL
+				iterations = iterations + min(steps, cycle_length)
+				cycle_length = 2*cycle_length
+
+			if divisor == n:
+				# the accumulated product collapsed, the steps since the last gcd are repeated one by one
+				divisor = 1
+				while divisor == 1:
+					saved_y = (saved_y*saved_y + increment) % n
+					divisor = gcd( abs(x-saved_y), n )
+
+			if 1 < divisor < n:
+				return divisor
+
+			# the sequence closed a cycle modulo n, another polynomial is tried
+			increment = increment + 1
+
+		return None
+
+
+	##
+	# @brief Gets the statistics of the pre-screening
+	# @return Returns with a dictionary {'jobs', 'short_circuited', STAGE_TRIAL_DIVISION, STAGE_FERMAT, STAGE_POLLARD_RHO, 'primes', 'time'} where the stages count the targets factored by them, and primes counts the targets proven to be primes by the trial division
+	def get_stats( self ):
+		return dict( self._stats )
+
+
+	##
+	# @brief Resets the statistics
+	def clear( self ):
+		for key in self._stats.keys():
+			self._stats[key] = 0
+		self._stats['time'] = 0.0
+
+
+## The default pre-screener of the targets
+default_prescreener = prescreener()
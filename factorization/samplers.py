@@ -0,0 +1,91 @@
+import importlib
+import importlib.util
+
+# Set True to show debug information, or False otherwise
+DEBUG = False
+
+
+##
+# @brief Creates an embedding composite sampler of a D-Wave system (imported only when requested)
+# @param kwargs Keyword arguments passed to the constructor of dwave.system.samplers.DWaveSampler
+# @return Returns with the instance of the composite sampler
+def _dwave_embedding_sampler( **kwargs ):
+	samplers = importlib.import_module( 'dwave.system.samplers' )
+	composites = importlib.import_module( 'dwave.system.composites' )
+	return composites.EmbeddingComposite( samplers.DWaveSampler( **kwargs ) )
+
+
+# The registered samplers: name -> (module name, attribute name) of the sampler class, or a factory function
+_samplers = {
+	'qbsolv': ('dwave_qbsolv', 'QBSolv'),
+	'neal': ('neal', 'SimulatedAnnealingSampler'),
+	'exact': ('dimod', 'ExactSolver'),
+	'dwave': _dwave_embedding_sampler,
+	'tabu': ('compose_BQM.local_search', 'tabu_sampler'),
+}
+
+# The modules required by the samplers given by factory functions
+_factory_modules = {
+	'dwave': 'dwave.system',
+}
+
+
+##
+# @brief Registers a sampler backend. The module of the backend is imported only when the sampler is requested.
+# @param name The name of the sampler
+# @param backend A tuple of (module name, attribute name) of the sampler class, or a factory function returning the sampler instance
+def register_sampler( name, backend ):
+	_samplers[name] = backend
+
+
+##
+# @brief Gets the names of the registered samplers
+# @param available Set True to list only the samplers whose module can be found (the modules are not imported)
+# @return Returns with a list of the names of the samplers
+def get_sampler_names( available=False ):
+	names = list()
+	for name, backend in _samplers.items():
+		if available:
+			if isinstance( backend, tuple ):
+				module_name = backend[0]
+			else:
+				module_name = _factory_modules.get( name )
+
+			try:
+				if module_name is not None and importlib.util.find_spec( module_name ) is None:
+					continue
+			except ModuleNotFoundError:
+				continue
+
+		names.append( name )
+
+	return names
+
+
+##
+# @brief Resolves a sampler by its name. The module of the sampler is imported at the first request.
+# @param name The name of the sampler (see method get_sampler_names), or a sampler instance which is returned unchanged
+# @param kwargs Keyword arguments passed to the constructor of the sampler
+# @return Returns with the instance of the sampler
+def get_sampler( name, **kwargs ):
+	if not isinstance( name, str ):
+		return name
+
+	if name not in _samplers.keys():
+		raise Exception('Unknown sampler ' + name + '. The registered samplers are: ' + str(get_sampler_names()))
+
+	backend = _samplers[name]
+	if not isinstance( backend, tuple ):
+		return backend( **kwargs )
+
+	(module_name, attribute_name) = backend
+	try:
+		module = importlib.import_module( module_name )
+	except ImportError as err:
+		raise ImportError('The sampler ' + name + ' requires the optional package ' + module_name + ' to be installed.') from err
+
+	if DEBUG:
+		print('Sampler ' + name + ' loaded from ' + module_name)
+
+	return getattr( module, attribute_name )( **kwargs )
+
@@ -0,0 +1,374 @@
+from factorization.factor import factor, METHOD_ITERATIVE, METHOD_BQM, METHOD_DECOMPOSITION, STATUS_FACTORED, STATUS_ERROR
+from factorization.distributed import parse_address
+
+from collections import OrderedDict, deque
+import argparse
+import asyncio
+import concurrent.futures
+import json
+import multiprocessing
+import socket
+import statistics
+import sys
+import time
+
+# Set True to show debug information, or False otherwise
+DEBUG = False
+
+# The options of function factorization.factor.factor accepted in the jobs
+JOB_OPTIONS = ('method', 'p_bits', 'q_bits', 'block_size', 'adaptive', 'prune', 'engine', 'time_limit', 'max_frontier', 'max_rss', 'split_block', 'num_starts', 'cache', 'prescreen', 'sampler')
+
+# The number of the latest latencies kept for the percentiles
+LATENCY_WINDOW = 10000
+
+
+##
+# @brief Factorizes a batch of targets of the same shape in a worker process. The targets of a batch share the composition work through the caches of the process (the BQM templates, and the unpruned frontiers of the iterative method if the option "cache" is set, see function shares_work).
+# @param targets The list of the numbers to be factorized
+# @param options The dictionary of the options passed to function factorization.factor.factor
+# @return Returns with the list of the results (see function factorization.factor.factor)
+def _factor_batch( targets, options ):
+	results = list()
+	for target in targets:
+		try:
+			results.append( factor( target, **options ) )
+		except Exception as err:
+			results.append( {'n': target, 'status': STATUS_ERROR, 'error': str(err)} )
+
+	return results
+
+
+##
+# @brief Completes the options of a job by the defaults determining the shape of the job
+# @param n The number to be factorized
+# @param options The dictionary of the options of the job (see JOB_OPTIONS)
+# @return Returns with a tuple (dictionary of the completed options, key of the shape) where the jobs of the same key can be batched and coalesced
+def get_shape( n, options ):
+	shape_options = dict( options )
+	shape_options.setdefault( 'method', METHOD_ITERATIVE )
+	shape_options.setdefault( 'p_bits', (n.bit_length()+1) // 2 )
+	shape_options.setdefault( 'q_bits', (n.bit_length()+1) // 2 )
+	return (shape_options, json.dumps( shape_options, sort_keys=True ))
+
+
+##
+# @brief Determines whether the jobs of a shape share work through the caches of a worker process
+# @param shape_options The dictionary of the completed options of the jobs (see function get_shape)
+# @return Returns with True if the BQM template or the frontiers of the iterative method are shared, False otherwise
+def shares_work( shape_options ):
+	if shape_options['method'] in (METHOD_BQM, METHOD_DECOMPOSITION):
+		return True
+
+	# the pruned frontiers are shared only by the runs of the same target, which are coalesced anyway
+	return shape_options['method'] == METHOD_ITERATIVE and bool( shape_options.get( 'cache' ) ) and not shape_options.get( 'prune', True )
+
+
+##
+# @brief Class of a long-running local factoring service. The jobs are received over a TCP or Unix socket in JSON lines format, the queued jobs of the same shape (method, bit lengths and options) sharing composition work are batched (see function shares_work), the batches and the other jobs run in parallel on a process pool, and the factored results are memoized by the target. Concurrent jobs of the same target and shape run once. A memoized result is served to the jobs of any shape, since only the factored results are memoized (a failed run with one shape says nothing about another shape).
+# @description A job is a line {"n": number, "id": optional identifier, "options": {option: value}} answered by the result line of function factorization.factor.factor completed by the id and by the key "cached". The line {"command": "metrics"} is answered by the metrics of the service (see method get_metrics).
+class factoring_service():
+
+	##
+	# @brief Constructor of the class.
+	# @param address The address (host, port) of a TCP socket, or the path of a Unix socket. (For port 0 a free port is chosen, see attribute address after method start.)
+	# @param workers The number of the worker processes (for None the number of the CPU cores)
+	# @param batch_window The time in seconds to collect the jobs of a batch after the first queued job
+	# @param max_batch The maximal number of the jobs in a batch
+	# @param cache_size The maximal number of the memoized results
+	def __init__( self, address=('localhost', 0), workers=None, batch_window=0.01, max_batch=64, cache_size=2**16 ):
+		## The address of the service
+		self.address = address
+		## The number of the worker processes
+		self.workers = workers
+		## The time to collect the jobs of a batch
+		self.batch_window = batch_window
+		## The maximal number of the jobs in a batch
+		self.max_batch = max_batch
+		## The maximal number of the memoized results
+		self.cache_size = cache_size
+		# The memoized factored results {n: result} in LRU order
+		self._results = OrderedDict()
+		# The futures of the queued and running jobs {(n, shape key): future}, so concurrent jobs of the same target and shape run once
+		self._inflight = dict()
+		# The queue of the jobs (n, shape options, shape key, future)
+		self._queue = None
+		# The latencies of the latest jobs in seconds
+		self._latencies = deque( maxlen=LATENCY_WINDOW )
+		# The counters of the service
+		self._stats = {'jobs': 0, 'completed': 0, 'errors': 0, 'cache_hits': 0, 'cache_misses': 0, 'coalesced': 0, 'batches': 0, 'batched_jobs': 0, 'running_batches': 0, 'prescreened': 0}
+		# The server, the process pool and the task of the batcher
+		self._server = None
+		self._executor = None
+		self._batcher = None
+
+
+	##
+	# @brief Starts the server, the process pool and the batcher
+	async def start( self ):
+		self._queue = asyncio.Queue()
+		# the workers are spawned, since forking the threads of the event loop might deadlock them
+		self._executor = concurrent.futures.ProcessPoolExecutor( self.workers, mp_context=multiprocessing.get_context( 'spawn' ) )
+
+		if isinstance( self.address, str ):
+			self._server = await asyncio.start_unix_server( self._handle_client, path=self.address )
+		else:
+			self._server = await asyncio.start_server( self._handle_client, self.address[0], self.address[1] )
+			self.address = self._server.sockets[0].getsockname()[:2]
+
+		self._batcher = asyncio.get_running_loop().create_task( self._run_batches() )
+
+		if DEBUG:
+			print('Factoring service listening on ' + str(self.address))
+
+
+	##
+	# @brief Serves the clients until the service is closed
+	async def serve_forever( self ):
+		if self._server is None:
+			await self.start()
+
+		try:
+			await self._server.serve_forever()
+		except asyncio.CancelledError:
+			pass
+
+
+	##
+	# @brief Stops the server, the batcher and the process pool
+	async def close( self ):
+		if self._server is not None:
+			self._server.close()
+			await self._server.wait_closed()
+		if self._batcher is not None:
+			self._batcher.cancel()
+		if self._executor is not None:
+			self._executor.shutdown( wait=False, cancel_futures=True )
+
+
+	##
+	# @brief Serves the lines of a client
+	# @param reader The stream reader of the connection
+	# @param writer The stream writer of the connection
+	async def _handle_client( self, reader, writer ):
+		# the jobs of a connection are processed concurrently, the responses are written as they are finished
+		tasks = set()
+		try:
+			while True:
+				line = await reader.readline()
+				if len( line ) == 0:
+					break
+				if len( line.strip() ) == 0:
+					continue
+
+				task = asyncio.get_running_loop().create_task( self._respond( line, writer ) )
+				tasks.add( task )
+				task.add_done_callback( tasks.discard )
+
+			if len( tasks ) > 0:
+				await asyncio.gather( *tasks )
+		finally:
+			writer.close()
+
+
+	##
+	# @brief Answers a line of a client
+	# @param line The received line
+	# @param writer The stream writer of the connection
+	async def _respond( self, line, writer ):
+		message = dict()
+		try:
+			message = json.loads( line )
+			if message.get( 'command' ) == 'metrics':
+				response = self.get_metrics()
+			else:
+				response = await self.submit( int( message['n'] ), message.get( 'options', dict() ) )
+		except Exception as err:
+			response = {'n': message.get( 'n' ), 'status': STATUS_ERROR, 'error': str(err)}
+
+		if 'id' in message:
+			response['id'] = message['id']
+
+		writer.write( (json.dumps( response ) + '\n').encode() )
+		await writer.drain()
+
+
+	##
+	# @brief Submits a factoring job
+	# @param n The number to be factorized
+	# @param options The dictionary of the options passed to function factorization.factor.factor (see JOB_OPTIONS)
+	# @return Returns with the result of the job (see function factorization.factor.factor) completed by the key "cached"
+	async def submit( self, n, options=None ):
+		start_time = time.monotonic()
+		self._stats['jobs'] = self._stats['jobs'] + 1
+
+		options = dict( options or dict() )
+		for key in options.keys():
+			if key not in JOB_OPTIONS:
+				raise Exception('Unknown option ' + str(key))
+
+		if n in self._results:
+			self._stats['cache_hits'] = self._stats['cache_hits'] + 1
+			self._results.move_to_end( n )
+			result = dict( self._results[n] )
+			result['cached'] = True
+		else:
+			(shape_options, key) = get_shape( n, options )
+			if (n, key) in self._inflight:
+				self._stats['coalesced'] = self._stats['coalesced'] + 1
+				future = self._inflight[(n, key)]
+			else:
+				self._stats['cache_misses'] = self._stats['cache_misses'] + 1
+				future = asyncio.get_running_loop().create_future()
+				self._inflight[(n, key)] = future
+				await self._queue.put( (n, shape_options, key, future) )
+
+			result = dict( await asyncio.shield( future ) )
+			result['cached'] = False
+
+		self._latencies.append( time.monotonic() - start_time )
+		return result
+
+
+	##
+	# @brief Collects the queued jobs into batches of the same shape and starts them on the process pool
+	async def _run_batches( self ):
+		loop = asyncio.get_running_loop()
+		while True:
+			jobs = [await self._queue.get()]
+			deadline = loop.time() + self.batch_window
+			while len( jobs ) < self.max_batch:
+				timeout = deadline - loop.time()
+				if timeout <= 0:
+					break
+				try:
+					jobs.append( await asyncio.wait_for( self._queue.get(), timeout ) )
+				except asyncio.TimeoutError:
+					break
+
+			# the jobs of the same shape sharing the composition work run in the same worker process, the others run in parallel
+			batches = dict()
+			for (n, shape_options, key, future) in jobs:
+				batch_key = key if shares_work( shape_options ) else (key, n)
+				batches.setdefault( batch_key, (shape_options, key, list()) )[2].append( (n, future) )
+
+			for (shape_options, key, batch_jobs) in batches.values():
+				self._stats['batches'] = self._stats['batches'] + 1
+				self._stats['batched_jobs'] = self._stats['batched_jobs'] + len( batch_jobs )
+				loop.create_task( self._run_batch( shape_options, key, batch_jobs ) )
+
+
+	##
+	# @brief Runs a batch of jobs on the process pool and completes their futures
+	# @param options The dictionary of the options of the batch
+	# @param key The key of the shape of the batch (see function get_shape)
+	# @param jobs The list of the jobs (n, future)
+	async def _run_batch( self, options, key, jobs ):
+		self._stats['running_batches'] = self._stats['running_batches'] + 1
+		targets = [n for (n, future) in jobs]
+		try:
+			results = await asyncio.get_running_loop().run_in_executor( self._executor, _factor_batch, targets, options )
+		except Exception as err:
+			results = [{'n': n, 'status': STATUS_ERROR, 'error': str(err)} for n in targets]
+		finally:
+			self._stats['running_batches'] = self._stats['running_batches'] - 1
+
+		for ((n, future), result) in zip( jobs, results ):
+			self._inflight.pop( (n, key), None )
+			if result['status'] == STATUS_FACTORED:
+				if 'prescreen' in result:
+					self._stats['prescreened'] = self._stats['prescreened'] + 1
+				self._results[n] = result
+				while len( self._results ) > self.cache_size:
+					self._results.popitem( last=False )
+			elif result['status'] == STATUS_ERROR:
+				self._stats['errors'] = self._stats['errors'] + 1
+
+			self._stats['completed'] = self._stats['completed'] + 1
+			if not future.done():
+				future.set_result( result )
+
+
+	##
+	# @brief Gets the metrics of the service
+	# @return Returns with a dictionary of the counters, the queue depth, the number of the jobs in progress, the number of the memoized results, the mean batch size and the percentiles of the latencies in seconds {'p50', 'p90', 'p99', 'max'}
+	def get_metrics( self ):
+		metrics = dict( self._stats )
+		metrics['queue_depth'] = self._queue.qsize() if self._queue is not None else 0
+		metrics['inflight'] = len( self._inflight )
+		metrics['cached_results'] = len( self._results )
+		metrics['mean_batch_size'] = self._stats['batched_jobs'] / self._stats['batches'] if self._stats['batches'] > 0 else 0
+
+		latencies = sorted( self._latencies )
+		if len( latencies ) > 0:
+			# the percentiles are interpolated linearly between the latencies
+			percentiles = statistics.quantiles( latencies, n=100, method='inclusive' ) if len( latencies ) > 1 else latencies*99
+			metrics['latency'] = {'p50': percentiles[49], 'p90': percentiles[89], 'p99': percentiles[98], 'max': latencies[-1]}
+		else:
+			metrics['latency'] = None
+
+		return metrics
+
+
+##
+# @brief Sends messages to a factoring service and waits for the responses (the responses of the jobs might arrive in a different order, see the key "id")
+# @param address The address (host, port) of a TCP socket, or the path of a Unix socket
+# @param messages The list of the messages (dictionaries, see class factoring_service)
+# @return Returns with the list of the responses
+def request( address, messages ):
+	if isinstance( address, str ):
+		conn = socket.socket( socket.AF_UNIX, socket.SOCK_STREAM )
+	else:
+		conn = socket.socket( socket.AF_INET, socket.SOCK_STREAM )
+	conn.connect( address )
+
+	with conn, conn.makefile( 'rw' ) as stream:
+		for message in messages:
+			stream.write( json.dumps( message ) + '\n' )
+		stream.flush()
+		conn.shutdown( socket.SHUT_WR )
+
+		return [json.loads( line ) for line in stream if len( line.strip() ) > 0]
+
+
+##
+# @brief Command line entry point: python -m factorization.service {serve,submit,metrics} ...
+# @param argv The list of the command line arguments (for None sys.argv is used)
+def main( argv=None ):
+	parser = argparse.ArgumentParser( prog='python -m factorization.service', description='Local factoring job service.' )
+	parser.add_argument( '-a', '--address', default='localhost:8765', help='address of the service: host:port or the path of a Unix socket' )
+	subparsers = parser.add_subparsers( dest='command', required=True )
+
+	serve_parser = subparsers.add_parser( 'serve', help='run the service' )
+	serve_parser.add_argument( '-w', '--workers', type=int, help='number of the worker processes' )
+	serve_parser.add_argument( '--batch-window', type=float, default=0.01, help='time in seconds to collect the jobs of a batch' )
+	serve_parser.add_argument( '--max-batch', type=int, default=64 )
+
+	submit_parser = subparsers.add_parser( 'submit', help='submit factoring jobs' )
+	submit_parser.add_argument( 'targets', nargs='+', type=int, help='the numbers to be factorized' )
+	submit_parser.add_argument( '-m', '--method', default=METHOD_ITERATIVE )
+	submit_parser.add_argument( '-b', '--block-size', type=int, default=5 )
+	submit_parser.add_argument( '-t', '--time-limit', type=float )
+
+	subparsers.add_parser( 'metrics', help='print the metrics of the service' )
+
+	args = parser.parse_args( argv )
+	address = parse_address( args.address ) if ':' in args.address else args.address
+
+	if args.command == 'serve':
+		service = factoring_service( address, args.workers, args.batch_window, args.max_batch )
+		try:
+			asyncio.run( service.serve_forever() )
+		except KeyboardInterrupt:
+			pass
+	elif args.command == 'submit':
+		options = {'method': args.method, 'block_size': args.block_size, 'time_limit': args.time_limit}
+		for response in request( address, [{'id': idx, 'n': target, 'options': options} for idx, target in enumerate(args.targets)] ):
+			print( json.dumps( response ) )
+	else:
+		print( json.dumps( request( address, [{'command': 'metrics'}] )[0] ) )
+
+	return 0
+
+
+if __name__ == '__main__':
+	sys.exit( main() )
@@ -0,0 +1,180 @@
+from factorization.factor import factor, METHOD_ITERATIVE, STATUS_FACTORED, STATUS_NOT_FOUND, STATUS_ERROR
+from factorization.budget import budget
+from factorization.prescreen import default_prescreener
+
+import argparse
+import json
+import multiprocessing
+import sys
+import time
+
+# Set True to show debug information, or False otherwise
+DEBUG = False
+
+
+##
+# @brief Factorizes a number for a given split of the bit lengths in a worker process
+# @param args Tuple of (n, bit length of p, bit length of q, dictionary of the keyword arguments of function factorization.factor.factor)
+# @return Returns with the result of function factorization.factor.factor
+def _run_split( args ):
+	(n, p_bits, q_bits, kwargs) = args
+	try:
+		return factor( n, p_bits=p_bits, q_bits=q_bits, force_msb=True, **kwargs )
+	except Exception as err:
+		return {'n': n, 'p_bits': p_bits, 'q_bits': q_bits, 'status': STATUS_ERROR, 'error': str(err), 'factors': None}
+
+
+##
+# @brief Enumerates the plausible bit lengths of the factors of a number
+# @param n The number to be factorized
+# @param min_bits The minimal bit length of the factors
+# @param max_splits The maximal number of the splits (optional)
+# @return Returns with the list of the pairs (bit length of p, bit length of q) with p_bits >= q_bits ordered by their likelihood: the balanced splits first, and for the same balance the split without carry into the highest column (p_bits+q_bits = bit length of n, with probability 2-2ln2 ~ 0.61 for random factors) before the split with carry.
+def get_bit_length_splits( n, min_bits=2, max_splits=None ):
+	bit_length = n.bit_length()
+
+	splits = list()
+	for q_bits in range(min_bits, bit_length):
+		for p_bits in (bit_length-q_bits, bit_length+1-q_bits):
+			if p_bits >= q_bits:
+				splits.append( (p_bits, q_bits) )
+
+	splits.sort( key=lambda split: (split[0]-split[1], split[0]+split[1]) )
+	if max_splits is not None:
+		splits = splits[:max_splits]
+
+	return splits
+
+
+##
+# @brief Class to factorize a number of unknown factor bit lengths. The plausible splits of the bit lengths are tried in parallel in the order of their likelihood with the most significant bits of the factors fixed to 1 (see method factorization.factor.get_abstract_factors), and the remaining runs are cancelled as soon as one of them finds the factors.
+class sweep_scheduler():
+
+	##
+	# @brief Constructor of the class.
+	# @param workers The number of the worker processes (for None the number of the CPU cores, for 1 the splits are tried one after the other in the calling process)
+	# @param min_bits The minimal bit length of the factors
+	# @param max_splits The maximal number of the tried splits (optional)
+	# @param prescreen Set True to pre-screen the targets by the default pre-screener, or give an instance of class factorization.prescreen.prescreener. (The target is pre-screened once before the sweep instead of in each run, and a target proven to be a prime is not swept.)
+	# @param factor_kwargs Keyword arguments passed to function factorization.factor.factor (for example method, block_size or time_limit of a single run). The runs in the worker processes should use a single worker.
+	def __init__( self, workers=None, min_bits=2, max_splits=None, prescreen=False, **factor_kwargs ):
+		## The number of the worker processes
+		self.workers = workers if workers is not None else multiprocessing.cpu_count()
+		## The minimal bit length of the factors
+		self.min_bits = min_bits
+		## The maximal number of the tried splits
+		self.max_splits = max_splits
+		# The pre-screener of the targets
+		self._prescreener = (default_prescreener if prescreen is True else prescreen) if prescreen else None
+		# The keyword arguments of the runs
+		self._factor_kwargs = dict( factor_kwargs, prescreen=False )
+		# The statistics of the last sweep
+		self._stats = None
+
+
+	##
+	# @brief Factorizes a number by sweeping over the splits of the bit lengths
+	# @param n The (odd) number to be factorized
+	# @param time_limit The wall-clock time limit of the sweep in seconds (optional)
+	# @return Returns with a dictionary {'n', 'status', 'factors', 'split', 'times'} where split is the pair of the bit lengths of the successful run (or None). When the pre-screening found the factors or proved the target to be a prime, the key 'prescreen' gives the stage. The status is STATUS_FACTORED, STATUS_NOT_FOUND or the exceeded limit of the budget.
+	def run( self, n, time_limit=None ):
+		if n % 2 == 0:
+			raise Exception('The number to be factorized should be odd')
+
+		start_time = time.time()
+		run_budget = budget( time_limit=time_limit )
+		splits = get_bit_length_splits( n, self.min_bits, self.max_splits )
+		args = [(n, p_bits, q_bits, self._factor_kwargs) for (p_bits, q_bits) in splits]
+
+		result = {'n': n, 'status': STATUS_NOT_FOUND, 'factors': None, 'split': None, 'times': dict()}
+		self._stats = {'splits': len(splits), 'runs': 0, 'errors': 0, 'runs_before_success': None}
+
+		screened = self._prescreener.screen( n ) if self._prescreener is not None else None
+		if screened is not None:
+			(result['factors'], result['prescreen']) = screened
+			if result['factors'] is not None:
+				result['status'] = STATUS_FACTORED
+		elif self.workers == 1:
+			for arg in args:
+				status = run_budget.check()
+				if status is not None:
+					result['status'] = status
+					break
+				if self._collect( result, _run_split( arg ) ):
+					break
+		else:
+			with multiprocessing.Pool( self.workers ) as pool:
+				results = pool.imap_unordered( _run_split, args )
+				for idx in range(0, len(args)):
+					try:
+						split_result = results.next( timeout=run_budget.get_remaining_time() )
+					except multiprocessing.TimeoutError:
+						result['status'] = run_budget.check()
+						break
+
+					if self._collect( result, split_result ):
+						break
+
+				# cancel the remaining runs
+				pool.terminate()
+
+		result['times']['total'] = time.time() - start_time
+		if DEBUG:
+			print('Sweep of ' + str(n) + ': ' + str(self._stats))
+
+		return result
+
+
+	##
+	# @brief Collects the result of a run
+	# @param result The dictionary of the result of the sweep to be completed
+	# @param split_result The result of the run (see function factorization.factor.factor)
+	# @return Returns with True if the run found the factors, False otherwise
+	def _collect( self, result, split_result ):
+		self._stats['runs'] = self._stats['runs'] + 1
+		if split_result['status'] == STATUS_ERROR:
+			self._stats['errors'] = self._stats['errors'] + 1
+
+		if split_result['status'] != STATUS_FACTORED:
+			return False
+
+		result['status'] = STATUS_FACTORED
+		result['factors'] = split_result['factors']
+		result['split'] = [split_result['p_bits'], split_result['q_bits']]
+		self._stats['runs_before_success'] = self._stats['runs'] - 1
+		return True
+
+
+	##
+	# @brief Gets the statistics of the last sweep
+	# @return Returns with a dictionary {'splits', 'runs', 'errors', 'runs_before_success'}
+	def get_stats( self ):
+		return self._stats
+
+
+##
+# @brief Command line entry point: python -m factorization.sweep [targets] [options]
+# @param argv The list of the command line arguments (for None sys.argv is used)
+def main( argv=None ):
+	parser = argparse.ArgumentParser( prog='python -m factorization.sweep', description='Factorize numbers of unknown factor bit lengths by sweeping over the splits of the bit lengths.' )
+	parser.add_argument( 'targets', nargs='+', type=int, help='the numbers to be factorized' )
+	parser.add_argument( '-m', '--method', default=METHOD_ITERATIVE )
+	parser.add_argument( '-b', '--block-size', type=int, default=5 )
+	parser.add_argument( '-w', '--workers', type=int, help='number of the splits tried in parallel' )
+	parser.add_argument( '-t', '--time-limit', type=float, help='time limit of a sweep in seconds' )
+	parser.add_argument( '--min-bits', type=int, default=2, help='minimal bit length of the factors' )
+	parser.add_argument( '--max-splits', type=int, help='maximal number of the tried splits' )
+	parser.add_argument( '--prescreen', action='store_true', help='pre-screen the targets by trial division, Fermat and Pollard rho methods' )
+	args = parser.parse_args( argv )
+
+	scheduler = sweep_scheduler( args.workers, args.min_bits, args.max_splits, args.prescreen, method=args.method, block_size=args.block_size, time_limit=args.time_limit )
+	for target in args.targets:
+		result = scheduler.run( target, time_limit=args.time_limit )
+		result['sweep'] = scheduler.get_stats()
+		print( json.dumps( result ) )
+
+	return 0
+
+
+if __name__ == '__main__':
+	sys.exit( main() )
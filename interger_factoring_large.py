@@ -1,59 +1,26 @@
-# test file for the integer prime factorization
+# example of the integer prime factorization by the iterative method
+# (the same can be run from the command line: python -m factorization <target> --p-bits 50 --q-bits 50)
 
-import abstract_binary.base as abs_bin_base
-from abstract_binary.binary_number import bin_num
-from abstract_binary.abstract_binary_number import abstract_bin_num
-import abstract_binary.multiply
-from abstract_binary.multiply import multiplication_table
-import compose_BQM.compose_BQM
-from compose_BQM.compose_BQM import BQM_from_multiplication_table
-import factorization.iterative 
-from factorization.iterative import iterative_factorization
+from factorization.factor import factor, METHOD_ITERATIVE
 
 
-# Setting DEBUG variables
-abstract_binary.multiply.DEBUG = False
-compose_BQM.compose_BQM.DEBUG = False
-factorization.iterative.DEBUG = False
+if __name__ == '__main__':
 
+	# the target number
+	target = 1522605027922533360535618378132637429718068114961380688657908494580122963258952897654000350692006139
 
+	# binary representation of the factors
+	fact1 = 37975227936943673922808872755445627854565536638199
+	fact2 = 40094690950920881030683735292761468389214899724061
 
-# the target number
-target = 1522605027922533360535618378132637429718068114961380688657908494580122963258952897654000350692006139
-
-
-
-# creating the represantation of the target number
-target_num = bin_num( target )
-print( 'bit length of the target number: ' + str(target_num.bit_length()) )
-
-# binary representation of the factors
-fact1 = 37975227936943673922808872755445627854565536638199
-fact2 = 40094690950920881030683735292761468389214899724061
-fact1_bin = bin_num( fact1 )
-fact2_bin = bin_num( fact2 )
-
-
-# creating the skeleton of the unknows factors
-num1 = abstract_bin_num(50)
-num2 = abstract_bin_num(50)
-
-
-
-# create a class to construct the BQM from the multiplication table
-cIter = iterative_factorization(num1, num2, target_num)
-
-# run the iterations to solve the factorization problem
-cIter.run_iterations()
-
-
-
-# Bits of the exact solution
-print(' ')
-print('Bits of the exact solution: ')
-print('fact1: ' + bin(fact1) )
-print('fact2: ' + bin(fact2) )
-
-
+	print( 'bit length of the target number: ' + str(target.bit_length()) )
 
+	# run the iterations to solve the factorization problem
+	result = factor( target, method=METHOD_ITERATIVE, p_bits=50, q_bits=50, block_size=5 )
+	print( result )
 
+	# Bits of the exact solution
+	print(' ')
+	print('Bits of the exact solution: ')
+	print('fact1: ' + bin(fact1) )
+	print('fact2: ' + bin(fact2) )
@@ -0,0 +1,51 @@
+import pytest
+
+from abstract_binary.abstract_binary_number import abstract_bin_num
+from abstract_binary.binary_number import bin_num
+from abstract_binary.multiply import multiplication_table
+from factorization.iterative import iterative_factorization
+
+
+def test_adaptive_blocks_cover_the_table():
+	for (p_bits, q_bits) in ((6, 6), (12, 12), (14, 9)):
+		for max_block_size in (4, 5):
+			for carry_overlap in (False, True):
+				table = multiplication_table( abstract_bin_num(p_bits), abstract_bin_num(q_bits) )
+				block_list = table.determine_adaptive_blocks( max_block_size, carry_overlap=carry_overlap )
+				assert block_list == table.get_blocks()[0]
+				assert block_list[0] == 0 and block_list[-1] == p_bits + q_bits - 1
+				assert all( 0 < block_list[idx+1] - block_list[idx] <= max_block_size for idx in range(0, len(block_list)-1) )
+
+				if not carry_overlap:
+					# the carry bits of a block are kept within the next block
+					for block_id in range(1, len(block_list)-1):
+						carry_bits = table.get_carry_bits( block_list[block_id]+1, 0 )
+						assert all( block_list[block_id] < col <= block_list[block_id+1] for col in carry_bits.keys() )
+
+	# the carries of the columns of 12 products do not fit into blocks of 3 columns
+	table = multiplication_table( abstract_bin_num(12), abstract_bin_num(12) )
+	with pytest.raises( Exception, match='maximal block size is insufficient' ):
+		table.determine_adaptive_blocks( 3 )
+	assert table.determine_adaptive_blocks( 3, carry_overlap=True )[-1] == 23
+
+
+def test_block_report_follows_the_frontier():
+	(p, q) = (3001, 2011)
+	for adaptive in (False, True):
+		cIter = iterative_factorization( abstract_bin_num(12), abstract_bin_num(12), bin_num(p*q), 5, adaptive )
+		cIter.run_iterations()
+		assert sorted( cIter.get_factors() ) == [(2011, 3001), (3001, 2011)]
+
+		block_list = cIter.get_blocks()[0]
+		block_report = cIter.get_block_report()
+		assert [report['cols'] for report in block_report] == [(block_list[idx]+1, block_list[idx+1]) for idx in range(0, len(block_list)-1)]
+
+		# every partial solution entering a block is extended by all the assignments of the new bits
+		frontier_size = 1
+		for report in block_report:
+			(p_bit_num, q_bit_num) = cIter.get_new_bit_num( *report['cols'] )
+			assert report['candidates'] == frontier_size * 2**(p_bit_num + q_bit_num)
+			assert report['predicted_candidates'] >= report['candidates']
+			assert not report['cached']
+			frontier_size = report['frontier']
+		assert frontier_size == len( cIter.get_factors() )
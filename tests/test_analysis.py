@@ -0,0 +1,65 @@
+import pytest
+
+np = pytest.importorskip( 'numpy' )
+
+from compose_BQM.analysis import embedding_estimator, analyse_BQM, interaction_graph, graph_stats, LATTICE_CHIMERA, LATTICE_PEGASUS
+
+
+def check_embedding( estimator, adjacency, chains ):
+	couplers = {(qubit, int(neighbor)) for qubit in range(0, estimator.qubit_num) for neighbor in estimator.neighbors[qubit] if neighbor < estimator.qubit_num}
+	used = [int(qubit) for chain in chains for qubit in chain]
+	assert len( used ) == len( set(used) )
+
+	for chain in chains:
+		# the chain is connected
+		chain = {int(qubit) for qubit in chain}
+		reached = {min(chain)}
+		front = [min(chain)]
+		while len( front ) > 0:
+			qubit = front.pop()
+			for neighbor in chain:
+				if neighbor not in reached and (qubit, neighbor) in couplers:
+					reached.add( neighbor )
+					front.append( neighbor )
+		assert reached == chain
+
+	for variable in range(0, len(adjacency)):
+		for neighbor in adjacency[variable]:
+			assert any( (int(q1), int(q2)) in couplers for q1 in chains[variable] for q2 in chains[neighbor] )
+
+
+def test_clique_chains_embed_cliques():
+	for lattice in (LATTICE_CHIMERA, LATTICE_PEGASUS):
+		estimator = embedding_estimator( lattice, 5 )
+		for variable_num in (1, 5, 16, 20):
+			clique = [set(range(0, variable_num)) - {variable} for variable in range(0, variable_num)]
+			chains = estimator.get_clique_chains( variable_num )
+			assert max( len(chain) for chain in chains ) == estimator.get_clique_chain( variable_num )
+			check_embedding( estimator, clique, chains )
+		assert estimator.get_clique_chains( 21 ) is None
+
+
+def test_clique_sized_bqm_is_embedded():
+	estimator = embedding_estimator( LATTICE_CHIMERA, 16 )
+	result = analyse_BQM( 4, 4, 3, estimator=estimator )
+	assert result['variables'] <= 4*16
+
+	embedding = result['embedding']
+	assert embedding['embedded'] and embedding['overlaps'] == 0
+	assert embedding['max_degree_bound'] <= embedding['max_chain'] <= embedding['clique_chain']
+
+
+def test_estimated_embedding_is_valid():
+	# a ring is embedded by the heuristic without long chains
+	ring = [{(idx-1) % 12, (idx+1) % 12} for idx in range(0, 12)]
+	estimator = embedding_estimator( LATTICE_CHIMERA, 4 )
+	result = estimator.estimate( ring )
+	assert result['embedded'] and result['method'] == 'heuristic'
+	check_embedding( estimator, ring, estimator.chains )
+
+
+def test_graph_stats():
+	stats = graph_stats( {('a', 'a'): 1, ('a', 'b'): -4, ('b', 'c'): 2, ('c', 'c'): 0} )
+	assert (stats['variables'], stats['edges'], stats['max_degree']) == (3, 2, 2)
+	assert (stats['max_coeff'], stats['min_coeff'], stats['dynamic_range_bits']) == (4, 1, 2)
+	assert interaction_graph( {('a', 'b'): 0} )[1] == [set(), set()]
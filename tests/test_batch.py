@@ -0,0 +1,36 @@
+from abstract_binary.abstract_binary_number import abstract_bin_num
+from abstract_binary.binary_number import bin_num
+from compose_BQM.compose_BQM import BQM_from_multiplication_table
+from compose_BQM.template_cache import template_cache
+from factorization.batch import batch_factorization
+
+
+# semiprimes of two 4-bit factors
+TARGETS = (143, 165, 169, 195)
+
+
+def test_batch_cost_functions_equal_the_composed_ones():
+	cache = template_cache()
+	cBatch = batch_factorization( 4, 4, 3, cache=cache )
+	cost_functions = cBatch.get_cost_functions( TARGETS )
+
+	for (target, cost_function) in zip( TARGETS, cost_functions ):
+		cBQM = BQM_from_multiplication_table( abstract_bin_num(4), abstract_bin_num(4), bin_num(target) )
+		cBQM.determine_blocks( 3 )
+		assert cost_function == cBQM.compose_cost_function()
+
+	# the template is composed once for all the targets of the shape
+	batch_factorization( 4, 4, 3, cache=cache ).get_cost_functions( TARGETS )
+	stats = cache.get_stats()
+	assert (stats['misses'], stats['hits'], stats['size']) == (1, 1, 1)
+
+
+def test_batch_factors_every_target():
+	for adaptive in (False, True):
+		cBatch = batch_factorization( 4, 4, 3, adaptive=adaptive )
+		results = cBatch.run_iterative( TARGETS, workers=1 )
+		for (target, solutions) in zip( TARGETS, results ):
+			assert len( solutions ) > 0
+			assert all( int(solution['p'], 2) * int(solution['q'], 2) == target for solution in solutions )
+
+		assert cBatch.run_iterative( TARGETS, workers=2 ) == results
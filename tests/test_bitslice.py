@@ -0,0 +1,55 @@
+import random
+
+from abstract_binary.abstract_binary_number import abstract_bin_num
+from abstract_binary.binary_number import bin_num
+from factorization import bitslice, kernel
+from factorization.iterative import iterative_factorization, ENGINE_SCALAR, ENGINE_BITSLICE
+
+
+def get_frontier( p_bits, q_bits, target, block_size, engine, prune, force_msb ):
+	num1 = abstract_bin_num( p_bits )
+	num2 = abstract_bin_num( q_bits )
+	if force_msb:
+		num1.set_bit( p_bits-1, 1 )
+		num2.set_bit( q_bits-1, 1 )
+
+	cIter = iterative_factorization( num1, num2, bin_num(target), block_size, prune=prune, engine=engine )
+	cIter.run_iterations()
+	return sorted( (solution['p'], solution['q'], solution['carry']) for solution in cIter.get_exact_solutions() )
+
+
+def test_pack_lanes_round_trip():
+	rng = random.Random( 1 )
+	for lane_num in (1, 63, 64, 65, 200):
+		bits = [rng.randint( 0, 1 ) for idx in range(0, lane_num)]
+		plane = bitslice.pack_lanes( bits, (lane_num + 63) // 64 )
+		assert bitslice.unpack_lanes( plane, lane_num ).tolist() == bits
+
+
+def test_engines_give_identical_frontiers():
+	rng = random.Random( 7 )
+	for idx in range(0, 60):
+		p_bits = rng.randint( 3, 11 )
+		q_bits = rng.randint( 3, p_bits )
+		p = rng.getrandbits( p_bits ) | (1 << (p_bits-1)) | 1
+		q = rng.getrandbits( q_bits ) | (1 << (q_bits-1)) | 1
+		block_size = rng.randint( 2, 6 )
+		prune = rng.random() < 0.5
+		force_msb = rng.random() < 0.5
+
+		scalar = get_frontier( p_bits, q_bits, p*q, block_size, ENGINE_SCALAR, prune, force_msb )
+		bitsliced = get_frontier( p_bits, q_bits, p*q, block_size, ENGINE_BITSLICE, prune, force_msb )
+		assert scalar == bitsliced, (p_bits, q_bits, p*q, block_size, prune, force_msb)
+
+
+def test_engines_agree_on_single_block():
+	rng = random.Random( 11 )
+	block_list = [0, 4, 9, 14, 19]
+	target = 1009*1013
+	solutions = [{'p': '1', 'q': '1', 'carry': '0'}]
+	for block_id in range(1, len(block_list)):
+		spec = kernel.get_block_spec( 10, 10, block_list, block_id, target )
+		scalar = kernel.expand_block( spec, solutions, kernel.ENGINE_SCALAR )
+		bitsliced = kernel.expand_block( spec, solutions, kernel.ENGINE_BITSLICE )
+		assert sorted( map( sorted, (s.items() for s in scalar) ) ) == sorted( map( sorted, (s.items() for s in bitsliced) ) )
+		solutions = rng.sample( scalar, min( len(scalar), 50 ) )
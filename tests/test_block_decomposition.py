@@ -0,0 +1,48 @@
+import pytest
+
+np = pytest.importorskip( 'numpy' )
+
+from abstract_binary.abstract_binary_number import abstract_bin_num
+from compose_BQM.evaluate import sample_evaluator
+from compose_BQM.template import BQM_template
+from factorization.block_decomposition import block_decomposition_solver, INNER_EXACT, INNER_TABU
+from factorization.factor import factor, METHOD_DECOMPOSITION, STATUS_FACTORED
+
+
+def get_template( bits, block_size ):
+	(num1, num2) = (abstract_bin_num(bits), abstract_bin_num(bits))
+	num1.set_bit( 0, 1 )
+	num2.set_bit( 0, 1 )
+	return BQM_template( num1, num2, block_size )
+
+
+def test_decomposition_finds_the_ground_state():
+	for (bits, block_size, n, inners) in ((4, 3, 143, (INNER_EXACT, INNER_TABU)), (8, 5, 211*241, (INNER_EXACT,))):
+		template = get_template( bits, block_size )
+		cost_function = template.get_target_cost_function( n )
+		for inner in inners:
+			cSolver = block_decomposition_solver( template, cost_function, inner )
+			(sample, energy) = cSolver.solve( num_restarts=100, seed=1 )
+			assert energy == 0
+			(p, q) = template.get_factors_from_sample( sample )
+			assert p*q == n and p > 1 and q > 1
+			assert cSolver.get_stats()['restarts'] < 100
+
+	assert factor( 143, method=METHOD_DECOMPOSITION, p_bits=4, q_bits=4, block_size=3 )['status'] == STATUS_FACTORED
+
+
+def test_decomposition_never_raises_the_energy():
+	template = get_template( 8, 3 )
+	n = 211*241
+	cost_function = template.get_target_cost_function( n )
+	cSolver = block_decomposition_solver( template, cost_function )
+	cEvaluator = sample_evaluator( template, n, cost_function )
+
+	starts = np.random.default_rng( 3 ).integers( 0, 2, size=(5, len(cEvaluator.sparse.variables)), dtype=np.uint8 )
+	start_energies = cEvaluator.evaluate( starts )['energy']
+	for start in range(0, len(starts)):
+		(sample, energy) = cSolver.solve( samples=starts[start:start+1], seed=start )
+		result = cEvaluator.evaluate( [sample] )
+		assert energy == result['energy'][0] <= start_energies[start]
+		# the dependent variables are kept at the products of the substituted variables
+		assert result['substitutions_ok'][0]
@@ -0,0 +1,44 @@
+import time
+
+import pytest
+
+from factorization.budget import budget, budget_exceeded, get_rss, STATUS_TIME_LIMIT, STATUS_FRONTIER_LIMIT, STATUS_MEMORY_LIMIT
+from factorization.factor import factor, METHOD_BQM, STATUS_FACTORED
+
+
+def test_budget_reports_the_exceeded_limit():
+	assert budget().check( 10**9 ) is None
+	assert budget( max_frontier=10 ).check( 10 ) is None
+	assert budget( max_frontier=10 ).check( 11 ) == STATUS_FRONTIER_LIMIT
+	assert budget( max_rss=2*get_rss() + 2**30 ).check() is None
+	assert budget( max_rss=1 ).check() == STATUS_MEMORY_LIMIT
+
+	run_budget = budget( time_limit=0.01 )
+	assert run_budget.get_remaining_time() <= 0.01
+	time.sleep( 0.02 )
+	assert run_budget.check() == STATUS_TIME_LIMIT
+	assert run_budget.get_remaining_time() == 0
+
+	with pytest.raises( budget_exceeded ) as err:
+		budget( max_frontier=0 ).enforce( 1 )
+	assert err.value.status == STATUS_FRONTIER_LIMIT
+
+
+def test_budget_stops_the_iterative_run():
+	n = 3001 * 2011
+	for prune in (False, True):
+		assert factor( n, p_bits=12, q_bits=12, prune=prune )['status'] == STATUS_FACTORED
+
+		for (limits, status) in (({'max_frontier': 50}, STATUS_FRONTIER_LIMIT), ({'time_limit': 0}, STATUS_TIME_LIMIT), ({'max_rss': 1}, STATUS_MEMORY_LIMIT)):
+			result = factor( n, p_bits=12, q_bits=12, prune=prune, **limits )
+			assert result['status'] == status
+			assert result['factors'] is None
+			# the partial solutions reached within the budget are kept
+			assert 0 < result['frontier'] <= 50
+
+
+def test_budget_stops_the_sampling():
+	for (limits, status) in (({'time_limit': 0}, STATUS_TIME_LIMIT), ({'max_rss': 1}, STATUS_MEMORY_LIMIT)):
+		result = factor( 143, method=METHOD_BQM, p_bits=4, q_bits=4, block_size=3, sampler='tabu', **limits )
+		assert result['status'] == status
+		assert result['factors'] is None
@@ -0,0 +1,107 @@
+import itertools
+import random
+
+from abstract_binary.abstract_binary_number import abstract_bin_num
+from abstract_binary.binary_number import bin_num
+from abstract_binary.multiply import multiplication_table
+from compose_BQM.compose_BQM import BQM_from_multiplication_table
+
+
+def get_carry_num( bits, block_size, compact_carries ):
+	table = multiplication_table( abstract_bin_num(bits), abstract_bin_num(bits) )
+	table.determine_blocks( block_size, compact_carries=compact_carries )
+	return sum( 1 for carry in table.get_blocks()[1].values() if isinstance( carry, str ) )
+
+
+def test_compact_carries_never_need_more_variables():
+	# the shapes include the ones where the compact encoding does not fit into the next block
+	for bits in (5, 6, 8, 10, 12):
+		for block_size in (2, 3, 4, 5):
+			assert get_carry_num( bits, block_size, True ) <= get_carry_num( bits, block_size, False )
+
+
+def test_compact_carries_represent_exactly_the_carry_range():
+	for (bits, block_size) in ((6, 3), (8, 3), (10, 5), (12, 4), (12, 5)):
+		table = multiplication_table( abstract_bin_num(bits), abstract_bin_num(bits) )
+		table.determine_blocks( block_size, compact_carries=True )
+		(block_list, carry_col_dict) = table.get_blocks()
+		max_carries = table.get_max_carries()
+		carry_weights = table.get_carry_weights()
+		assert len( carry_weights ) > 0
+
+		for block_id in range(1, len(block_list)-1):
+			carry_col = block_list[block_id]+1
+			cols = [col for col in carry_weights.keys() if carry_weights[col][0] == carry_col]
+			if len( cols ) == 0:
+				continue
+
+			# the carry bits of the compact encoding are the only carry bits of the next block
+			assert sorted( cols ) == [col for col in range(carry_col, block_list[block_id+1]+1) if isinstance( carry_col_dict.get( col ), str )]
+			weights = [table.get_carry_weight( col, col-carry_col ) for col in cols]
+			values = {sum( bit*weight for (bit, weight) in zip( assignment, weights ) ) for assignment in itertools.product( (0, 1), repeat=len(cols) )}
+			assert values == set( range(0, max_carries[block_id]+1) )
+
+			for carry in range(0, max_carries[block_id]+1):
+				carry_bits = table.get_carry_bits( carry_col, carry )
+				assert sorted( carry_bits.keys() ) == sorted( cols )
+				assert sum( carry_bits[col]*table.get_carry_weight( col, col-carry_col ) for col in cols ) == carry
+			assert table.get_carry_bits( carry_col, max_carries[block_id]+1 ) is None
+
+
+def get_energy( p, q, bits, block_size, compact_carries ):
+	cBQM = BQM_from_multiplication_table( abstract_bin_num(bits), abstract_bin_num(bits), bin_num(p*q) )
+	cBQM.determine_blocks( block_size, compact_carries=compact_carries )
+	(cost_function, constant) = cBQM.compose_cost_function()
+	block_list = cBQM.get_blocks()[0]
+
+	sample = dict()
+	for (num, value) in zip( cBQM.get_abstract_nums(), (p, q) ):
+		for (bit, label) in num.get_bit_labels().items():
+			sample[label] = (value >> bit) & 1
+
+	# the carry leaving a block is given by the partial products in the columns up to the end of the block
+	for block_id in range(1, len(block_list)-1):
+		last_col = block_list[block_id]
+		low_sum = sum( ((p >> i) & (q >> (col-i)) & 1) << col for col in range(0, last_col+1) for i in range(0, col+1) )
+		carry_bits = cBQM.get_carry_bits( last_col+1, low_sum >> (last_col+1) )
+		assert carry_bits is not None
+		for (col, bit) in carry_bits.items():
+			sample[cBQM.get_carry( col )] = bit
+
+	for (pair, subs_var) in cBQM.get_substitutions().items():
+		sample[subs_var] = sample[pair[0]] * sample[pair[1]]
+
+	energy = constant
+	for (key, value) in cost_function.items():
+		term = value
+		for label in ((key,) if isinstance( key, str ) else key):
+			term = term * sample[label]
+		energy = energy + term
+	return energy
+
+
+def test_factors_are_ground_state_of_compact_model():
+	rng = random.Random( 11 )
+	for (bits, block_size) in ((8, 5), (10, 5), (12, 5)):
+		for idx in range(0, 3):
+			(p, q) = [rng.getrandbits( bits-1 ) | 2**(bits-1) | 1 for idx2 in range(0, 2)]
+			assert get_energy( p, q, bits, block_size, True ) == 0
+			assert get_energy( p, q, bits, block_size, False ) == 0
+
+
+def get_max_coefficient( bits, block_size, compact_carries ):
+	n = (2**(bits-1)+1) * (2**(bits-1)+3)
+	cBQM = BQM_from_multiplication_table( abstract_bin_num(bits), abstract_bin_num(bits), bin_num(n) )
+	cBQM.determine_blocks( block_size, compact_carries=compact_carries )
+	(cost_function, constant) = cBQM.compose_cost_function()
+	return max( abs(value) for value in cost_function.values() )
+
+
+def test_compact_carries_reduce_the_largest_coefficient():
+	for bits in (5, 6, 8, 10, 12):
+		for block_size in (2, 3, 4, 5):
+			assert get_max_coefficient( bits, block_size, True ) <= get_max_coefficient( bits, block_size, False )
+
+	# for blocks of 5 columns the compact encoding at least halves the largest coefficient
+	for bits in (5, 6, 8, 10, 12):
+		assert 2*get_max_coefficient( bits, 5, True ) <= get_max_coefficient( bits, 5, False )
@@ -0,0 +1,45 @@
+import random
+
+from abstract_binary.abstract_binary_number import abstract_bin_num
+from abstract_binary.binary_number import bin_num
+from compose_BQM.compose_BQM import BQM_from_multiplication_table, CONST
+
+
+def evaluate_term( key, sample ):
+	if key == CONST:
+		return 1
+	if isinstance( key, str ):
+		return sample[key]
+	value = 1
+	for label in key:
+		value = value * sample[label]
+	return value
+
+
+def random_sample( cBQM, rng ):
+	sample = dict()
+	for num in cBQM.get_abstract_nums():
+		for label in num.get_bit_labels().values():
+			sample[label] = rng.randint( 0, 1 )
+	for carry in cBQM.get_blocks()[1].values():
+		sample[carry] = rng.randint( 0, 1 )
+	for (pair, subs_var) in cBQM.get_substitutions().items():
+		sample[subs_var] = sample[pair[0]] * sample[pair[1]]
+	return sample
+
+
+def test_cost_function_of_block_is_square_of_block_sum():
+	rng = random.Random( 5 )
+	cBQM = BQM_from_multiplication_table( abstract_bin_num(10), abstract_bin_num(9), bin_num(377*301) )
+	cBQM.determine_blocks( 5 )
+
+	for block_id in range(0, len(cBQM.get_blocks()[0])):
+		block_BQM_dict = cBQM.sum_up_block( block_id )
+		cBQM.cost_function_of_block( block_id )
+		(cost_function, constant) = cBQM.get_cost_function()
+
+		for idx in range(0, 20):
+			sample = random_sample( cBQM, rng )
+			block_sum = sum( value*evaluate_term( key, sample ) for (key, value) in block_BQM_dict.items() )
+			cost = constant + sum( value*evaluate_term( key, sample ) for (key, value) in cost_function.items() )
+			assert cost == block_sum**2
@@ -0,0 +1,64 @@
+import pytest
+
+from abstract_binary.abstract_binary_number import abstract_bin_num
+from abstract_binary.binary_number import bin_num
+from factorization import kernel
+from factorization.budget import budget, budget_exceeded, STATUS_FRONTIER_LIMIT
+from factorization.distributed import frontier_coordinator, SUBCHUNK_SIZE
+from factorization.iterative import iterative_factorization, ENGINE_SCALAR
+
+
+def get_frontier( target, bits, block_size, last_block ):
+	cIter = iterative_factorization( abstract_bin_num(bits), abstract_bin_num(bits), bin_num(target), block_size )
+	cIter.run_iterations( last_block=last_block )
+	return (cIter, cIter.get_exact_solutions())
+
+
+@pytest.fixture
+def coordinator():
+	coordinator = frontier_coordinator( chunk_size=None )
+	coordinator.start_local_workers( 2 )
+	assert coordinator.wait_for_workers( 2 )
+	yield coordinator
+	coordinator.close()
+
+
+def test_idle_worker_steals_and_the_frontier_is_kept( coordinator ):
+	(cIter, solutions) = get_frontier( 4001*4003, 12, 4, 2 )
+	assert len( solutions ) >= 4*SUBCHUNK_SIZE
+	spec = cIter.get_block_spec( 3 )
+
+	# a single chunk leaves the second worker idle, so it has to steal
+	coordinator.chunk_size = len( solutions )
+	expanded = coordinator.expand( spec, solutions, ENGINE_SCALAR )
+
+	assert expanded == kernel.expand_block( spec, solutions, ENGINE_SCALAR )
+	assert coordinator.get_stats()['steals'] > 0
+
+
+def test_aborted_expansion_leaves_no_messages_for_the_next_one( coordinator ):
+	(cIter, solutions) = get_frontier( 4001*4003, 12, 4, 2 )
+	spec = cIter.get_block_spec( 3 )
+	reference = kernel.expand_block( spec, solutions, ENGINE_SCALAR )
+
+	coordinator.chunk_size = len( solutions ) // 2
+	with pytest.raises( budget_exceeded ) as err:
+		coordinator.expand( spec, solutions, ENGINE_SCALAR, run_budget=budget( max_frontier=1 ) )
+	assert err.value.status == STATUS_FRONTIER_LIMIT
+	assert coordinator.get_stats()['aborts'] == 1
+
+	# the coordinator and the workers are reused after the abort
+	for idx in range(0, 2):
+		assert coordinator.expand( spec, solutions, ENGINE_SCALAR ) == reference
+	assert coordinator.get_stats()['workers'] == 2
+
+
+def test_distributed_run_gives_the_factors( coordinator ):
+	(p, q) = (4001, 4003)
+	cIter = iterative_factorization( abstract_bin_num(12), abstract_bin_num(12), bin_num(p*q), 4, prune=True, engine=ENGINE_SCALAR )
+	cIter.run_iterations( run_budget=budget( max_frontier=1 ), coordinator=coordinator )
+	assert cIter.get_status() == STATUS_FRONTIER_LIMIT
+
+	cIter.run_iterations( coordinator=coordinator )
+
+	assert (p, q) in cIter.get_factors() or (q, p) in cIter.get_factors()
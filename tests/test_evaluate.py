@@ -0,0 +1,87 @@
+import random
+
+import pytest
+
+np = pytest.importorskip( 'numpy' )
+
+from abstract_binary.abstract_binary_number import abstract_bin_num
+from abstract_binary.binary_number import bin_num
+from compose_BQM.compose_BQM import BQM_from_multiplication_table
+from compose_BQM.evaluate import sample_evaluator
+
+
+def get_BQM( target ):
+	cBQM = BQM_from_multiplication_table( abstract_bin_num(4), abstract_bin_num(4), bin_num(target) )
+	cBQM.determine_blocks( 3 )
+	cBQM.compose_cost_function()
+	return cBQM
+
+
+def get_solution_sample( cBQM, p, q ):
+	sample = dict()
+	for (num, value) in zip( cBQM.get_abstract_nums(), (p, q) ):
+		for (bit, label) in num.get_bit_labels().items():
+			sample[label] = (value >> bit) & 1
+
+	block_list = cBQM.get_blocks()[0]
+	for block_id in range(1, len(block_list)-1):
+		last_col = block_list[block_id]
+		# the carry leaving a block is given by the partial products in the columns up to the end of the block
+		low_sum = sum( ((p >> i) & (q >> (col-i)) & 1) << col for col in range(0, last_col+1) for i in range(0, col+1) )
+		for (col, bit) in cBQM.get_carry_bits( last_col+1, low_sum >> (last_col+1) ).items():
+			sample[cBQM.get_carry( col )] = bit
+
+	for (pair, subs_var) in cBQM.get_substitutions().items():
+		sample[subs_var] = sample[pair[0]] * sample[pair[1]]
+	return sample
+
+
+def test_evaluator_recognizes_the_factors():
+	cBQM = get_BQM( 143 )
+	cEvaluator = sample_evaluator( cBQM, 143 )
+	variables = cEvaluator.sparse.variables
+
+	solution = get_solution_sample( cBQM, 11, 13 )
+	# flipping a substitution variable breaks the consistency of the substitutions
+	broken = dict( solution )
+	subs_var = sorted( cBQM.get_substitutions().values() )[0]
+	broken[subs_var] = 1 - broken[subs_var]
+
+	result = cEvaluator.evaluate( [{label: solution[label] for label in variables}, {label: broken[label] for label in variables}] )
+	assert result['energy'][0] == 0 and result['energy'][1] > 0
+	assert result['substitutions_ok'].tolist() == [True, False]
+	assert result['p'].tolist() == [11, 11] and result['q'].tolist() == [13, 13]
+	assert result['valid'].tolist() == [True, True]
+
+
+def test_evaluator_matches_the_cost_function():
+	cBQM = get_BQM( 143 )
+	(cost_function, constant) = cBQM.get_cost_function()
+	cEvaluator = sample_evaluator( cBQM, 143 )
+	variables = cEvaluator.sparse.variables
+	(p, q) = cBQM.get_abstract_nums()
+
+	rng = random.Random( 5 )
+	samples = [{label: rng.getrandbits(1) for label in variables} for idx in range(0, 200)]
+	result = cEvaluator.evaluate( samples )
+
+	for (idx, sample) in enumerate( samples ):
+		energy = constant + sum( value*sample[key[0]]*sample[key[1]] for (key, value) in cost_function.items() )
+		assert result['energy'][idx] == energy
+		p_value = sum( (p.get_bit( bit ) if p.check_bit( bit ) else sample[label]) << bit for (bit, label) in p.get_bit_labels().items() )
+		q_value = sum( (q.get_bit( bit ) if q.check_bit( bit ) else sample[label]) << bit for (bit, label) in q.get_bit_labels().items() )
+		assert (result['p'][idx], result['q'][idx]) == (p_value, q_value)
+		assert result['valid'][idx] == (p_value*q_value == 143)
+
+
+def test_decode_beyond_int64():
+	cEvaluator = sample_evaluator( get_BQM( 143 ), None )
+	rng = random.Random( 7 )
+	bits = [0, 5, 61, 62, 63, 100, 130]
+	samples = np.array( [[rng.getrandbits(1) for bit in bits] for idx in range(0, 50)], dtype=np.uint8 )
+	known_value = 2**140 + 2
+
+	values = cEvaluator.decode( samples, known_value, [(bit, idx) for (idx, bit) in enumerate( bits )] )
+	for (sample, value) in zip( samples, values ):
+		assert value == known_value + sum( int(sample[idx]) << bit for (idx, bit) in enumerate( bits ) )
+	assert cEvaluator.evaluate( np.zeros( (3, len(cEvaluator.sparse.variables)), dtype=np.uint8 ) )['valid'] is None
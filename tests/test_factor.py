@@ -0,0 +1,38 @@
+import json
+import os
+import subprocess
+import sys
+
+from factorization.factor import factor, STATUS_FACTORED, STATUS_NOT_FOUND
+
+
+ROOT_DIR = os.path.dirname( os.path.dirname( os.path.abspath(__file__) ) )
+
+
+def test_unbalanced_factors_get_a_hint():
+	for (n, p_bits, q_bits) in ((15, 3, 2), (129, 6, 2)):
+		result = factor( n )
+		assert result['status'] == STATUS_NOT_FOUND
+		assert 'factorization.sweep' in result['hint']
+
+		result = factor( n, p_bits=p_bits, q_bits=q_bits )
+		assert result['status'] == STATUS_FACTORED
+		assert result['factors'][0]*result['factors'][1] == n
+		assert 'hint' not in result
+
+	# the given bit lengths are not second-guessed
+	assert 'hint' not in factor( 15, p_bits=2, q_bits=2 )
+
+
+def test_default_engine_falls_back_to_scalar_without_numpy():
+	# numpy is made unimportable in a fresh interpreter
+	code = 'import json, sys\nsys.modules["numpy"] = None\n'
+	code = code + 'from factorization.factor import factor\nfrom factorization.iterative import iterative_factorization\n'
+	code = code + 'from abstract_binary.abstract_binary_number import abstract_bin_num\nfrom abstract_binary.binary_number import bin_num\n'
+	code = code + 'cIter = iterative_factorization( abstract_bin_num(4), abstract_bin_num(4), bin_num(143), engine="bitslice" )\n'
+	code = code + 'print( json.dumps( {"engine": cIter.get_engine(), "factors": factor( 143 )["factors"]} ) )\n'
+	env = dict( os.environ )
+	env['PYTHONPATH'] = ROOT_DIR + os.pathsep + env.get( 'PYTHONPATH', '' )
+	output = subprocess.run( [sys.executable, '-c', code], cwd=ROOT_DIR, env=env, capture_output=True, text=True, check=True ).stdout
+
+	assert json.loads( output.strip().splitlines()[-1] ) == {'engine': 'scalar', 'factors': [11, 13]}
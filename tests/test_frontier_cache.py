@@ -0,0 +1,53 @@
+from factorization import frontier_cache
+from factorization.factor import factor
+
+
+def test_factor_does_not_cache_by_default():
+	frontier_cache.default_cache.clear()
+	factor( 1009*1013, prescreen=False )
+	factor( 1009*1013, prescreen=False )
+
+	assert frontier_cache.default_cache.get_stats()['size'] == 0
+	assert frontier_cache.default_cache.get_stats()['hits'] == 0
+
+
+def test_cached_runs_give_the_uncached_factors( tmp_path ):
+	cache = frontier_cache.frontier_cache( cache_dir=str(tmp_path) )
+	for (p, q) in ((1009, 1013), (1021, 1013), (1019, 1031)):
+		uncached = factor( p*q, prescreen=False )
+		# the second run starts from the deepest cached frontier
+		for idx in range(0, 2):
+			cached = factor( p*q, prescreen=False, cache=cache )
+			assert cached['factors'] == uncached['factors'] == sorted( [p, q] )
+
+	assert cache.get_stats()['hits'] > 0
+	assert cache.get_stats()['disk_writes'] > 0
+
+	# a fresh cache reuses the pickled frontiers
+	reloaded = frontier_cache.frontier_cache( cache_dir=str(tmp_path) )
+	assert factor( 1009*1013, prescreen=False, cache=reloaded )['factors'] == [1009, 1013]
+	assert reloaded.get_stats()['disk_hits'] > 0
+
+
+def test_default_cache_is_used_on_request():
+	frontier_cache.default_cache.clear()
+	factor( 1009*1013, prescreen=False, cache=True )
+	factor( 1009*1013, prescreen=False, cache=True )
+
+	assert frontier_cache.default_cache.get_stats()['hits'] > 0
+	frontier_cache.default_cache.clear()
+
+
+def test_targets_sharing_low_bits_give_their_own_factors():
+	# the pairs share the low-order bits of the first blocks
+	for (first, second) in ((714613, 792437), (660571, 783451), (474883, 438019), (606409, 803017)):
+		for prune in (True, False):
+			cache = frontier_cache.frontier_cache()
+			for n in (first, second):
+				factors = factor( n, prune=prune )['factors']
+				assert factors is not None
+				assert factor( n, prune=prune, cache=cache )['factors'] == factors
+
+			if not prune:
+				# the unpruned frontiers of the low-order blocks are shared
+				assert cache.get_stats()['hits'] > 0
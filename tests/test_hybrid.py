@@ -0,0 +1,27 @@
+from abstract_binary.abstract_binary_number import abstract_bin_num
+from abstract_binary.multiply import multiplication_table
+from factorization.factor import factor, METHOD_HYBRID, METHOD_ITERATIVE, STATUS_FACTORED
+
+
+# (n, options) of the shapes where the carry bits of a block extend to the end of the block
+SHAPES = ((143, {'p_bits': 4, 'q_bits': 4, 'block_size': 2}), (323, {'block_size': 2}), (59989, {'block_size': 3, 'split_block': 2}))
+
+
+def test_carry_bits_stay_in_the_entered_block():
+	for bits in (4, 5, 8):
+		for block_size in (2, 3):
+			table = multiplication_table( abstract_bin_num(bits), abstract_bin_num(bits) )
+			table.determine_blocks( block_size )
+			block_list = table.get_blocks()[0]
+			for block_id in range(1, len(block_list)-1):
+				carry_bits = table.get_carry_bits( block_list[block_id]+1, 0 )
+				assert all( block_list[block_id] < col <= block_list[block_id+1] for col in carry_bits.keys() )
+
+
+def test_hybrid_gives_the_iterative_factors():
+	for (n, options) in SHAPES:
+		for compact_carries in (False, True):
+			iterative = factor( n, method=METHOD_ITERATIVE, **options )
+			hybrid = factor( n, method=METHOD_HYBRID, sampler='tabu', compact_carries=compact_carries, **options )
+			assert hybrid['status'] == iterative['status'] == STATUS_FACTORED
+			assert hybrid['factors'] == iterative['factors']
@@ -0,0 +1,45 @@
+import json
+import os
+import subprocess
+import sys
+
+
+# The wall-clock budget of importing the core modules in a fresh interpreter in seconds
+IMPORT_TIME_BUDGET = 0.5
+
+# The core modules, which should import without numpy and without any dwave package
+CORE_MODULES = ('abstract_binary.multiply', 'compose_BQM.compose_BQM', 'compose_BQM.template_cache', 'factorization.iterative', 'factorization.samplers', 'factorization.factor')
+
+# The optional heavy dependencies
+HEAVY_PREFIXES = ('numpy', 'dwave', 'dwave_qbsolv', 'dimod', 'neal')
+
+ROOT_DIR = os.path.dirname( os.path.dirname( os.path.abspath(__file__) ) )
+
+
+def import_in_fresh_interpreter( code ):
+	env = dict( os.environ )
+	env['PYTHONPATH'] = ROOT_DIR + os.pathsep + env.get( 'PYTHONPATH', '' )
+	output = subprocess.run( [sys.executable, '-c', code], cwd=ROOT_DIR, env=env, capture_output=True, text=True, check=True ).stdout
+	return json.loads( output.strip().splitlines()[-1] )
+
+
+def test_core_modules_import_within_budget_without_heavy_dependencies():
+	code = 'import importlib, json, sys, time\n'
+	code = code + 'start = time.perf_counter()\n'
+	code = code + 'for name in ' + repr(CORE_MODULES) + ': importlib.import_module( name )\n'
+	code = code + 'elapsed = time.perf_counter() - start\n'
+	code = code + 'print( json.dumps( {"elapsed": elapsed, "modules": sorted( sys.modules.keys() )} ) )\n'
+	result = import_in_fresh_interpreter( code )
+
+	heavy = [name for name in result['modules'] if name.split('.')[0] in HEAVY_PREFIXES]
+	assert heavy == []
+	assert result['elapsed'] < IMPORT_TIME_BUDGET
+
+
+def test_sampler_names_do_not_import_backends():
+	code = 'import json, sys\nfrom factorization import samplers\nsamplers.get_sampler_names( available=True )\n'
+	code = code + 'print( json.dumps( {"modules": sorted( sys.modules.keys() )} ) )\n'
+	result = import_in_fresh_interpreter( code )
+
+	# finding the spec of dwave.system imports only the namespace package dwave
+	assert [name for name in result['modules'] if name.split('.')[0] in HEAVY_PREFIXES and name != 'dwave'] == []
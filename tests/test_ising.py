@@ -0,0 +1,56 @@
+import itertools
+
+import pytest
+
+np = pytest.importorskip( 'numpy' )
+
+from abstract_binary.abstract_binary_number import abstract_bin_num
+from abstract_binary.binary_number import bin_num
+from compose_BQM.compose_BQM import BQM_from_multiplication_table
+from compose_BQM.ising import ising_BQM
+from compose_BQM.sparse import sparse_BQM
+
+
+def get_cost_function():
+	cBQM = BQM_from_multiplication_table( abstract_bin_num(3), abstract_bin_num(3), bin_num(35) )
+	cBQM.determine_blocks( 3 )
+	return cBQM.compose_cost_function()
+
+
+def get_all_samples( variable_num ):
+	return np.array( list( itertools.product( (0, 1), repeat=variable_num ) ), dtype=np.uint8 )
+
+
+def test_ising_energies_equal_the_QUBO_energies():
+	(cost_function, constant) = get_cost_function()
+	cSparse = sparse_BQM( cost_function, constant )
+	cIsing = ising_BQM( cSparse )
+	samples = get_all_samples( cSparse.get_variable_num() )
+
+	qubo_energies = cSparse.energies( samples )
+	spins = cIsing.samples_to_spins( samples )
+	assert np.array_equal( cIsing.spins_to_samples( spins ), samples )
+	assert np.array_equal( cIsing.to_QUBO_energies( cIsing.energies( spins ) ), qubo_energies )
+
+	# the scaled model keeps the energies up to rounding
+	cScaled = cIsing.scaled( h_range=(-2.0, 2.0), J_range=(-1.0, 1.0) )
+	assert np.abs( cScaled.h ).max() <= 2.0 and np.abs( cScaled.J ).max() <= 1.0
+	assert np.allclose( cScaled.to_QUBO_energies( cScaled.energies( spins ) ), qubo_energies )
+
+
+def test_quantization_error_is_bounded():
+	(cost_function, constant) = get_cost_function()
+	cIsing = ising_BQM( (cost_function, constant) ).scaled()
+	samples = get_all_samples( len( cIsing.variables ) )
+	spins = cIsing.samples_to_spins( samples )
+	exact = cIsing.to_QUBO_energies( cIsing.energies( spins ) )
+
+	for bits in (4, 6, 8):
+		cQuantized = cIsing.quantized( bits=bits )
+		report = cQuantized.quantization
+		assert type( report['step'] ) is float
+		# the coefficients are on the integer grid of the step
+		assert np.allclose( cQuantized.J / report['step'], np.round( cQuantized.J / report['step'] ) )
+		assert report['max_J_error'] <= report['step'] / 2 + 1e-12
+		errors = np.abs( cQuantized.to_QUBO_energies( cQuantized.energies( spins ) ) - exact )
+		assert errors.max() <= report['energy_error_bound'] + 1e-9
@@ -0,0 +1,80 @@
+import random
+
+from abstract_binary.abstract_binary_number import abstract_bin_num
+from abstract_binary.binary_number import bin_num
+from abstract_binary.multiply import multiplication_table
+from factorization import kernel
+from factorization.iterative import iterative_factorization, POOL_PROCESS, POOL_THREAD, ENGINE_SCALAR, ENGINE_BITSLICE
+
+
+def brute_force_frontier( p_bits, q_bits, target, last_col, p_known=(), q_known=() ):
+	p_num = min( last_col+1, p_bits )
+	q_num = min( last_col+1, q_bits )
+	modulus = 2**(last_col+1)
+
+	frontier = set()
+	for p in range(0, 2**p_num):
+		if any( (p >> bit) & 1 != value for (bit, value) in p_known if bit < p_num ):
+			continue
+		for q in range(0, 2**q_num):
+			if any( (q >> bit) & 1 != value for (bit, value) in q_known if bit < q_num ):
+				continue
+			# the weighted sum of the columns 0,...,last_col of the multiplication table
+			total = sum( ((p >> i) & (q >> (col-i)) & 1) << col for col in range(0, last_col+1) for i in range(0, col+1) )
+			if total % modulus == target % modulus:
+				frontier.add( (format( p, '0' + str(p_num) + 'b' ), format( q, '0' + str(q_num) + 'b' ), format( total >> (last_col+1), 'b' )) )
+
+	return frontier
+
+
+def get_block_list( p_bits, q_bits, block_size ):
+	table = multiplication_table( abstract_bin_num(p_bits), abstract_bin_num(q_bits) )
+	table.determine_blocks( block_size )
+	return table.get_blocks()[0]
+
+
+def test_evaluate_block_matches_brute_force():
+	rng = random.Random( 3 )
+	for idx in range(0, 25):
+		p_bits = rng.randint( 3, 7 )
+		q_bits = rng.randint( 3, p_bits )
+		target = (rng.getrandbits( p_bits ) | 1) * (rng.getrandbits( q_bits ) | 1)
+		block_list = get_block_list( p_bits, q_bits, rng.randint( 2, 4 ) )
+		p_known = ((p_bits-1, 1),) if rng.random() < 0.5 else ()
+		q_known = ((q_bits-1, 1),) if rng.random() < 0.5 else ()
+
+		solutions = [{'p': '1', 'q': '1', kernel.CARRY: '0'}]
+		for block_id in range(1, len(block_list)):
+			spec = kernel.get_block_spec( p_bits, q_bits, block_list, block_id, target, p_known, q_known )
+			expanded = list()
+			for solution in solutions:
+				expanded.extend( kernel.evaluate_block( spec, solution['p'], solution['q'], solution[kernel.CARRY] ) )
+			solutions = expanded
+
+			frontier = {(solution['p'], solution['q'], solution[kernel.CARRY]) for solution in solutions}
+			assert len( frontier ) == len( solutions )
+			assert frontier == brute_force_frontier( p_bits, q_bits, target, block_list[block_id], p_known, q_known )
+
+
+def test_prune_solutions_keeps_the_factors():
+	(p, q) = (1009, 1013)
+	for engine in (ENGINE_SCALAR, ENGINE_BITSLICE):
+		pruned = iterative_factorization( abstract_bin_num(10), abstract_bin_num(10), bin_num(p*q), 4, prune=True, engine=engine )
+		pruned.run_iterations()
+		full = iterative_factorization( abstract_bin_num(10), abstract_bin_num(10), bin_num(p*q), 4, prune=False, engine=engine )
+		full.run_iterations()
+
+		assert (p, q) in pruned.get_factors() or (q, p) in pruned.get_factors()
+		assert len( pruned.get_exact_solutions() ) <= len( full.get_exact_solutions() )
+
+
+def test_pools_give_the_serial_frontier():
+	target = 4001*4003
+	frontiers = list()
+	for (workers, pool) in ((1, POOL_PROCESS), (3, POOL_THREAD), (3, POOL_PROCESS)):
+		cIter = iterative_factorization( abstract_bin_num(12), abstract_bin_num(12), bin_num(target), 4 )
+		cIter.run_iterations( workers=workers, pool=pool )
+		frontiers.append( sorted( (solution['p'], solution['q'], solution[kernel.CARRY]) for solution in cIter.get_exact_solutions() ) )
+
+	assert frontiers[0] == frontiers[1] == frontiers[2]
+	assert len( frontiers[0] ) > 0
@@ -0,0 +1,77 @@
+import itertools
+
+import pytest
+
+np = pytest.importorskip( 'numpy' )
+
+from abstract_binary.abstract_binary_number import abstract_bin_num
+from abstract_binary.binary_number import bin_num
+from compose_BQM.compose_BQM import BQM_from_multiplication_table
+from compose_BQM.local_search import local_search, tabu_sampler, METHOD_GREEDY, METHOD_TABU
+from compose_BQM.sparse import FLOAT64_LIMIT, INT64_LIMIT
+
+
+# a QUBO with the ground state energy -7 at a=1, b=1, c=0
+QUBO = {('a', 'a'): -3, ('b', 'b'): -2, ('c', 'c'): 4, ('a', 'b'): -2, ('b', 'c'): -1}
+
+
+def get_ground_energy( cost_function, constant ):
+	variables = sorted( {label for key in cost_function.keys() for label in key} )
+	energies = list()
+	for values in itertools.product( (0, 1), repeat=len(variables) ):
+		sample = dict( zip(variables, values) )
+		energies.append( constant + sum( value*sample[key[0]]*sample[key[1]] for (key, value) in cost_function.items() ) )
+	return min( energies )
+
+
+def test_greedy_descent_reaches_local_minima():
+	search = local_search( (QUBO, 5) )
+	starts = np.array( list( itertools.product( (0, 1), repeat=3 ) ), dtype=np.uint8 )
+	(samples, energies) = search.greedy_descent( starts )
+
+	assert list( energies ) == list( search.sparse.energies( samples ) )
+	for sample_idx in range(0, len(samples)):
+		# no single flip improves a local minimum
+		for bit in range(0, 3):
+			flipped = samples[sample_idx].copy()
+			flipped[bit] = 1 - flipped[bit]
+			assert search.sparse.energies( flipped[None, :] )[0] >= energies[sample_idx]
+
+
+def test_tabu_search_continues_below_zero_energy():
+	# the all-zero start has zero energy, but the ground state is negative
+	search = local_search( (QUBO, 0) )
+	(samples, energies) = search.tabu_search( np.zeros( (4, 3), dtype=np.uint8 ), num_steps=20 )
+	assert list( energies ) == [get_ground_energy( QUBO, 0 )]*4
+
+	result = tabu_sampler().sample_qubo( QUBO, num_reads=4, num_steps=20, seed=1 )
+	assert result.data_vectors['energy'][0] == -7
+	assert result.samples()[0] == {'a': 1, 'b': 1, 'c': 0}
+
+
+def test_tabu_search_with_large_int64_energies():
+	# the energies are beyond the exact float64 range but within int64
+	cost_function = {('a', 'a'): 2**61, ('b', 'b'): -2**61, ('a', 'b'): -2**60, ('c', 'c'): -1, ('b', 'c'): 3}
+	search = local_search( (cost_function, 0) )
+	assert FLOAT64_LIMIT <= search.sparse.max_energy <= INT64_LIMIT
+	assert search.sparse.coeffs.dtype == np.int64
+
+	(samples, energies) = search.tabu_search( np.zeros( (2, 3), dtype=np.uint8 ), num_steps=10 )
+	assert [int(energy) for energy in energies] == [get_ground_energy( cost_function, 0 )]*2
+
+
+def test_repair_finds_the_factors():
+	cBQM = BQM_from_multiplication_table( abstract_bin_num(4), abstract_bin_num(4), bin_num(143) )
+	cBQM.determine_blocks( 3 )
+	search = local_search( cBQM.compose_cost_function() )
+	starts = np.random.default_rng( 2 ).integers( 0, 2, size=(16, search.sparse.get_variable_num()), dtype=np.uint8 )
+
+	for method in (METHOD_GREEDY, METHOD_TABU):
+		(samples, energies, stats) = search.repair( starts, method=method )
+		assert stats['samples'] == 16
+		assert all( energy >= 0 for energy in energies )
+	# the tabu search reaches the zero energy ground state
+	assert stats['final_zero'] > 0
+	for sample in samples[energies == 0]:
+		factors = cBQM.get_factors_from_sample( dict( zip(search.sparse.variables, sample.tolist()) ) )
+		assert sorted( factors ) == [11, 13]
@@ -0,0 +1,44 @@
+import pytest
+
+pytest.importorskip( 'numpy' )
+
+from abstract_binary.abstract_binary_number import abstract_bin_num
+from compose_BQM.template import BQM_template
+from factorization.budget import budget, STATUS_COMPLETE, STATUS_TIME_LIMIT
+from factorization.factor import factor, METHOD_BQM, STATUS_FACTORED
+from factorization.multistart import multistart_sampler
+
+
+def get_template():
+	(num1, num2) = (abstract_bin_num(4), abstract_bin_num(4))
+	num1.set_bit( 0, 1 )
+	num2.set_bit( 0, 1 )
+	return BQM_template( num1, num2, 3 )
+
+
+def test_multistart_stops_at_the_first_factorization():
+	template = get_template()
+	cMultistart = multistart_sampler( template, 143, template.get_target_cost_function( 143 ), 'tabu', workers=2 )
+	factors = cMultistart.run( num_starts=8, seed=3 )
+	assert sorted( factors ) == [11, 13]
+
+	stats = cMultistart.get_stats()
+	assert stats['status'] == STATUS_COMPLETE
+	assert 1 <= stats['starts'] <= 8
+	assert 3 <= stats['seed'] < 3+8
+
+	result = factor( 143, method=METHOD_BQM, p_bits=4, q_bits=4, block_size=3, workers=2, sampler='tabu' )
+	assert result['status'] == STATUS_FACTORED and result['factors'] == [11, 13]
+	assert result['multistart']['seed'] is not None
+
+
+def test_multistart_verifies_the_factors():
+	template = get_template()
+	# the ground states of the cost function of 143 do not factorize 145
+	cMultistart = multistart_sampler( template, 145, template.get_target_cost_function( 143 ), 'tabu', workers=2, num_reads=5 )
+	assert cMultistart.run( num_starts=4 ) is None
+	assert (cMultistart.get_stats()['starts'], cMultistart.get_stats()['seed']) == (4, None)
+
+	cMultistart = multistart_sampler( template, 145, template.get_target_cost_function( 143 ), 'tabu', workers=2, num_steps=100000 )
+	assert cMultistart.run( num_starts=4, run_budget=budget( time_limit=0 ) ) is None
+	assert cMultistart.get_stats()['status'] == STATUS_TIME_LIMIT
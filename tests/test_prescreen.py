@@ -0,0 +1,44 @@
+from factorization.factor import factor, METHOD_BQM, STATUS_FACTORED, STATUS_NOT_FOUND
+from factorization.prescreen import prescreener, get_prime_table, STAGE_TRIAL_DIVISION, STAGE_FERMAT, STAGE_POLLARD_RHO, STAGE_PRIME
+from factorization.sweep import sweep_scheduler
+
+
+def test_prime_table():
+	assert get_prime_table( 30 ) == [2, 3, 5, 7, 11, 13, 17, 19, 23, 29]
+	assert get_prime_table( 1 ) == []
+
+
+def test_stages_of_the_screening():
+	screener = prescreener( trial_bound=2**10, fermat_iterations=2**6 )
+	assert screener.screen( 3*1000003 ) == ([3, 1000003], STAGE_TRIAL_DIVISION)
+	assert screener.screen( 1000003*1000033 ) == ([1000003, 1000033], STAGE_FERMAT)
+	assert screener.screen( 1000003*2147483647 ) == ([1000003, 2147483647], STAGE_POLLARD_RHO)
+	assert screener.screen( 1009 ) == (None, STAGE_PRIME)
+	# a target beyond the square of the trial bound is not proven to be a prime
+	assert screener.screen( 2147483647 ) is None
+
+	stats = screener.get_stats()
+	assert (stats['jobs'], stats['short_circuited'], stats['primes']) == (5, 3, 1)
+
+
+def test_factor_does_not_prescreen_by_default():
+	result = factor( 143, p_bits=4, q_bits=4, block_size=3 )
+	assert result['status'] == STATUS_FACTORED
+	assert 'prescreen' not in result and 'prescreen' not in result['times']
+
+
+def test_proven_prime_is_not_found_without_the_solution_method():
+	# the BQM method would need a sampler
+	result = factor( 10007, method=METHOD_BQM, prescreen=True, sampler='missing' )
+	assert result['status'] == STATUS_NOT_FOUND
+	assert result['factors'] is None
+	assert result['prescreen'] == STAGE_PRIME
+
+	result = sweep_scheduler( workers=1, prescreen=True, method=METHOD_BQM, sampler='missing' ).run( 10007 )
+	assert (result['status'], result['prescreen']) == (STATUS_NOT_FOUND, STAGE_PRIME)
+
+
+def test_prescreened_factors():
+	result = factor( 3*1000003, prescreen=True )
+	assert result['status'] == STATUS_FACTORED
+	assert (result['factors'], result['prescreen']) == ([3, 1000003], STAGE_TRIAL_DIVISION)
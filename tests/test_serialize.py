@@ -0,0 +1,82 @@
+import pytest
+
+np = pytest.importorskip( 'numpy' )
+
+from abstract_binary.abstract_binary_number import abstract_bin_num
+from abstract_binary.binary_number import bin_num
+from compose_BQM.compose_BQM import BQM_from_multiplication_table
+from compose_BQM import serialize
+
+
+def canonical( cost_function ):
+	canonical_function = dict()
+	for (key, value) in cost_function.items():
+		key = tuple( sorted(key) )
+		canonical_function[key] = canonical_function.get( key, 0 ) + value
+	return {key: value for (key, value) in canonical_function.items() if value != 0}
+
+
+def compose( p_bits, q_bits, target, block_size ):
+	cBQM = BQM_from_multiplication_table( abstract_bin_num(p_bits), abstract_bin_num(q_bits), bin_num(target) )
+	cBQM.determine_blocks( block_size )
+	cBQM.compose_cost_function()
+	return cBQM
+
+
+@pytest.mark.parametrize( 'use_mmap', [True, False] )
+def test_round_trip_of_composed_BQM( tmp_path, use_mmap ):
+	cBQM = compose( 8, 8, 251*241, 5 )
+	path = str( tmp_path / 'bqm.bin' )
+	size = serialize.save_BQM( cBQM, path )
+	assert size == len( open( path, 'rb' ).read() )
+
+	loaded = serialize.load_BQM( path, use_mmap=use_mmap )
+	(cost_function, constant) = cBQM.get_cost_function()
+	(loaded_function, loaded_constant) = loaded.get_cost_function()
+
+	assert loaded.sparse.coeffs.dtype == np.int64
+	assert canonical( loaded_function ) == canonical( cost_function )
+	assert loaded_constant == constant
+	assert loaded.get_substitutions() == cBQM.get_substitutions()
+	assert {key: canonical( value ) for (key, value) in loaded.get_penalties().items()} == {key: canonical( value ) for (key, value) in cBQM.get_penalties().items()}
+
+
+def test_mmap_arrays_are_not_copied( tmp_path ):
+	path = str( tmp_path / 'bqm.bin' )
+	serialize.save_BQM( compose( 6, 6, 61*59, 4 ), path )
+
+	loaded = serialize.load_BQM( path, use_mmap=True )
+	for array in (loaded.sparse.rows, loaded.sparse.cols, loaded.sparse.coeffs):
+		assert not array.flags.owndata
+		assert not array.flags.writeable
+
+
+def test_round_trip_of_object_coefficients():
+	cost_function = {('a', 'a'): 2**70, ('a', 'b'): -2**66 + 1, ('b', 'b'): 5}
+	loaded = serialize.serialized_BQM( serialize.to_bytes( cost_function, constant=-2**80 ) )
+	(loaded_function, loaded_constant) = loaded.get_cost_function()
+
+	assert canonical( loaded_function ) == canonical( cost_function )
+	assert loaded_constant == -2**80
+	assert all( type(value) is int for value in loaded_function.values() )
+
+
+def test_round_trip_of_float_coefficients():
+	cost_function = {('a', 'a'): 0.5, ('a', 'b'): -1.25}
+	loaded = serialize.serialized_BQM( serialize.to_bytes( cost_function, constant=2.5 ) )
+
+	assert loaded.sparse.coeffs.dtype == np.float64
+	assert canonical( loaded.get_cost_function()[0] ) == canonical( cost_function )
+	assert loaded.get_cost_function()[1] == 2.5
+
+
+def test_version_mismatch_is_rejected():
+	data = bytearray( serialize.to_bytes( {('a', 'b'): 1} ) )
+	(magic, version, header_length) = serialize.FIXED_HEADER.unpack_from( data, 0 )
+	serialize.FIXED_HEADER.pack_into( data, 0, magic, version+1, header_length )
+	with pytest.raises( Exception, match='Unsupported version' ):
+		serialize.serialized_BQM( bytes(data) )
+
+	data[0:8] = b'NOTABQM\x00'
+	with pytest.raises( Exception, match='not a serialized BQM' ):
+		serialize.serialized_BQM( bytes(data) )
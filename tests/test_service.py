@@ -0,0 +1,60 @@
+import asyncio
+
+from factorization.factor import STATUS_FACTORED, STATUS_NOT_FOUND
+from factorization.service import factoring_service
+
+
+# 143 = 11*13 is factored by the split 4+4 bits, but not by the split 5+3 bits
+BALANCED = {'p_bits': 4, 'q_bits': 4, 'block_size': 3, 'prescreen': False}
+UNBALANCED = {'p_bits': 5, 'q_bits': 3, 'block_size': 3, 'prescreen': False}
+
+
+def run_jobs( jobs ):
+	async def run():
+		service = factoring_service( workers=1, batch_window=0.05 )
+		await service.start()
+		try:
+			results = list()
+			for batch in jobs:
+				results.append( await asyncio.gather( *[service.submit( n, options ) for (n, options) in batch] ) )
+			return (results, service.get_metrics())
+		finally:
+			await service.close()
+
+	return asyncio.run( run() )
+
+
+def test_concurrent_jobs_are_coalesced_by_target_and_shape():
+	(results, metrics) = run_jobs( [[(143, UNBALANCED), (143, BALANCED), (143, BALANCED)]] )
+	statuses = [result['status'] for result in results[0]]
+
+	assert statuses == [STATUS_NOT_FOUND, STATUS_FACTORED, STATUS_FACTORED]
+	assert metrics['coalesced'] == 1
+	assert metrics['cache_misses'] == 2
+
+
+def test_only_factored_results_are_served_across_shapes():
+	(results, metrics) = run_jobs( [[(143, UNBALANCED)], [(143, BALANCED)], [(143, UNBALANCED)]] )
+	(unbalanced, balanced, memoized) = [batch[0] for batch in results]
+
+	# the failed run is not memoized, the factored one is served to any shape
+	assert unbalanced['status'] == STATUS_NOT_FOUND and not unbalanced['cached']
+	assert balanced['status'] == STATUS_FACTORED and not balanced['cached']
+	assert memoized['status'] == STATUS_FACTORED and memoized['cached']
+	assert memoized['factors'] == [11, 13]
+	assert metrics['cache_hits'] == 1
+
+
+def test_only_jobs_sharing_work_are_batched():
+	# 143 = 11*13, 165 = 11*15, 169 = 13*13 and 195 = 13*15 have the same shape
+	targets = (143, 165, 169, 195)
+	(results, metrics) = run_jobs( [[(n, BALANCED) for n in targets]] )
+	assert [result['status'] for result in results[0]] == [STATUS_FACTORED]*4
+	# the iterative jobs share nothing, so they run in parallel
+	assert (metrics['batches'], metrics['mean_batch_size']) == (4, 1)
+
+	decomposition = dict( BALANCED, method='decomposition' )
+	(results, metrics) = run_jobs( [[(n, decomposition) for n in targets]] )
+	# the decomposition jobs share the BQM template
+	assert (metrics['batches'], metrics['batched_jobs']) == (1, 4)
+	assert metrics['latency']['p50'] <= metrics['latency']['p99'] <= metrics['latency']['max']
@@ -0,0 +1,32 @@
+import pytest
+
+np = pytest.importorskip( 'numpy' )
+
+from compose_BQM.sparse import sparse_BQM, sparse_BQM_from_arrays, FLOAT64_LIMIT, INT64_LIMIT
+
+
+def get_arrays( coeffs ):
+	variables = ['x' + str(idx) for idx in range(0, len(coeffs))]
+	indices = np.arange( len(coeffs), dtype=np.int32 )
+	return (variables, indices, indices.copy(), np.array( coeffs, dtype=np.int64 ))
+
+
+def test_energy_bound_of_arrays_is_exact():
+	for coeffs in ([3, -5, 7], [2**52, -2**52, 1], [FLOAT64_LIMIT-1, 1, -1], [2**62, -2**62 + 1]):
+		cBQM = sparse_BQM_from_arrays( *get_arrays( coeffs ), constant=-3 )
+		assert cBQM.max_energy == sum( abs(coeff) for coeff in coeffs ) + 3
+		# the energies that might overflow int64 are evaluated by Python integers
+		assert (cBQM.coeffs.dtype == object) == (cBQM.max_energy > INT64_LIMIT)
+
+
+def test_arrays_give_the_energies_of_the_dictionary():
+	cost_function = {('a', 'a'): 3, ('a', 'b'): -4, ('b', 'c'): 2**40, ('c', 'c'): -1}
+	cBQM = sparse_BQM( cost_function, 5 )
+	copy = sparse_BQM_from_arrays( cBQM.variables, cBQM.rows, cBQM.cols, cBQM.coeffs, 5 )
+	samples = [{'a': a, 'b': b, 'c': c} for a in (0, 1) for b in (0, 1) for c in (0, 1)]
+
+	expected = [5 + sum( value*sample[key[0]]*sample[key[1]] for (key, value) in cost_function.items() ) for sample in samples]
+	matrix = cBQM.samples_to_matrix( samples )
+	assert [int(energy) for energy in cBQM.energies( matrix )] == expected
+	assert [int(energy) for energy in copy.energies( matrix )] == expected
+	assert copy.max_energy == cBQM.max_energy
@@ -0,0 +1,78 @@
+import pytest
+
+np = pytest.importorskip( 'numpy' )
+
+from abstract_binary.abstract_binary_number import abstract_bin_num
+from abstract_binary.binary_number import bin_num
+from compose_BQM.compose_BQM import BQM_from_multiplication_table
+from compose_BQM.sparse import sparse_BQM
+from compose_BQM.stream import columnar_writer, spill_cost_function, load_cost_function
+
+
+# (bit length of the factors, block size, target)
+SHAPES = ((4, 3, 143), (8, 5, 211*241), (12, 4, 3001*2011))
+
+
+def get_BQM( bits, block_size, target ):
+	cBQM = BQM_from_multiplication_table( abstract_bin_num(bits), abstract_bin_num(bits), bin_num(target) )
+	cBQM.determine_blocks( block_size )
+	return cBQM
+
+
+def add_terms( terms, cost_function ):
+	for (key, value) in cost_function.items():
+		key = tuple( sorted( key ) )
+		terms[key] = terms.get( key, 0 ) + value
+
+
+def test_streamed_cost_function_equals_the_composed_one():
+	for shape in SHAPES:
+		(cost_function, constant) = get_BQM( *shape ).compose_cost_function()
+		composed = dict()
+		add_terms( composed, cost_function )
+
+		streamed = dict()
+		streamed_constant = 0
+		block_ids = list()
+		for (block_id, block_cost_function, block_constant, penalties) in get_BQM( *shape ).iterate_cost_function():
+			block_ids.append( block_id )
+			add_terms( streamed, block_cost_function )
+			add_terms( streamed, penalties )
+			streamed_constant = streamed_constant + block_constant
+
+		assert block_ids == list( range(0, len(block_ids)) )
+		assert streamed_constant == constant
+		assert {key: value for (key, value) in streamed.items() if value != 0} == {key: value for (key, value) in composed.items() if value != 0}
+
+
+def test_spilled_cost_function_gives_the_composed_energies( tmp_path ):
+	rng = np.random.default_rng( 2 )
+	for shape in SHAPES:
+		cSparse = sparse_BQM( *get_BQM( *shape ).compose_cost_function() )
+		directory = str( tmp_path / ('bits' + str(shape[0])) )
+		meta = spill_cost_function( get_BQM( *shape ), directory )
+		assert meta['variables'] == cSparse.get_variable_num()
+
+		samples = rng.integers( 0, 2, size=(50, cSparse.get_variable_num()), dtype=np.uint8 )
+		expected = cSparse.energies( samples )
+		for mmap in (True, False):
+			cLoaded = load_cost_function( directory, mmap=mmap )
+			assert sorted( cLoaded.variables ) == sorted( cSparse.variables )
+			# the columns of the samples are reordered to the variables of the loaded cost function
+			columns = [cSparse.index[label] for label in cLoaded.variables]
+			assert np.array_equal( cLoaded.energies( samples[:, columns] ), expected )
+
+
+def test_coefficients_beyond_int64_are_kept( tmp_path ):
+	terms = {('a', 'a'): 2**70, ('a', 'b'): -3, ('b', 'b'): -2**64 + 1}
+	writer = columnar_writer( str(tmp_path) )
+	writer.write( terms, 5 )
+	writer.write( {('a', 'b'): 4} )
+	meta = writer.close()
+	assert (meta['terms'], meta['variables'], meta['chunks']) == (4, 2, 2)
+
+	cLoaded = load_cost_function( str(tmp_path) )
+	assert cLoaded.coeffs.dtype == object
+	samples = [{'a': a, 'b': b} for a in (0, 1) for b in (0, 1)]
+	expected = [5 + 2**70*sample['a'] + sample['a']*sample['b'] + (-2**64 + 1)*sample['b'] for sample in samples]
+	assert [int(energy) for energy in cLoaded.energies( cLoaded.samples_to_matrix( samples ) )] == expected
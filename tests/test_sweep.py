@@ -0,0 +1,43 @@
+import json
+
+import pytest
+
+from factorization.budget import STATUS_TIME_LIMIT
+from factorization.factor import STATUS_FACTORED, STATUS_NOT_FOUND
+from factorization.sweep import sweep_scheduler, get_bit_length_splits, main
+
+
+def test_splits_are_ordered_by_balance():
+	splits = get_bit_length_splits( 3*1009 )
+	assert splits[0] == (6, 6)
+	assert (10, 2) in splits
+	assert all( p_bits >= q_bits >= 2 and p_bits+q_bits in (12, 13) for (p_bits, q_bits) in splits )
+	assert [p_bits-q_bits for (p_bits, q_bits) in splits] == sorted( p_bits-q_bits for (p_bits, q_bits) in splits )
+	assert get_bit_length_splits( 3*1009, max_splits=3 ) == splits[:3]
+
+
+def test_sweep_finds_unbalanced_factors():
+	for workers in (1, 2):
+		cSweep = sweep_scheduler( workers=workers )
+		result = cSweep.run( 3*1009 )
+		assert result['status'] == STATUS_FACTORED
+		assert result['factors'] == [3, 1009]
+		assert result['split'] == [10, 2]
+		assert cSweep.get_stats()['errors'] == 0
+
+	for (n, factors) in ((15, [3, 5]), (129, [3, 43])):
+		assert sweep_scheduler( workers=1 ).run( n )['factors'] == factors
+
+	# a prime is not factorized by any split
+	assert sweep_scheduler( workers=1 ).run( 1009 )['status'] == STATUS_NOT_FOUND
+	assert sweep_scheduler( workers=1 ).run( 3*1009, time_limit=0 )['status'] == STATUS_TIME_LIMIT
+
+	with pytest.raises( Exception ):
+		sweep_scheduler( workers=1 ).run( 2*1009 )
+
+
+def test_sweep_command_line( capsys ):
+	assert main( ['3027', '1009', '--workers', '1', '--prescreen'] ) == 0
+	results = [json.loads( line ) for line in capsys.readouterr().out.splitlines()]
+	assert [result['factors'] for result in results] == [[3, 1009], None]
+	assert results[1]['prescreen'] == 'prime'